@@ -4,6 +4,7 @@
 #include "TerrainLoader.h"
 #include "Misc/Paths.h"
 #include "Misc/FileHelper.h"
+#include "HAL/PlatformFileManager.h"
 #include "JsonObjectConverter.h"
 
 bool UTerrainLoader::LoadTerrainConfig(FTerrainConfig& OutConfig)
@@ -12,12 +13,137 @@ bool UTerrainLoader::LoadTerrainConfig(FTerrainConfig& OutConfig)
     FString FilePath = FPaths::ProjectDir() + Filename;
     FString JsonString;
 
-    if (FFileHelper::LoadFileToString(JsonString, *FilePath)) {
-        return FJsonObjectConverter::JsonObjectStringToUStruct<FTerrainConfig>(JsonString, &OutConfig, 0, 0);
+    if (!FFileHelper::LoadFileToString(JsonString, *FilePath)) {
+        UE_LOG(LogTemp, Error, TEXT("Config file not found: %s"), *FilePath);
+        return false;
     }
 
-    UE_LOG(LogTemp, Error, TEXT("Config file not found: %s"), *FilePath);
-    return false;
+    if (!FJsonObjectConverter::JsonObjectStringToUStruct<FTerrainConfig>(JsonString, &OutConfig, 0, 0)) {
+        return false;
+    }
+
+    // binary exports keep the grids in sidecar files next to the manifest
+    const FString Directory = FPaths::GetPath(FilePath);
+    const int64 NumCells = (int64)OutConfig.XSize * OutConfig.YSize;
+
+    if (!OutConfig.HeightmapFile.IsEmpty()) {
+        const FString HeightmapPath = FPaths::Combine(Directory, OutConfig.HeightmapFile);
+        if (OutConfig.bQuantizedHeights) {
+            if (!ReadQuantizedHeights(HeightmapPath, NumCells, OutConfig.HeightmapMin, OutConfig.HeightmapMax, OutConfig.Heightmap)) {
+                return false;
+            }
+        } else {
+            OutConfig.Heightmap.SetNumUninitialized(NumCells);
+            if (!ReadBlob(HeightmapPath, OutConfig.Heightmap.GetData(), NumCells * sizeof(float))) {
+                return false;
+            }
+        }
+    }
+
+    if (!OutConfig.VegetationMapFile.IsEmpty()
+        && !ReadInt8Grid(FPaths::Combine(Directory, OutConfig.VegetationMapFile), NumCells, OutConfig.VegetationMap)) {
+        return false;
+    }
+
+    if (!OutConfig.SpeciesMapFile.IsEmpty()
+        && !ReadInt8Grid(FPaths::Combine(Directory, OutConfig.SpeciesMapFile), NumCells, OutConfig.SpeciesMap)) {
+        return false;
+    }
+
+    if (!OutConfig.InstancesFile.IsEmpty()) {
+        const FString InstancesPath = FPaths::Combine(Directory, OutConfig.InstancesFile);
+        const int64 FileSize = FPlatformFileManager::Get().GetPlatformFile().FileSize(*InstancesPath);
+        if (FileSize < 0 || FileSize % sizeof(FTreeInstance) != 0) {
+            UE_LOG(LogTemp, Error, TEXT("Invalid tree instance file: %s"), *InstancesPath);
+            return false;
+        }
+
+        OutConfig.Instances.SetNumUninitialized(FileSize / sizeof(FTreeInstance));
+        if (!ReadBlob(InstancesPath, OutConfig.Instances.GetData(), FileSize)) {
+            return false;
+        }
+    }
+
+    // dense maps are only exported on request; Blueprints calling SpawnVegetation or
+    // SpawnSpeciesVegetation get them rebuilt from the instance table instead
+    if (OutConfig.VegetationMap.Num() == 0 && OutConfig.Instances.Num() > 0) {
+        RasterizeInstances(OutConfig);
+    }
+
+    return true;
+}
+
+void UTerrainLoader::RasterizeInstances(FTerrainConfig& Config)
+{
+    const int64 NumCells = (int64)Config.XSize * Config.YSize;
+    const bool bFillSpecies = Config.SpeciesMap.Num() == 0;
+
+    Config.VegetationMap.Init(0, NumCells);
+    if (bFillSpecies) {
+        Config.SpeciesMap.Init(-1, NumCells);
+    }
+
+    for (const FTreeInstance& Instance : Config.Instances) {
+        const int32 X = (int32)Instance.X;
+        const int32 Y = (int32)Instance.Y;
+        if (X < 0 || X >= Config.XSize || Y < 0 || Y >= Config.YSize) continue;
+
+        const int64 Index = (int64)Y * Config.XSize + X;
+        Config.VegetationMap[Index] = 2; // TREE
+        if (bFillSpecies) {
+            Config.SpeciesMap[Index] = Instance.Species;
+        }
+    }
+}
+
+bool UTerrainLoader::ReadBlob(const FString& FilePath, void* Destination, int64 Size)
+{
+    TUniquePtr<IFileHandle> Handle(FPlatformFileManager::Get().GetPlatformFile().OpenRead(*FilePath));
+    if (!Handle) {
+        UE_LOG(LogTemp, Error, TEXT("Terrain data file not found: %s"), *FilePath);
+        return false;
+    }
+
+    if (Handle->Size() != Size) {
+        UE_LOG(LogTemp, Error, TEXT("Terrain data file %s has %lld bytes, expected %lld"), *FilePath, Handle->Size(), Size);
+        return false;
+    }
+
+    // one bulk read straight into the destination array
+    return Handle->Read(static_cast<uint8*>(Destination), Size);
+}
+
+bool UTerrainLoader::ReadInt8Grid(const FString& FilePath, int64 NumCells, TArray<int32>& OutGrid)
+{
+    TArray<int8> Cells;
+    Cells.SetNumUninitialized(NumCells);
+    if (!ReadBlob(FilePath, Cells.GetData(), NumCells)) {
+        return false;
+    }
+
+    OutGrid.SetNumUninitialized(NumCells);
+    for (int64 Index = 0; Index < NumCells; ++Index) {
+        OutGrid[Index] = Cells[Index];
+    }
+
+    return true;
+}
+
+bool UTerrainLoader::ReadQuantizedHeights(const FString& FilePath, int64 NumCells, float Min, float Max, TArray<float>& OutHeights)
+{
+    TArray<uint16> Levels;
+    Levels.SetNumUninitialized(NumCells);
+    if (!ReadBlob(FilePath, Levels.GetData(), NumCells * sizeof(uint16))) {
+        return false;
+    }
+
+    const float Step = (Max - Min) / 65535.f;
+    OutHeights.SetNumUninitialized(NumCells);
+    for (int64 Index = 0; Index < NumCells; ++Index) {
+        OutHeights[Index] = Min + Levels[Index] * Step;
+    }
+
+    return true;
 }
 
 FString UTerrainLoader::ReadFile(FString FilePath)
@@ -6,6 +6,35 @@
 #include "Kismet/BlueprintFunctionLibrary.h"
 #include "TerrainLoader.generated.h"
 
+// One tree of the exported instance table. The layout matches utils.INSTANCE_DTYPE,
+// so the table is read from disk with a single bulk read.
+USTRUCT(BlueprintType)
+struct FTreeInstance {
+	GENERATED_BODY()
+
+	// grid position, in cells
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	float X = 0.0f;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	float Y = 0.0f;
+
+	// normalised terrain height under the tree
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	float Z = 0.0f;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	float Yaw = 0.0f;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	float Scale = 1.0f;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	int32 Species = 0;
+};
+
+static_assert(sizeof(FTreeInstance) == 24, "FTreeInstance must match utils.INSTANCE_DTYPE");
+
 USTRUCT(BlueprintType)
 struct FTerrainConfig {
 	GENERATED_BODY()
@@ -42,6 +71,41 @@ struct FTerrainConfig {
 
 	UPROPERTY(EditAnywhere, BlueprintReadWrite)
 	float FogDensity;
+
+	// Species index of every tree (-1 elsewhere). Rebuilt from Instances when not exported.
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	TArray<int32> SpeciesMap;
+
+	// Raw little-endian float32 heightmap next to config.json, replacing Heightmap when set
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	FString HeightmapFile;
+
+	// Raw int8 vegetation map next to config.json, replacing VegetationMap when set.
+	// Only exported on request; otherwise VegetationMap is rebuilt from Instances.
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	FString VegetationMapFile;
+
+	// Raw int8 species map next to config.json, replacing SpeciesMap when set
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	FString SpeciesMapFile;
+
+	// Sparse tree instances, loaded from InstancesFile
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	TArray<FTreeInstance> Instances;
+
+	// Packed FTreeInstance records next to config.json
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	FString InstancesFile;
+
+	// HeightmapFile holds uint16 levels spanning [HeightmapMin, HeightmapMax] instead of float32
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	bool bQuantizedHeights = false;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	float HeightmapMin = 0.f;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	float HeightmapMax = 1.f;
 };
 /**
  * 
@@ -55,4 +119,12 @@ public:
 	UFUNCTION(BlueprintCallable, Category = "Terrain")
 	static bool LoadTerrainConfig(FTerrainConfig& OutConfig);
 	static FString ReadFile(FString FilePath);
+
+private:
+	static bool ReadBlob(const FString& FilePath, void* Destination, int64 Size);
+	static bool ReadInt8Grid(const FString& FilePath, int64 NumCells, TArray<int32>& OutGrid);
+	static bool ReadQuantizedHeights(const FString& FilePath, int64 NumCells, float Min, float Max, TArray<float>& OutHeights);
+	// Fills the empty VegetationMap (TREE on every instance, EMPTY elsewhere) and
+	// SpeciesMap from the instance table
+	static void RasterizeInstances(FTerrainConfig& Config);
 };
@@ -21,6 +21,17 @@ void AVegetationSpawner::SpawnVegetation(int32 XSize, int32 YSize, float Scale,
 		return;
 	}
 
+	if (VegetationMap.Num() == 0) {
+		// exports without a forest ship no vegetation map
+		TreeISM->ClearInstances();
+		return;
+	}
+
+	if (VegetationMap.Num() < XSize * YSize || Heightmap.Num() < XSize * YSize) {
+		UE_LOG(LogTemp, Warning, TEXT("VegetationMap does not cover the %dx%d terrain"), XSize, YSize);
+		return;
+	}
+
 	TreeISM->ClearInstances();
 	TreeISM->SetStaticMesh(TreeMesh);
 
@@ -31,6 +42,9 @@ void AVegetationSpawner::SpawnVegetation(int32 XSize, int32 YSize, float Scale,
 	FBoxSphereBounds MeshBounds = TreeMesh->GetBounds();
 	float MeshOffsetToGround = MeshBounds.BoxExtent.Z - MeshBounds.Origin.Z;
 
+	// collected first and added in one bulk call, like SpawnInstances
+	TArray<FTransform> Transforms;
+
 	for (int X = 0; X < XSize; ++X) {
 		for (int Y = 0; Y < YSize; ++Y) {
 			int index = Y * XSize + X;
@@ -49,8 +63,139 @@ void AVegetationSpawner::SpawnVegetation(int32 XSize, int32 YSize, float Scale,
 			Position.Z += MeshOffsetToGround * InstanceScale;
 			Position.Z -= 0.02f * ZMultiplier; // slight bury to avoid floating
 
-			FTransform InstanceTransform(RandomRotation, Position, RandomScale);
-			TreeISM->AddInstance(InstanceTransform);
+			Transforms.Emplace(RandomRotation, Position, RandomScale);
+		}
+	}
+
+	if (Transforms.Num() > 0) {
+		TreeISM->AddInstances(Transforms, false);
+	}
+}
+
+TArray<UInstancedStaticMeshComponent*> AVegetationSpawner::PrepareSpeciesISMs(TArray<float>& OutMeshOffsetsToGround)
+{
+	TArray<UInstancedStaticMeshComponent*> ISMs;
+	OutMeshOffsetsToGround.Reset();
+
+	if (Species.Num() == 0) {
+		float MeshOffsetToGround = 0.0f;
+		TreeISM->ClearInstances();
+		if (TreeMesh) {
+			TreeISM->SetStaticMesh(TreeMesh);
+			if (TreeMaterial) {
+				TreeISM->SetMaterial(0, TreeMaterial);
+			}
+
+			FBoxSphereBounds MeshBounds = TreeMesh->GetBounds();
+			MeshOffsetToGround = MeshBounds.BoxExtent.Z - MeshBounds.Origin.Z;
+		}
+
+		ISMs.Add(TreeMesh ? TreeISM : nullptr);
+		OutMeshOffsetsToGround.Add(MeshOffsetToGround);
+		return ISMs;
+	}
+
+	// one component per species, created on demand and reused between spawns
+	while (SpeciesISMs.Num() < Species.Num()) {
+		UInstancedStaticMeshComponent* ISM = NewObject<UInstancedStaticMeshComponent>(this);
+		ISM->SetupAttachment(GetRootComponent());
+		ISM->RegisterComponent();
+		SpeciesISMs.Add(ISM);
+	}
+
+	for (int32 SpeciesIndex = 0; SpeciesIndex < SpeciesISMs.Num(); ++SpeciesIndex) {
+		SpeciesISMs[SpeciesIndex]->ClearInstances();
+	}
+
+	for (int32 SpeciesIndex = 0; SpeciesIndex < Species.Num(); ++SpeciesIndex) {
+		const FVegetationSpecies& Info = Species[SpeciesIndex];
+		UInstancedStaticMeshComponent* ISM = SpeciesISMs[SpeciesIndex];
+
+		float MeshOffsetToGround = 0.0f;
+		if (Info.Mesh) {
+			ISM->SetStaticMesh(Info.Mesh);
+			if (Info.Material) {
+				ISM->SetMaterial(0, Info.Material);
+			}
+
+			FBoxSphereBounds MeshBounds = Info.Mesh->GetBounds();
+			MeshOffsetToGround = MeshBounds.BoxExtent.Z - MeshBounds.Origin.Z;
+		}
+
+		ISMs.Add(Info.Mesh ? ISM : nullptr);
+		OutMeshOffsetsToGround.Add(MeshOffsetToGround);
+	}
+
+	return ISMs;
+}
+
+void AVegetationSpawner::SpawnSpeciesVegetation(int32 XSize, int32 YSize, float Scale, float ZMultiplier, const TArray<float>& Heightmap, const TArray<int32>& SpeciesMap)
+{
+	if (SpeciesMap.Num() < XSize * YSize || Heightmap.Num() < XSize * YSize) {
+		UE_LOG(LogTemp, Error, TEXT("SpeciesMap or Heightmap is smaller than the terrain!"));
+		return;
+	}
+
+	TArray<float> MeshOffsetsToGround;
+	TArray<UInstancedStaticMeshComponent*> ISMs = PrepareSpeciesISMs(MeshOffsetsToGround);
+
+	TArray<TArray<FTransform>> Transforms;
+	Transforms.SetNum(ISMs.Num());
+
+	for (int X = 0; X < XSize; ++X) {
+		for (int Y = 0; Y < YSize; ++Y) {
+			int index = Y * XSize + X;
+
+			int32 SpeciesIndex = SpeciesMap[index];
+			if (!ISMs.IsValidIndex(SpeciesIndex) || !ISMs[SpeciesIndex]) continue;
+
+			float MinScale = Species.IsValidIndex(SpeciesIndex) ? Species[SpeciesIndex].MinScale : 0.25f;
+			float MaxScale = Species.IsValidIndex(SpeciesIndex) ? Species[SpeciesIndex].MaxScale : 0.4f;
+			float Z = Heightmap[index] * ZMultiplier;
+
+			FVector Position(X * Scale, Y * Scale, Z);
+
+			FRotator RandomRotation = FRotator(0, FMath::FRandRange(0.0f, 360.0f), 0);
+
+			float InstanceScale = FMath::FRandRange(MinScale, MaxScale);
+			FVector RandomScale(InstanceScale);
+
+			Position.Z += MeshOffsetsToGround[SpeciesIndex] * InstanceScale;
+			Position.Z -= 0.02f * ZMultiplier; // slight bury to avoid floating
+
+			Transforms[SpeciesIndex].Emplace(RandomRotation, Position, RandomScale);
+		}
+	}
+
+	for (int32 SpeciesIndex = 0; SpeciesIndex < ISMs.Num(); ++SpeciesIndex) {
+		if (ISMs[SpeciesIndex] && Transforms[SpeciesIndex].Num() > 0) {
+			ISMs[SpeciesIndex]->AddInstances(Transforms[SpeciesIndex], false);
+		}
+	}
+}
+
+void AVegetationSpawner::SpawnInstances(float Scale, float ZMultiplier, const TArray<FTreeInstance>& Instances)
+{
+	TArray<float> MeshOffsetsToGround;
+	TArray<UInstancedStaticMeshComponent*> ISMs = PrepareSpeciesISMs(MeshOffsetsToGround);
+
+	// yaw and scale come precomputed from the table, so this is a plain transform pass
+	TArray<TArray<FTransform>> Transforms;
+	Transforms.SetNum(ISMs.Num());
+
+	for (const FTreeInstance& Instance : Instances) {
+		if (!ISMs.IsValidIndex(Instance.Species) || !ISMs[Instance.Species]) continue;
+
+		FVector Position(Instance.X * Scale, Instance.Y * Scale, Instance.Z * ZMultiplier);
+		Position.Z += MeshOffsetsToGround[Instance.Species] * Instance.Scale;
+		Position.Z -= 0.02f * ZMultiplier; // slight bury to avoid floating
+
+		Transforms[Instance.Species].Emplace(FRotator(0, Instance.Yaw, 0), Position, FVector(Instance.Scale));
+	}
+
+	for (int32 SpeciesIndex = 0; SpeciesIndex < ISMs.Num(); ++SpeciesIndex) {
+		if (ISMs[SpeciesIndex] && Transforms[SpeciesIndex].Num() > 0) {
+			ISMs[SpeciesIndex]->AddInstances(Transforms[SpeciesIndex], false);
 		}
 	}
 }
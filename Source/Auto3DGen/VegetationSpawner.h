@@ -4,8 +4,26 @@
 
 #include "CoreMinimal.h"
 #include "GameFramework/Actor.h"
+#include "TerrainLoader.h"
 #include "VegetationSpawner.generated.h"
 
+USTRUCT(BlueprintType)
+struct FVegetationSpecies {
+	GENERATED_BODY()
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	UStaticMesh* Mesh = nullptr;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	UMaterialInterface* Material = nullptr;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	float MinScale = 0.25f;
+
+	UPROPERTY(EditAnywhere, BlueprintReadWrite)
+	float MaxScale = 0.4f;
+};
+
 UCLASS()
 class AUTO3DGEN_API AVegetationSpawner : public AActor
 {
@@ -24,6 +42,14 @@ public:
 	UPROPERTY(VisibleAnywhere, BlueprintReadOnly, Category = "Vegetation")
 	class UInstancedStaticMeshComponent* TreeISM;
 
+	// Meshes of the species simulated by pyforest, indexed by species id
+	UPROPERTY(EditAnywhere, BlueprintReadWrite, Category = "Vegetation")
+	TArray<FVegetationSpecies> Species;
+
+	// One instanced mesh component per species, created by SpawnSpeciesVegetation and SpawnInstances
+	UPROPERTY(VisibleAnywhere, BlueprintReadOnly, Transient, Category = "Vegetation")
+	TArray<class UInstancedStaticMeshComponent*> SpeciesISMs;
+
 	UFUNCTION(BlueprintCallable, Category = "Vegetation")
 	void SpawnVegetation(
 		int32 XSize,
@@ -34,7 +60,31 @@ public:
 		const TArray<int32>& VegetationMap
 	);
 
+	UFUNCTION(BlueprintCallable, Category = "Vegetation")
+	void SpawnSpeciesVegetation(
+		int32 XSize,
+		int32 YSize,
+		float Scale,
+		float ZMultiplier,
+		const TArray<float>& Heightmap,
+		const TArray<int32>& SpeciesMap
+	);
+
+	// Spawns the sparse tree table exported by the Python side (FTerrainConfig::Instances),
+	// adding the instances of each species in one bulk call. Without Species, every tree
+	// uses TreeMesh.
+	UFUNCTION(BlueprintCallable, Category = "Vegetation")
+	void SpawnInstances(
+		float Scale,
+		float ZMultiplier,
+		const TArray<FTreeInstance>& Instances
+	);
+
 protected:
+	// Creates the per-species components, assigns their meshes and returns the mesh
+	// ground offsets. Without Species, TreeISM with TreeMesh stands for species 0.
+	TArray<class UInstancedStaticMeshComponent*> PrepareSpeciesISMs(TArray<float>& OutMeshOffsetsToGround);
+
 	// Called when the game starts or when spawned
 	virtual void BeginPlay() override;
 
@@ -0,0 +1,267 @@
+import weakref
+import threading
+import numpy as np
+from collections import OrderedDict
+from numpy.typing import NDArray
+from typing import Any, Callable
+from diagnostics import span
+
+# Layer functions by name, see `layer`
+LAYERS: dict[str, Callable[..., NDArray]] = {}
+
+# Parameterised layers (e.g. height bands) memoised per heightmap; the least recently
+# used are evicted first, so slider sweeps do not accumulate full-size masks
+MAX_PARAMETERISED_LAYERS = 4
+
+
+def layer(name: str) -> Callable[[Callable[..., NDArray]], Callable[..., NDArray]]:
+    """
+    Decorator registering a derived terrain layer.
+
+    The function receives the TerrainAttributes of a heightmap followed by the layer's
+    parameters, and may read other layers through it, so new placement rules (e.g.
+    aspect or wetness) build on the memoised gradient instead of recomputing it.
+
+    Args:
+        name (str): Layer name, as passed to `TerrainAttributes.get`.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def register(func: Callable[..., NDArray]) -> Callable[..., NDArray]:
+        LAYERS[name] = func
+        return func
+
+    return register
+
+
+class TerrainAttributes:
+    """
+    Per-cell attributes derived from one heightmap, computed on first use and memoised.
+
+    Layers are stored in compact dtypes (float32 gradients, slope and curvature, int8
+    normals, bool masks) and returned read-only, since they are shared between callers.
+    Parameterised layers (e.g. height bands) are memoised per parameter values, keeping
+    only the MAX_PARAMETERISED_LAYERS most recently used.
+
+    The heightmap must not be modified while its attributes are in use; see
+    `terrain_attributes` to share them between all users of a heightmap.
+
+    Attributes:
+        heightmap (NDArray): The 2D heightmap the layers are derived from.
+    """
+
+    def __init__(self, heightmap: NDArray) -> None:
+        self.heightmap = heightmap
+
+        self._layers: OrderedDict[tuple, NDArray] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, name: str, *params: Any) -> NDArray:
+        """
+        Return a layer, computing it on first use.
+
+        Args:
+            name (str): Name of a registered layer (see `layer`).
+            *params: Parameters of the layer.
+
+        Returns:
+            NDArray: The read-only layer.
+        """
+
+        key = (name, *params)
+        with self._lock:
+            value = self._layers.get(key)
+            if value is not None:
+                self._layers.move_to_end(key)
+                return value
+
+            with span(f"TerrainAttributes.{name}") as active:
+                value = LAYERS[name](self, *params)
+                active.annotate(shape=list(value.shape), nbytes=value.nbytes)
+            value.flags.writeable = False
+            self._layers[key] = value
+
+            if params:
+                parameterised = [layer_key for layer_key in self._layers if len(layer_key) > 1]
+                for stale in parameterised[: max(len(parameterised) - MAX_PARAMETERISED_LAYERS, 0)]:
+                    del self._layers[stale]
+            return value
+
+    def drop(self, name: str | None = None) -> None:
+        """
+        Free memoised layers; they are recomputed when needed again.
+
+        Args:
+            name (str, optional): Layer to drop, with all its parameter values. Defaults
+                to None (all layers).
+        """
+
+        with self._lock:
+            for key in [key for key in self._layers if name is None or key[0] == name]:
+                del self._layers[key]
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the memoised layers."""
+
+        with self._lock:
+            return sum(value.nbytes for value in self._layers.values())
+
+    @property
+    def gradient(self) -> NDArray:
+        """float32 array of shape (2, H, W): height change per cell along rows and columns."""
+
+        return self.get("gradient")
+
+    @property
+    def slope(self) -> NDArray:
+        """float32 gradient magnitude, normalised to [0, 1] over the map."""
+
+        return self.get("slope")
+
+    @property
+    def curvature(self) -> NDArray:
+        """float32 Laplacian of the heights: positive in valleys, negative on ridges."""
+
+        return self.get("curvature")
+
+    def normals(self, z_scale: float = 1.0) -> NDArray:
+        """
+        Unit surface normals, as int8 (H, W, 3) (x, y, z) components scaled by 127.
+
+        Args:
+            z_scale (float, optional): Height of a unit heightmap step in cell widths.
+                Defaults to 1.0.
+
+        Returns:
+            NDArray: The read-only normals.
+        """
+
+        return self.get("normals", float(z_scale))
+
+    def height_band(self, low: float, high: float) -> NDArray:
+        """
+        Boolean mask of the cells with heights in [low, high].
+
+        Args:
+            low (float): Lowest height of the band.
+            high (float): Highest height of the band.
+
+        Returns:
+            NDArray: The read-only mask.
+        """
+
+        return self.get("height_band", float(low), float(high))
+
+
+@layer("gradient")
+def _gradient(attrs: TerrainAttributes) -> NDArray:
+    return np.stack(np.gradient(attrs.heightmap)).astype(np.float32, copy=False)
+
+
+@layer("slope")
+def _slope(attrs: TerrainAttributes) -> NDArray:
+    dy, dx = attrs.gradient
+    slope = np.sqrt(dx**2 + dy**2)
+    slope -= slope.min()
+    slope /= slope.max()
+    return slope
+
+
+@layer("curvature")
+def _curvature(attrs: TerrainAttributes) -> NDArray:
+    dy, dx = attrs.gradient
+    curvature = np.gradient(dy, axis=0)
+    curvature += np.gradient(dx, axis=1)
+    return curvature
+
+
+def surface_normals(gradient: NDArray, z_scale: float = 1.0) -> NDArray:
+    """
+    Computes unit surface normals from a heightmap gradient.
+
+    Args:
+        gradient (NDArray): (2, H, W) height change per cell along rows and columns.
+        z_scale (float, optional): Height of a unit heightmap step in cell widths.
+            Defaults to 1.0.
+
+    Returns:
+        NDArray: float32 array of shape (H, W, 3) with the (x, y, z) components.
+    """
+
+    dy, dx = gradient
+    normals = np.empty((*dx.shape, 3), dtype=np.float32)
+    normals[..., 0] = dx
+    normals[..., 0] *= -z_scale
+    normals[..., 1] = dy
+    normals[..., 1] *= -z_scale
+    normals[..., 2] = 1.0
+    normals /= np.linalg.norm(normals, axis=-1, keepdims=True)
+    return normals
+
+
+@layer("normals")
+def _normals(attrs: TerrainAttributes, z_scale: float) -> NDArray:
+    normals = surface_normals(attrs.gradient, z_scale)
+    normals *= 127
+    return np.rint(normals).astype(np.int8)
+
+
+@layer("height_band")
+def _height_band(attrs: TerrainAttributes, low: float, high: float) -> NDArray:
+    return (attrs.heightmap >= low) & (attrs.heightmap <= high)
+
+
+class _DetachedAttributes(TerrainAttributes):
+    """TerrainAttributes holding its heightmap weakly, so the registry keeps no array alive."""
+
+    def __init__(self, heightmap: NDArray) -> None:
+        self._heightmap = weakref.ref(heightmap)
+        self._layers = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def heightmap(self) -> NDArray | None:  # type: ignore[override]
+        return self._heightmap()
+
+
+# attributes of the live read-only heightmaps, by id; entries are removed when their
+# heightmap is garbage collected
+_attached: dict[int, TerrainAttributes] = {}
+_attached_lock = threading.Lock()
+
+
+def terrain_attributes(heightmap: NDArray) -> TerrainAttributes:
+    """
+    Return the attributes attached to a heightmap.
+
+    Read-only heightmaps (e.g. those returned by the ArrayCache and TerrainPipeline)
+    share one TerrainAttributes for as long as the array is alive, so every consumer
+    (forest filtering, species preferences) computes each layer once per heightmap.
+    Writable heightmaps could change in place, so they get fresh, unshared attributes.
+
+    Args:
+        heightmap (NDArray): 2D array representing the terrain height values.
+
+    Returns:
+        TerrainAttributes: The heightmap's attributes.
+    """
+
+    if heightmap.flags.writeable:
+        return TerrainAttributes(heightmap)
+
+    key = id(heightmap)
+    with _attached_lock:
+        attrs = _attached.get(key)
+        if attrs is None or attrs.heightmap is not heightmap:
+            attrs = _attached[key] = _DetachedAttributes(heightmap)
+            weakref.finalize(heightmap, _detach, key, attrs)
+        return attrs
+
+
+def _detach(key: int, attrs: TerrainAttributes) -> None:
+    with _attached_lock:
+        if _attached.get(key) is attrs:
+            del _attached[key]
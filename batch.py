@@ -0,0 +1,446 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+from pathlib import Path
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field, fields
+from typing import Iterable, Iterator
+from cache import stable_hash
+from utils import (
+    INSTANCE_DTYPE,
+    Mountain,
+    TerrainConfig,
+    SpeciesConfig,
+    PyForestConfig,
+    PerlinNoiseConfig,
+    TerrainTransformConfig,
+    tree_instances,
+    generate_heightmap,
+    generate_vegetation,
+)
+
+# Name of the per-job record written next to an exported config once it is complete
+DONE_FILE = "job.json"
+
+# Per-job timing records, appended as jobs finish
+REPORT_FILE = "timings.jsonl"
+
+# Defaults of the UI for the transform, so manifests only list what they change
+TRANSFORM_DEFAULTS = dict(
+    max_height=1.0,
+    min_height=0.0,
+    flatness=1.0,
+    slope_x_begin=0.0,
+    slope_x_end=0.0,
+    slope_y_begin=0.0,
+    slope_y_end=0.0,
+)
+
+
+@dataclass
+class ExportSettings:
+    """Scalar settings of the exported TerrainConfig, with the UI defaults."""
+
+    scale: float = 100.0
+    z_multiplier: float = 7000.0
+    uv_scale: float = 1.0
+    water_on: bool = False
+    water_height: float = 0.0
+    fog_on: bool = False
+    fog_density: int = 0
+    # write the heightmap as uint16 levels instead of float32 (see quantize_heights)
+    quantize_heights: bool = False
+    # also write the dense vegetation and species maps next to the instance table
+    dense_maps: bool = False
+
+
+@dataclass
+class BatchJob:
+    """
+    One terrain variant: heightmap, optional forest and export bundle.
+
+    Attributes:
+        name (str): Unique job name, also the name of its output directory.
+        noise (PerlinNoiseConfig): Perlin noise parameters.
+        transform (TerrainTransformConfig): Terrain transformation parameters.
+        mountains (list[Mountain]): Mountains and holes.
+        terrain_amplifier (float): Amplification factor for the terrain.
+        forest (PyForestConfig | None): Forest parameters, or None for bare terrain.
+        export (ExportSettings): Scalar settings of the exported config.
+    """
+
+    name: str
+    noise: PerlinNoiseConfig
+    transform: TerrainTransformConfig
+    mountains: list[Mountain] = field(default_factory=list)
+    terrain_amplifier: float = 0.7
+    forest: PyForestConfig | None = None
+    export: ExportSettings = field(default_factory=ExportSettings)
+
+    @property
+    def key(self) -> str:
+        """Stable hash of every job parameter, used to detect finished jobs on resume."""
+
+        return stable_hash("batch-job", self)
+
+
+def _read_manifest(path: Path) -> dict | list:
+    """Parse a JSON or YAML manifest, depending on its suffix."""
+
+    text = path.read_text()
+    if path.suffix.lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as error:
+            raise RuntimeError(f"Reading {path} requires PyYAML (pip install pyyaml)") from error
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+
+def _merge(defaults: dict, spec: dict) -> dict:
+    """Merge a job spec over the manifest defaults, section by section."""
+
+    merged = dict(defaults)
+    for key, value in spec.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+def parse_job(spec: dict, name: str) -> BatchJob:
+    """
+    Build a BatchJob from its manifest entry.
+
+    Args:
+        spec (dict): Entry with the sections `noise` (required), `transform`, `mountains`,
+            `terrain_amplifier`, `forest` (its size defaults to the noise size and its
+            `species` are SpeciesConfig entries) and `export`.
+        name (str): Job name used when the entry has no `name`.
+
+    Returns:
+        BatchJob: The parsed job.
+
+    Raises:
+        ValueError: If the entry is invalid, e.g. its name is not a plain directory name.
+    """
+
+    name = str(spec.get("name", name))
+    # the name becomes the job's output directory, so it must stay inside the batch root
+    if name in ("", ".", "..") or any(char in name for char in '/\\:\0'):
+        raise ValueError(f"Job {name!r}: names must not be empty, '.', '..' or contain / \\ :")
+    unknown = set(spec) - {f.name for f in fields(BatchJob)}
+    if unknown:
+        raise ValueError(f"Job {name!r}: unknown sections {sorted(unknown)}")
+    if "noise" not in spec:
+        raise ValueError(f"Job {name!r}: missing the 'noise' section")
+
+    try:
+        noise = PerlinNoiseConfig(**spec["noise"])
+        transform = TerrainTransformConfig(**{**TRANSFORM_DEFAULTS, **spec.get("transform", {})})
+        mountains = [Mountain(**mountain) for mountain in spec.get("mountains", [])]
+
+        forest = None
+        if spec.get("forest") is not None:
+            forest_spec = {"width": noise.width, "height": noise.height, **spec["forest"]}
+            if forest_spec.get("species") is not None:
+                forest_spec["species"] = [SpeciesConfig(**sp) for sp in forest_spec["species"]]
+            forest = PyForestConfig(**forest_spec)
+
+        export = ExportSettings(**spec.get("export", {}))
+    except TypeError as error:
+        raise ValueError(f"Job {name!r}: {error}") from error
+
+    return BatchJob(
+        name=name,
+        noise=noise,
+        transform=transform,
+        mountains=mountains,
+        terrain_amplifier=float(spec.get("terrain_amplifier", 0.7)),
+        forest=forest,
+        export=export,
+    )
+
+
+def load_manifest(path: str | Path) -> list[BatchJob]:
+    """
+    Load the jobs of a JSON or YAML manifest.
+
+    A manifest is either a list of job entries or a mapping with a `jobs` list and
+    optional `defaults` merged into every entry (see `parse_job`). Unnamed jobs are
+    named after the manifest and their index.
+
+    Args:
+        path (str | Path): Manifest file (`.json`, `.yaml` or `.yml`).
+
+    Returns:
+        list[BatchJob]: Jobs in manifest order.
+    """
+
+    path = Path(path)
+    data = _read_manifest(path)
+    if isinstance(data, list):
+        data = {"jobs": data}
+
+    defaults = data.get("defaults") or {}
+    return [
+        parse_job(_merge(defaults, spec), f"{path.stem}-{index:04d}")
+        for index, spec in enumerate(data.get("jobs") or [])
+    ]
+
+
+def iter_jobs(paths: Iterable[str | Path]) -> Iterator[BatchJob]:
+    """
+    Yield the jobs of several manifests, checking that job names are unique.
+
+    Args:
+        paths (Iterable[str | Path]): Manifest files.
+
+    Yields:
+        BatchJob: Jobs in manifest order.
+    """
+
+    names: set[str] = set()
+    for path in paths:
+        for job in load_manifest(path):
+            if job.name in names:
+                raise ValueError(f"Duplicate job name {job.name!r} in {path}")
+            names.add(job.name)
+            yield job
+
+
+def is_done(job: BatchJob, out_dir: str | Path) -> bool:
+    """
+    Whether the job's bundle was already exported with the same parameters.
+
+    Args:
+        job (BatchJob): The job.
+        out_dir (str | Path): Batch output directory.
+
+    Returns:
+        bool: True if the job can be skipped.
+    """
+
+    try:
+        record = json.loads((Path(out_dir) / job.name / DONE_FILE).read_text())
+    except (OSError, ValueError):
+        return False
+    return record.get("key") == job.key
+
+
+@contextmanager
+def _timed(timings: dict[str, float], stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+
+def run_job(job: BatchJob, out_dir: str | Path) -> dict:
+    """
+    Generate and export one job into `out_dir/<job.name>/`.
+
+    The bundle is the `config.json` manifest with its binary sidecar files (see
+    `TerrainConfig.export_binary`). The DONE_FILE record is written last, so an
+    interrupted job is simply run again on resume.
+
+    Args:
+        job (BatchJob): The job.
+        out_dir (str | Path): Batch output directory.
+
+    Returns:
+        dict: Job record with its name, key, status, tree count and per-stage timings in seconds.
+    """
+
+    job_dir = Path(out_dir) / job.name
+    timings: dict[str, float] = {}
+    start = time.perf_counter()
+
+    with _timed(timings, "heightmap"):
+        heightmap = generate_heightmap(
+            job.noise, job.transform, job.mountains, job.terrain_amplifier
+        )
+
+    forest_map = np.empty(0, dtype=np.int8)
+    species_map = np.empty(0, dtype=np.int8)
+    instances = np.empty(0, dtype=INSTANCE_DTYPE)
+    if job.forest is not None:
+        with _timed(timings, "forest"):
+            forest_map, species_map = generate_vegetation(job.forest, heightmap)
+        with _timed(timings, "instances"):
+            instances = tree_instances(
+                forest_map,
+                heightmap,
+                species_map,
+                job.forest.species,
+                seed=job.forest.seed,
+            )
+
+    with _timed(timings, "export"):
+        job_dir.mkdir(parents=True, exist_ok=True)
+        TerrainConfig(
+            XSize=job.noise.width,
+            YSize=job.noise.height,
+            Scale=job.export.scale,
+            ZMultiplier=job.export.z_multiplier,
+            UVScale=job.export.uv_scale,
+            Heightmap=heightmap,
+            # Unreal rebuilds the dense maps from the instances unless they are exported
+            VegetationMap=forest_map if job.export.dense_maps else [],
+            SpeciesMap=species_map if job.export.dense_maps else [],
+            bWaterOn=job.export.water_on,
+            WaterHeight=job.export.water_height,
+            bFogOn=job.export.fog_on,
+            FogDensity=job.export.fog_density,
+            Instances=instances,
+            bQuantizedHeights=job.export.quantize_heights,
+        ).export_binary(job_dir / "config.json")
+
+    record = {
+        "name": job.name,
+        "key": job.key,
+        "status": "done",
+        "trees": len(instances),
+        "timings": timings,
+        "total": time.perf_counter() - start,
+    }
+
+    tmp_path = job_dir / f"{DONE_FILE}.tmp"
+    tmp_path.write_text(json.dumps(record))
+    tmp_path.replace(job_dir / DONE_FILE)
+    return record
+
+
+def run_batch(
+    jobs: Iterable[BatchJob],
+    out_dir: str | Path,
+    workers: int | None = None,
+    max_pending: int | None = None,
+    force: bool = False,
+) -> list[dict]:
+    """
+    Run jobs on a process pool, skipping those already exported.
+
+    Jobs are consumed lazily and at most `max_pending` of them are in flight at once,
+    so huge manifests do not flood the pool's queue. Every finished, skipped or failed
+    job is appended to REPORT_FILE in `out_dir` as soon as it is known.
+
+    Args:
+        jobs (Iterable[BatchJob]): Jobs to run.
+        out_dir (str | Path): Batch output directory.
+        workers (int, optional): Worker processes. Defaults to None (one per CPU).
+        max_pending (int, optional): Maximum jobs submitted but not finished.
+            Defaults to None (twice the worker count).
+        force (bool, optional): Rerun jobs that are already done. Defaults to False.
+
+    Returns:
+        list[dict]: Job records in completion order.
+    """
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+
+    records: list[dict] = []
+    pending: dict[Future, BatchJob] = {}
+
+    with open(out_dir / REPORT_FILE, "a") as report, ProcessPoolExecutor(workers) as pool:
+        def record(entry: dict) -> None:
+            records.append(entry)
+            report.write(json.dumps(entry) + "\n")
+            report.flush()
+
+        def collect(futures: set[Future]) -> None:
+            for future in futures:
+                job = pending.pop(future)
+                try:
+                    record(future.result())
+                except Exception as error:
+                    record({"name": job.name, "key": job.key, "status": "failed", "error": str(error)})
+
+        for job in jobs:
+            if not force and is_done(job, out_dir):
+                record({"name": job.name, "key": job.key, "status": "skipped"})
+                continue
+
+            if len(pending) >= max_pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+
+            pending[pool.submit(run_job, job, out_dir)] = job
+
+        collect(set(pending))
+
+    return records
+
+
+def summarize(records: list[dict], wall_time: float) -> str:
+    """
+    Format the timing report of a batch.
+
+    Args:
+        records (list[dict]): Job records from `run_batch`.
+        wall_time (float): Wall time of the batch in seconds.
+
+    Returns:
+        str: Counts per status, throughput and mean / max seconds per stage.
+    """
+
+    by_status: dict[str, int] = {}
+    for entry in records:
+        by_status[entry["status"]] = by_status.get(entry["status"], 0) + 1
+
+    done = [entry for entry in records if entry["status"] == "done"]
+    lines = [
+        ", ".join(f"{count} {status}" for status, count in sorted(by_status.items())),
+        f"wall time {wall_time:.2f} s, {len(done) / wall_time if wall_time > 0 else 0:.2f} jobs/s",
+    ]
+
+    stages = sorted({stage for entry in done for stage in entry["timings"]})
+    for stage in [*stages, "total"]:
+        values = [
+            entry["total"] if stage == "total" else entry["timings"][stage]
+            for entry in done
+            if stage == "total" or stage in entry["timings"]
+        ]
+        if values:
+            lines.append(f"{stage:>10}: mean {np.mean(values):8.3f} s, max {np.max(values):8.3f} s")
+
+    for entry in records:
+        if entry["status"] == "failed":
+            lines.append(f"failed {entry['name']}: {entry['error']}")
+
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Generate heightmaps, forests and Unreal export bundles from JSON / YAML manifests."
+    )
+    parser.add_argument("manifests", nargs="+", type=Path, help="job manifests (.json, .yaml, .yml)")
+    parser.add_argument("-o", "--out", type=Path, default=Path("batch_out"), help="output directory")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument(
+        "--max-pending", type=int, default=None, help="jobs in flight at once (default: 2 x workers)"
+    )
+    parser.add_argument("--force", action="store_true", help="rerun jobs that are already exported")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    records = run_batch(
+        iter_jobs(args.manifests), args.out, args.workers, args.max_pending, args.force
+    )
+    print(summarize(records, time.perf_counter() - start))
+
+    return 1 if any(entry["status"] == "failed" for entry in records) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
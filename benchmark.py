@@ -0,0 +1,381 @@
+import sys
+import json
+import time
+import argparse
+import platform
+import itertools
+import tempfile
+import tracemalloc
+import numpy as np
+from pathlib import Path
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+from pyforest import pyforest
+from preview import render_preview
+from utils import (
+    Mountain,
+    TerrainConfig,
+    PyForestConfig,
+    PerlinNoiseConfig,
+    TerrainTransformConfig,
+    gaussian_2d,
+    mountain_mask,
+    generate_noise,
+    generate_heightmap,
+    generate_forest_adapted_to_terrain,
+)
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# A benchmark factory does its setup and returns the callable that is timed
+BenchmarkFactory = Callable[..., Callable[[], object]]
+
+DEFAULT_SIZES = (256, 1024, 4096)
+
+
+def _terrain_inputs(
+    size: int, mountains: int = 0
+) -> tuple[PerlinNoiseConfig, TerrainTransformConfig, list[Mountain]]:
+    """Square map settings with `mountains` randomly placed, reproducible mountains."""
+
+    rng = np.random.default_rng(0)
+    config = PerlinNoiseConfig(height=size, width=size)
+    transform = TerrainTransformConfig(1.0, 0.0, 1.0, 0.0, 0.2, 0.0, 0.2)
+    mountain_list = [
+        Mountain(
+            x=int(rng.integers(size)),
+            y=int(rng.integers(size)),
+            sigma=float(rng.uniform(0.01, 0.05) * size),
+            hole=bool(rng.random() < 0.2),
+        )
+        for _ in range(mountains)
+    ]
+    return config, transform, mountain_list
+
+
+def _forest_config(size: int, trees: int) -> PyForestConfig:
+    return PyForestConfig(
+        width=size,
+        height=size,
+        initial_trees=trees,
+        min_height=0.3,
+        max_height=0.8,
+        max_slope=0.8,
+        seed=0,
+    )
+
+
+def bench_noise(size: int) -> Callable[[], object]:
+    config, _, _ = _terrain_inputs(size)
+    return lambda: generate_noise(config)
+
+
+def bench_heightmap(size: int, mountains: int) -> Callable[[], object]:
+    config, transform, mountain_list = _terrain_inputs(size, mountains)
+    return lambda: generate_heightmap(config, transform, mountain_list)
+
+
+def bench_mountain_mask(size: int, mountains: int) -> Callable[[], object]:
+    config, _, mountain_list = _terrain_inputs(size, mountains)
+    return lambda: mountain_mask(config, mountain_list)
+
+
+def bench_gaussian_2d(size: int, mountains: int) -> Callable[[], object]:
+    # the full-grid reference the windowed mountain mask replaced
+    _, _, mountain_list = _terrain_inputs(size, mountains)
+    return lambda: sum(
+        gaussian_2d((size, size), (m.y, m.x), m.sigma, m.amplitude) for m in mountain_list
+    )
+
+
+def bench_forest(size: int, trees: int) -> Callable[[], object]:
+    config, transform, _ = _terrain_inputs(size)
+    heightmap = generate_heightmap(config, transform)
+    forest_config = _forest_config(size, trees)
+    return lambda: generate_forest_adapted_to_terrain(forest_config, heightmap)
+
+
+def bench_pyforest(size: int, trees: int) -> Callable[[], object]:
+    # init + seed/grow/decay steps of the C++ module, without terrain filtering
+    def run() -> None:
+        forest = pyforest.Forest(size, size, initial_trees=trees, seed=0)
+        forest.run(3)
+
+    return run
+
+
+def _export_config(size: int) -> TerrainConfig:
+    config, transform, _ = _terrain_inputs(size)
+    heightmap = generate_heightmap(config, transform)
+    forest_map = generate_forest_adapted_to_terrain(_forest_config(size, 5), heightmap)
+    return TerrainConfig(
+        XSize=size,
+        YSize=size,
+        Scale=100.0,
+        ZMultiplier=7000.0,
+        UVScale=1.0,
+        Heightmap=heightmap,
+        VegetationMap=forest_map,
+        bWaterOn=False,
+        WaterHeight=0.0,
+        bFogOn=False,
+        FogDensity=0,
+    )
+
+
+def bench_export_json(size: int) -> Callable[[], object]:
+    terrain_config = _export_config(size)
+    # removed when the benchmark process exits
+    directory = tempfile.TemporaryDirectory(prefix="bench_export_")
+    return lambda: terrain_config.export_to_json(Path(directory.name) / "config.json")
+
+
+def bench_export_binary(size: int) -> Callable[[], object]:
+    terrain_config = _export_config(size)
+    # removed when the benchmark process exits
+    directory = tempfile.TemporaryDirectory(prefix="bench_export_")
+    return lambda: terrain_config.export_binary(Path(directory.name) / "config.json")
+
+
+def bench_preview(size: int, trees: int) -> Callable[[], object]:
+    config, transform, _ = _terrain_inputs(size)
+    heightmap = generate_heightmap(config, transform)
+    forest_map = generate_forest_adapted_to_terrain(_forest_config(size, trees), heightmap)
+    return lambda: render_preview(heightmap, forest_map)
+
+
+# Stage name -> (factory, parameter grid); every combination is run at every size
+BENCHMARKS: dict[str, tuple[BenchmarkFactory, dict[str, tuple]]] = {
+    "noise": (bench_noise, {}),
+    "heightmap": (bench_heightmap, {"mountains": (0, 10, 100)}),
+    "mountain_mask": (bench_mountain_mask, {"mountains": (10, 100)}),
+    "gaussian_2d": (bench_gaussian_2d, {"mountains": (10,)}),
+    "forest": (bench_forest, {"trees": (5, 50)}),
+    "pyforest": (bench_pyforest, {"trees": (5, 50)}),
+    "export_json": (bench_export_json, {}),
+    "export_binary": (bench_export_binary, {}),
+    "preview": (bench_preview, {"trees": (50,)}),
+}
+
+
+def case_name(stage: str, size: int, params: dict) -> str:
+    """Unique, stable name of a benchmark case, e.g. `heightmap[size=1024,mountains=10]`."""
+
+    return f"{stage}[" + ",".join(f"{k}={v}" for k, v in {"size": size, **params}.items()) + "]"
+
+
+def iter_cases(
+    stages: list[str] | None = None, sizes: tuple[int, ...] = DEFAULT_SIZES
+) -> list[tuple[str, int, dict]]:
+    """
+    Expand the benchmark grid.
+
+    Args:
+        stages (list[str], optional): Stages to run. Defaults to None (all of BENCHMARKS).
+        sizes (tuple[int, ...], optional): Square map sizes. Defaults to DEFAULT_SIZES.
+
+    Returns:
+        list[tuple[str, int, dict]]: (stage, size, parameters) of every case.
+    """
+
+    stages = list(BENCHMARKS) if stages is None else stages
+    unknown = set(stages) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError(f"Unknown stages {sorted(unknown)}, expected some of {list(BENCHMARKS)}")
+
+    cases = []
+    for stage in stages:
+        _, grid = BENCHMARKS[stage]
+        for size in sizes:
+            for values in itertools.product(*grid.values()):
+                cases.append((stage, size, dict(zip(grid, values))))
+    return cases
+
+
+def measure(stage: str, size: int, params: dict, repeats: int = 3) -> dict:
+    """
+    Run one benchmark case in the current process.
+
+    The timed callable runs once as a warm-up and then `repeats` times. Peak RSS is
+    read after the timed runs (it covers the whole process, including setup). A last
+    run under `tracemalloc` records the peak of memory allocated by the stage itself.
+
+    Args:
+        stage (str): Stage name, a key of BENCHMARKS.
+        size (int): Square map size.
+        params (dict): Parameters of the stage factory.
+        repeats (int, optional): Timed runs. Defaults to 3.
+
+    Returns:
+        dict: Minimum and median wall time in seconds, peak RSS and peak traced
+            allocations in MiB (peak RSS is None where unsupported).
+    """
+
+    factory, _ = BENCHMARKS[stage]
+    run = factory(size, **params)
+    run()
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    peak_rss = None
+    if resource is not None:
+        # kilobytes on Linux
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    tracemalloc.start()
+    try:
+        run()
+        _, alloc_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_min": min(times),
+        "wall_median": float(np.median(times)),
+        "repeats": repeats,
+        "peak_rss_mb": peak_rss,
+        "alloc_peak_mb": alloc_peak / 2**20,
+    }
+
+
+def run_benchmarks(
+    stages: list[str] | None = None,
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    repeats: int = 3,
+    progress: Callable[[str, dict], None] | None = None,
+) -> dict:
+    """
+    Run the benchmark grid, every case in a fresh process so peak RSS is per case.
+
+    Args:
+        stages (list[str], optional): Stages to run. Defaults to None (all).
+        sizes (tuple[int, ...], optional): Square map sizes. Defaults to DEFAULT_SIZES.
+        repeats (int, optional): Timed runs per case. Defaults to 3.
+        progress (Callable[[str, dict], None], optional): Called with the name and result
+            of every finished case. Defaults to None.
+
+    Returns:
+        dict: `meta` (environment) and `results` (case name -> measurements).
+    """
+
+    results = {}
+    for stage, size, params in iter_cases(stages, sizes):
+        with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as pool:
+            result = pool.submit(measure, stage, size, params, repeats).result()
+
+        name = case_name(stage, size, params)
+        results[name] = result
+        if progress is not None:
+            progress(name, result)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: dict,
+    baseline: dict,
+    threshold: float = 0.1,
+    metrics: tuple[str, ...] = ("wall_min", "alloc_peak_mb"),
+) -> list[dict]:
+    """
+    Compare results against a baseline run.
+
+    Args:
+        results (dict): Output of `run_benchmarks`.
+        baseline (dict): Earlier output of `run_benchmarks`.
+        threshold (float, optional): Allowed relative increase of a metric, e.g. 0.1
+            for 10 %. Defaults to 0.1.
+        metrics (tuple[str, ...], optional): Metrics compared. Defaults to wall time
+            and peak allocations.
+
+    Returns:
+        list[dict]: One entry per case and metric present in both runs, with the
+            baseline and current values, their ratio and a `regression` flag.
+    """
+
+    comparison = []
+    for name, result in results["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+
+        for metric in metrics:
+            old, new = reference.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            ratio = new / old
+            comparison.append(
+                {
+                    "case": name,
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "ratio": ratio,
+                    "regression": ratio > 1 + threshold,
+                }
+            )
+
+    return comparison
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the terrain and forest pipeline.")
+    parser.add_argument("--stages", nargs="+", choices=list(BENCHMARKS), help="stages to run (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES), help="square map sizes")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per case")
+    parser.add_argument("-o", "--output", type=Path, default=Path("benchmark_results.json"), help="results file")
+    parser.add_argument("--baseline", type=Path, help="baseline results to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="allowed relative slowdown before a regression (default: 0.1)"
+    )
+    parser.add_argument("--save-baseline", type=Path, help="also write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    def report(name: str, result: dict) -> None:
+        rss = f"{result['peak_rss_mb']:8.1f}" if result["peak_rss_mb"] is not None else "       -"
+        print(
+            f"{name:<45} {result['wall_min'] * 1e3:10.2f} ms"
+            f"  rss {rss} MiB  alloc {result['alloc_peak_mb']:8.1f} MiB",
+            flush=True,
+        )
+
+    results = run_benchmarks(args.stages, tuple(args.sizes), args.repeats, progress=report)
+    args.output.write_text(json.dumps(results, indent=2))
+    if args.save_baseline is not None:
+        args.save_baseline.write_text(json.dumps(results, indent=2))
+
+    if args.baseline is None:
+        return 0
+
+    comparison = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+    regressions = [entry for entry in comparison if entry["regression"]]
+    for entry in regressions:
+        print(
+            f"REGRESSION {entry['case']} {entry['metric']}: "
+            f"{entry['baseline']:.4g} -> {entry['current']:.4g} ({entry['ratio']:.2f}x)"
+        )
+    print(f"{len(comparison)} comparisons, {len(regressions)} regressions (threshold {args.threshold:.0%})")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
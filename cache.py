@@ -0,0 +1,305 @@
+import os
+import json
+import uuid
+import hashlib
+import threading
+import numpy as np
+from pathlib import Path
+from collections import OrderedDict
+from numpy.typing import NDArray
+from dataclasses import dataclass, asdict, is_dataclass, replace
+from utils import (
+    PyForestConfig,
+    generate_forest_resumable,
+    generate_forest_adapted_to_terrain,
+)
+
+
+def _json_default(obj: object) -> object:
+    """Serialise NumPy scalars (e.g. coming from widgets) like their Python counterparts."""
+
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not hashable into a cache key")
+
+
+def stable_hash(*parts: object) -> str:
+    """
+    Computes a stable, content-addressed hash of dataclasses, lists and plain values.
+
+    Unlike `hash()`, the result does not depend on the interpreter session, so it can
+    be used as a file name for the on-disk cache.
+
+    Args:
+        *parts (object): Dataclass instances, lists of dataclasses or JSON-serialisable values.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+
+    def normalise(part: object) -> object:
+        if is_dataclass(part) and not isinstance(part, type):
+            return {"__type__": type(part).__name__, **asdict(part)}
+        if isinstance(part, (list, tuple)):
+            return [normalise(p) for p in part]
+        return part
+
+    payload = json.dumps(
+        [normalise(part) for part in parts],
+        sort_keys=True,
+        default=_json_default,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def array_digest(array: NDArray) -> str:
+    """
+    Hashes the contents, shape and dtype of an array.
+
+    Args:
+        array (NDArray): Array to hash.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+
+    digest = hashlib.sha256(f"{array.dtype.str}{array.shape}".encode())
+    digest.update(np.ascontiguousarray(array).data)
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+
+class ArrayCache:
+    """
+    Two-tier cache of NumPy arrays addressed by content hash.
+
+    The memory tier is an LRU bounded by a byte budget. The optional disk tier stores
+    compressed `.npz` files in a directory and evicts the least recently used files
+    once their total size exceeds the disk budget. Disk hits are promoted back into
+    memory. Returned arrays are read-only, since they are shared between callers, and
+    all operations are guarded by a lock so one cache can serve several sessions.
+
+    Attributes:
+        memory_budget (int): Maximum total bytes of arrays kept in memory.
+        disk_dir (Path | None): Directory of the disk tier, or None to disable it.
+        disk_budget (int): Maximum total bytes of `.npz` files kept on disk.
+        stats (CacheStats): Hit and miss counters.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int = 512 * 2**20,
+        disk_dir: str | Path | None = None,
+        disk_budget: int = 4 * 2**30,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        Args:
+            memory_budget (int, optional): Byte budget of the memory tier. Defaults to 512 MiB.
+            disk_dir (str | Path, optional): Directory of the disk tier. Defaults to None (disabled).
+            disk_budget (int, optional): Byte budget of the disk tier. Defaults to 4 GiB.
+        """
+
+        self.memory_budget = memory_budget
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        self.disk_budget = disk_budget
+        self.stats = CacheStats()
+
+        self._memory: OrderedDict[str, NDArray] = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    def __contains__(self, key: str) -> bool:
+        """Whether an array is cached, without loading it or counting a hit."""
+
+        with self._lock:
+            if key in self._memory:
+                return True
+            return self.disk_dir is not None and self._disk_path(key).exists()
+
+    def get(self, key: str) -> NDArray | None:
+        """
+        Look up an array, checking memory first and then disk.
+
+        Args:
+            key (str): Content hash of the array.
+
+        Returns:
+            NDArray | None: The cached (read-only) array, or None on a miss.
+        """
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats.memory_hits += 1
+                return self._memory[key]
+
+            array = self._load_from_disk(key)
+            if array is not None:
+                self.stats.disk_hits += 1
+                self._store_in_memory(key, array)
+                return array
+
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: str, array: NDArray) -> NDArray:
+        """
+        Store an array in both tiers.
+
+        Args:
+            key (str): Content hash of the array.
+            array (NDArray): Array to store. It is marked read-only.
+
+        Returns:
+            NDArray: The stored array.
+        """
+
+        array.flags.writeable = False
+        with self._lock:
+            self._store_in_memory(key, array)
+            self._store_on_disk(key, array)
+        return array
+
+    def clear(self) -> None:
+        """Drop the memory tier and delete all files of the disk tier."""
+
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+
+            if self.disk_dir is not None:
+                for path in self.disk_dir.glob("*.npz"):
+                    path.unlink(missing_ok=True)
+
+    def _store_in_memory(self, key: str, array: NDArray) -> None:
+        if array.nbytes > self.memory_budget:
+            return
+
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key).nbytes
+
+        self._memory[key] = array
+        self._memory_bytes += array.nbytes
+
+        while self._memory_bytes > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def _disk_path(self, key: str) -> Path:
+        assert self.disk_dir is not None
+        return self.disk_dir / f"{key}.npz"
+
+    def _load_from_disk(self, key: str) -> NDArray | None:
+        if self.disk_dir is None:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            with np.load(path) as data:
+                array = data["array"]
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return None
+
+        # refresh the access time used for LRU eviction
+        os.utime(path)
+        array.flags.writeable = False
+        return array
+
+    def _store_on_disk(self, key: str, array: NDArray) -> None:
+        if self.disk_dir is None:
+            return
+
+        path = self._disk_path(key)
+        # unique per writer, so processes sharing the directory never write the same file
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with open(tmp_path, "wb") as file:
+                np.savez_compressed(file, array=array)
+            os.replace(tmp_path, path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        assert self.disk_dir is not None
+
+        files = []
+        for path in self.disk_dir.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_budget:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def cached_generate_forest(
+    cache: ArrayCache,
+    config: PyForestConfig,
+    heightmap: NDArray,
+) -> NDArray:
+    """
+    `generate_forest_adapted_to_terrain` backed by an ArrayCache.
+
+    Only seeded configurations are cached; with `config.seed` set to None every call
+    simulates a new random forest, as before.
+
+    Next to the maps, the cache keeps the simulation state of the latest run of every
+    configuration, keyed without `n_iterations`. Raising the iteration count then
+    continues that simulation and only runs the extra iterations (see
+    `generate_forest_resumable`).
+
+    Args:
+        cache (ArrayCache): Cache to read from and populate.
+        config (PyForestConfig): Configuration object for the PyForest generator.
+        heightmap (NDArray): 2D array representing the terrain height values.
+
+    Returns:
+        NDArray: The forest map (read-only when seeded).
+    """
+
+    if config.seed is None:
+        return generate_forest_adapted_to_terrain(config=config, heightmap=heightmap)
+
+    digest = array_digest(heightmap)
+    key = stable_hash("forest", config, digest)
+
+    forest_map = cache.get(key)
+    if forest_map is None:
+        state_key = stable_hash("forest-state", replace(config, n_iterations=0), digest)
+        forest_map, state = generate_forest_resumable(
+            config=config,
+            heightmap=heightmap,
+            state=cache.get(state_key),
+        )
+        cache.put(state_key, state)
+        forest_map = cache.put(key, forest_map)
+
+    return forest_map
@@ -0,0 +1,341 @@
+import os
+import json
+import time
+import logging
+import threading
+import functools
+import tracemalloc
+import numpy as np
+from pathlib import Path
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class Span:
+    """
+    A finished, timed section of work.
+
+    Attributes:
+        name (str): Span name, e.g. the qualified name of a traced function.
+        start (float): Start time in seconds since the trace was created.
+        duration (float): Wall time in seconds.
+        depth (int): Nesting depth, 0 for top-level spans.
+        thread (int): Identifier of the thread the span ran on.
+        attrs (dict): Annotations such as array shapes and sizes.
+        peak_bytes (int | None): Peak of memory allocated during the span above its
+            start level, or None when memory was not traced.
+    """
+
+    name: str
+    start: float
+    duration: float
+    depth: int
+    thread: int
+    attrs: dict = field(default_factory=dict)
+    peak_bytes: int | None = None
+
+
+class Trace:
+    """
+    Collects the spans of one run (e.g. one Streamlit rerun or one export).
+
+    Spans can be appended from several threads. With `memory` enabled, every span also
+    records its allocation peak through `tracemalloc` (Python and NumPy allocations
+    only, not the pyforest C++ side); since tracemalloc is process-wide, peaks are only
+    exact while a single thread is traced.
+
+    Attributes:
+        memory (bool): Whether spans record their memory peak.
+        spans (list[Span]): Finished spans, in order of completion.
+    """
+
+    def __init__(self, memory: bool = False) -> None:
+        self.memory = memory
+        self.spans: list[Span] = []
+
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> list[dict]:
+        """
+        Aggregate the spans by name.
+
+        Returns:
+            list[dict]: Per span name, in order of first completion: number of calls,
+                total and maximum duration in ms, largest memory peak in MiB (or None)
+                and largest output size in MiB (or None).
+        """
+
+        rows: dict[str, dict] = {}
+        with self._lock:
+            spans = list(self.spans)
+
+        for span in spans:
+            row = rows.setdefault(
+                span.name,
+                {"name": span.name, "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "peak_mb": None, "output_mb": None},
+            )
+            row["calls"] += 1
+            row["total_ms"] += span.duration * 1e3
+            row["max_ms"] = max(row["max_ms"], span.duration * 1e3)
+            if span.peak_bytes is not None:
+                row["peak_mb"] = max(row["peak_mb"] or 0.0, span.peak_bytes / 2**20)
+            if "nbytes" in span.attrs:
+                row["output_mb"] = max(row["output_mb"] or 0.0, span.attrs["nbytes"] / 2**20)
+
+        return list(rows.values())
+
+    def to_dict(self) -> dict:
+        """Return the spans as JSON-serialisable dictionaries."""
+
+        with self._lock:
+            return {"memory": self.memory, "spans": [asdict(span) for span in self.spans]}
+
+    def to_trace_events(self) -> dict:
+        """
+        Return the spans in the Trace Event Format.
+
+        The result can be opened in `chrome://tracing` or Perfetto.
+
+        Returns:
+            dict: Complete ("X") events with microsecond timestamps.
+        """
+
+        events = []
+        with self._lock:
+            for span in self.spans:
+                args = dict(span.attrs)
+                if span.peak_bytes is not None:
+                    args["peak_bytes"] = span.peak_bytes
+                events.append(
+                    {
+                        "name": span.name,
+                        "ph": "X",
+                        "ts": span.start * 1e6,
+                        "dur": span.duration * 1e6,
+                        "pid": os.getpid(),
+                        "tid": span.thread,
+                        "args": args,
+                    }
+                )
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_json(self, trace_events: bool = False) -> str:
+        """
+        Serialise the trace as JSON.
+
+        Args:
+            trace_events (bool, optional): Use the Trace Event Format instead of the
+                plain span list. Defaults to False.
+
+        Returns:
+            str: The JSON document.
+        """
+
+        data = self.to_trace_events() if trace_events else self.to_dict()
+        return json.dumps(data, default=_json_default)
+
+    def dump(self, path: str | Path, trace_events: bool = False) -> None:
+        """
+        Write the trace as JSON (see `to_json`).
+
+        Args:
+            path (str | Path): Output file.
+            trace_events (bool, optional): Write the Trace Event Format. Defaults to False.
+        """
+
+        Path(path).write_text(self.to_json(trace_events))
+
+
+def _json_default(obj: object) -> object:
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return str(obj)
+
+
+_trace: ContextVar[Trace | None] = ContextVar("diagnostics_trace", default=None)
+_parent: ContextVar["_ActiveSpan | None"] = ContextVar("diagnostics_parent", default=None)
+
+
+class _NoopSpan:
+    """Returned by `span` while nothing is recorded."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+    def annotate(self, **attrs: Any) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _ActiveSpan:
+    __slots__ = ("trace", "name", "attrs", "start", "depth", "base", "carry", "_token")
+
+    def __init__(self, trace: Trace, name: str, attrs: dict) -> None:
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.base = self.carry = 0
+
+    def annotate(self, **attrs: Any) -> None:
+        """Attach annotations (e.g. sizes of the produced arrays) to the span."""
+
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "_ActiveSpan":
+        parent = _parent.get()
+        self.depth = parent.depth + 1 if parent is not None else 0
+
+        if self.trace.memory and tracemalloc.is_tracing():
+            # tracemalloc has a single peak: hand the peak so far to the parent
+            # before resetting it for this span
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent.carry = max(parent.carry, peak)
+            tracemalloc.reset_peak()
+            self.base = self.carry = current
+
+        self._token = _parent.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        end = time.perf_counter()
+        _parent.reset(self._token)
+
+        peak_bytes = None
+        if self.trace.memory and tracemalloc.is_tracing():
+            peak = max(self.carry, tracemalloc.get_traced_memory()[1])
+            peak_bytes = peak - self.base
+            parent = _parent.get()
+            if parent is not None:
+                parent.carry = max(parent.carry, peak)
+
+        span = Span(
+            name=self.name,
+            start=self.start - self.trace._origin,
+            duration=end - self.start,
+            depth=self.depth,
+            thread=threading.get_ident(),
+            attrs=self.attrs,
+            peak_bytes=peak_bytes,
+        )
+        self.trace.add(span)
+        logger.debug("%s%s: %.2f ms", "  " * span.depth, span.name, span.duration * 1e3)
+
+
+def span(name: str, **attrs: Any) -> _ActiveSpan | _NoopSpan:
+    """
+    Time a block of code as a span of the current trace.
+
+    Outside of `recording` this returns a shared no-op context manager, so
+    instrumented code costs one context variable lookup when diagnostics are off.
+
+    Args:
+        name (str): Span name.
+        **attrs: Initial annotations.
+
+    Returns:
+        Context manager yielding an object with an `annotate(**attrs)` method.
+    """
+
+    trace = _trace.get()
+    if trace is None:
+        return _NOOP
+    return _ActiveSpan(trace, name, attrs)
+
+
+def _annotate_result(active: _ActiveSpan, result: object) -> None:
+    arrays = result if isinstance(result, tuple) else (result,)
+    arrays = [array for array in arrays if isinstance(array, np.ndarray)]
+    if arrays:
+        active.annotate(
+            shape=[list(array.shape) for array in arrays] if len(arrays) > 1 else list(arrays[0].shape),
+            nbytes=sum(array.nbytes for array in arrays),
+        )
+
+
+def traced(name: str | None = None) -> Callable[[F], F]:
+    """
+    Decorator recording every call of a function as a span.
+
+    The shapes and total size of NumPy arrays returned by the function (alone or in a
+    tuple) are attached as annotations.
+
+    Args:
+        name (str, optional): Span name. Defaults to the function's qualified name.
+
+    Returns:
+        Callable[[F], F]: The decorator.
+    """
+
+    def decorate(func: F) -> F:
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            trace = _trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+
+            with _ActiveSpan(trace, label, {}) as active:
+                result = func(*args, **kwargs)
+                _annotate_result(active, result)
+                return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+def current_trace() -> Trace | None:
+    """Return the trace spans are currently recorded into, if any."""
+
+    return _trace.get()
+
+
+@contextmanager
+def recording(trace: Trace | None = None, memory: bool = False) -> Iterator[Trace]:
+    """
+    Record the spans of the enclosed code (in the current thread or context).
+
+    Args:
+        trace (Trace, optional): Trace to append to. Defaults to None, creating a new one.
+        memory (bool, optional): Record memory peaks of a newly created trace, starting
+            `tracemalloc` for the duration if needed. Defaults to False.
+
+    Yields:
+        Trace: The trace being recorded.
+    """
+
+    trace = trace if trace is not None else Trace(memory=memory)
+    started = trace.memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+        if started:
+            tracemalloc.stop()
@@ -0,0 +1,179 @@
+import itertools
+import threading
+import subprocess
+from pathlib import Path
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor
+from utils import TerrainConfig
+from diagnostics import Trace, recording
+
+
+class ExportCancelled(Exception):
+    """Raised inside an export job when it is cancelled."""
+
+
+class ExportJob:
+    """
+    A single export to Unreal: writing the config files and launching the game.
+
+    Status goes queued → writing → launched (or done without an executable), or ends in
+    cancelled / failed. All attributes are updated from the worker thread and can be
+    read at any time.
+
+    Attributes:
+        id (int): Sequential job number.
+        config (TerrainConfig): The exported config. Its arrays must not be modified
+            until the job has finished writing.
+        path (Path): Path of the config manifest.
+        exe_path (Path | None): Executable launched after writing, if any.
+        status (str): Current status.
+        progress (float): Completed fraction of the file writing, in [0, 1].
+        error (str | None): Error message of a failed job.
+        process (subprocess.Popen | None): The launched game process.
+        trace (Trace | None): Trace the export's spans are recorded into, if any.
+    """
+
+    def __init__(
+        self,
+        id: int,
+        config: TerrainConfig,
+        path: Path,
+        exe_path: Path | None,
+        trace: Trace | None = None,
+    ) -> None:
+        self.id = id
+        self.config = config
+        self.path = path
+        self.exe_path = exe_path
+        self.trace = trace
+        self.status = "queued"
+        self.progress = 0.0
+        self.error: str | None = None
+        self.process: subprocess.Popen | None = None
+
+        self._cancelled = threading.Event()
+        self._future: Future | None = None
+
+    @property
+    def active(self) -> bool:
+        """Whether the job is still queued or writing."""
+
+        return self.status in ("queued", "writing")
+
+    def cancel(self) -> None:
+        """
+        Cancel the job.
+
+        A queued job never runs, a job that is writing stops after the current file and
+        leaves the previous config in place, and a launched game is terminated. A job
+        whose manifest has already replaced the previous config cannot be undone: it
+        ends as done, without launching the game.
+        """
+
+        self._cancelled.set()
+
+        if self._future is not None and self._future.cancel():
+            self.status = "cancelled"
+        elif self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            self.status = "cancelled"
+
+    def _report(self, fraction: float) -> None:
+        # the final report comes after the new manifest is live, too late to cancel
+        if self._cancelled.is_set() and fraction < 1.0:
+            raise ExportCancelled()
+        self.progress = fraction
+
+    def _run(self) -> None:
+        self.status = "writing"
+        try:
+            with recording(self.trace) if self.trace is not None else nullcontext():
+                self.config.export_binary(self.path, progress=self._report)
+
+            if self._cancelled.is_set():
+                # the config was written all the same, only the launch is skipped
+                self.status = "done"
+            elif self.exe_path is not None:
+                # not waited for: the game runs independently of the queue
+                self.process = subprocess.Popen([str(self.exe_path)])
+                self.status = "launched"
+            else:
+                self.status = "done"
+        except ExportCancelled:
+            self.status = "cancelled"
+        except Exception as error:
+            self.error = str(error)
+            self.status = "failed"
+
+
+class ExportQueue:
+    """
+    Runs exports to Unreal on a background thread, one at a time and in order.
+
+    Submitting returns immediately, so the UI stays responsive while the config is
+    serialised and the game launches. Writing is atomic (see `TerrainConfig.export_binary`),
+    so Unreal never reads a half-written config.
+
+    Attributes:
+        jobs (list[ExportJob]): All submitted jobs, oldest first.
+    """
+
+    def __init__(self) -> None:
+        self.jobs: list[ExportJob] = []
+
+        self._ids = itertools.count(1)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        config: TerrainConfig,
+        path: str | Path,
+        exe_path: str | Path | None = None,
+        trace: Trace | None = None,
+    ) -> ExportJob:
+        """
+        Queue an export.
+
+        Args:
+            config (TerrainConfig): Config to export.
+            path (str | Path): Path of the config manifest.
+            exe_path (str | Path, optional): Executable to launch after writing. Defaults to None.
+            trace (Trace, optional): Trace to record the export's spans into. Defaults to None.
+
+        Returns:
+            ExportJob: The queued job.
+        """
+
+        with self._lock:
+            job = ExportJob(
+                next(self._ids),
+                config,
+                Path(path),
+                Path(exe_path) if exe_path is not None else None,
+                trace,
+            )
+            self.jobs.append(job)
+            job._future = self._executor.submit(job._run)
+
+        return job
+
+    def cancel_all(self) -> None:
+        """Cancel every queued or writing job."""
+
+        for job in list(self.jobs):
+            if job.active:
+                job.cancel()
+
+    def prune(self, keep: int = 10) -> None:
+        """
+        Forget finished jobs, keeping the `keep` most recent ones.
+
+        Args:
+            keep (int, optional): Number of finished jobs to keep. Defaults to 10.
+        """
+
+        with self._lock:
+            finished = [job for job in self.jobs if not job.active]
+            drop = set(map(id, finished[: max(len(finished) - keep, 0)]))
+            self.jobs = [job for job in self.jobs if id(job) not in drop]
@@ -1,11 +1,13 @@
-import subprocess
-import numpy as np
+import random
 from enum import Enum
 import streamlit as st
-import matplotlib.cm as cm
+from contextlib import nullcontext
 from dataclasses import asdict
-from PIL import Image, ImageDraw
-from pyforest import VegetationType
+from cache import ArrayCache, cached_generate_forest
+from pipeline import BackgroundRefiner, Refinement, TerrainPipeline
+from exporter import ExportQueue
+from preview import render_preview
+from diagnostics import Trace, recording
 from utils import (
     Mountain,
     resolve_paths,
@@ -13,11 +15,57 @@ from utils import (
     PyForestConfig,
     PerlinNoiseConfig,
     TerrainTransformConfig,
-    generate_heightmap,
-    generate_forest_adapted_to_terrain,
+    tree_instances,
+    single_species_map,
 )
 
 st.set_page_config(page_title="Auto 3D Terrain Generator", layout="wide")
+
+# strength of the preview hillshade, see render_preview
+PREVIEW_SHADING = 0.5
+
+
+@st.cache_resource
+def get_heightmap_cache() -> ArrayCache:
+    # shared across reruns and sessions, so widgets that do not affect the terrain
+    # (forest, fog, water) no longer trigger noise generation
+    return ArrayCache()
+
+
+@st.cache_resource
+def get_export_queue() -> ExportQueue:
+    # exports run in the background, so editing continues while the game launches
+    return ExportQueue()
+
+
+if "terrain_refiner" not in st.session_state:
+    # per-session layers, so editing a mountain only rebuilds the mask and composite;
+    # the full-resolution map is generated on the refiner's worker thread
+    st.session_state.terrain_refiner = BackgroundRefiner(TerrainPipeline(cache=get_heightmap_cache()))
+
+
+with st.sidebar:
+    diagnostics_on = st.toggle(
+        "Diagnostics",
+        key="diagnostics",
+        help="Record the time, output size and memory of every generation stage.",
+    )
+    st.checkbox(
+        "Trace memory (slower)",
+        key="diagnostics_memory",
+        disabled=not diagnostics_on,
+    )
+
+
+def diagnostics_recording():
+    # one trace per run, shared with the widget callbacks that run before the script
+    if not st.session_state.get("diagnostics"):
+        return nullcontext()
+    if "run_trace" not in st.session_state:
+        st.session_state.run_trace = Trace(memory=st.session_state.get("diagnostics_memory", False))
+    return recording(st.session_state.run_trace)
+
+
 left, right = st.columns([1, 2])
 
 st.markdown(
@@ -75,8 +123,11 @@ with right:
             help=(
                 "Specifies a fixed offset for the noise coordinates. Useful for"
                 + " generating different noise textures with the same repeat interval."
+                + " Bases above 1 give different terrain than the reference pnoise2 backend."
             ),
         )
+        if base > 1:
+            st.caption("Base > 1: terrain differs from the pnoise2 reference (see README).")
 
     config = PerlinNoiseConfig(
         height=height,
@@ -274,6 +325,14 @@ with right:
             height=height,
         )
 
+    def reroll_forest() -> None:
+        # runs before the widgets, so the new seed shows in the seed input
+        if st.session_state.reroll_seed:
+            st.session_state.seed = random.randrange(2**31)
+            update_forest("seed")
+        else:
+            update_forest()
+
     def update_forest(key: str | None = None) -> None:
         forest_config_dict = asdict(st.session_state.forest_config)
 
@@ -282,10 +341,13 @@ with right:
             st.session_state.forest_config = PyForestConfig(**forest_config_dict)
 
         if "heightmap" in st.session_state:
-            st.session_state.forest_map = generate_forest_adapted_to_terrain(
-                config=st.session_state.forest_config,
-                heightmap=st.session_state.heightmap,
-            )
+            # raising only the iteration count continues the cached simulation state
+            with diagnostics_recording():
+                st.session_state.forest_map = cached_generate_forest(
+                    cache=get_heightmap_cache(),
+                    config=st.session_state.forest_config,
+                    heightmap=st.session_state.heightmap,
+                )
 
     with trees_left:
         initial_trees = st.number_input(
@@ -345,6 +407,21 @@ with right:
             on_change=update_forest,
             args=("seed_decay_rate",),
         )
+        forest_seed = st.number_input(
+            "Forest seed:",
+            min_value=0,
+            value=0,
+            key="seed",
+            on_change=update_forest,
+            args=("seed",),
+            help="The same settings and seed always give the same forest.",
+        )
+        st.checkbox(
+            "New seed on update",
+            value=True,
+            key="reroll_seed",
+            help="Draw a new forest seed every time the forest is updated. Untick to keep the seed.",
+        )
         tree_slope_value = st.slider("Tree max slope steepness:", min_value=0.0, max_value=10.0, value=0.7, step=0.1, on_change=update_forest,
                 help=(
                 "Dictates how steep a slope can be for the trees to spawn, lower value means higher steepness"
@@ -362,65 +439,165 @@ with right:
         min_height = max(min_tree_height/100, water_position),
         max_height = max_tree_height/100,
         max_slope = tree_slope_value,
+        seed=forest_seed,
     )
     st.session_state.forest_config = forest_config
 
     final_fog_density = fog_density * 1000 - 1000
 
+    dense_maps = st.checkbox(
+        "Export dense vegetation maps",
+        help=(
+            "Also write the full-size vegetation and species grids next to the tree"
+            + " instances. Unreal rebuilds them from the instances otherwise."
+        ),
+    )
+
+@st.fragment(run_every=0.25)
+def refinement_preview(refinement: Refinement) -> None:
+    # polls the refiner's worker thread; the script itself never waits for it
+    if refinement.done or refinement.error is not None:
+        # rerun the whole script to add the forest and enable the buttons
+        st.rerun()
+
+    step, heightmap = refinement.level
+    st.image(
+        # coarse cells are `step` cells wide, so heights are scaled to match
+        render_preview(heightmap, shading=PREVIEW_SHADING, z_scale=70.0 / step),
+        caption=f"Terrain Preview (refining, 1/{step} resolution)",
+        width="stretch",
+    )
+
+
 with left:
-    with st.spinner("Generating..."):
-        heightmap = generate_heightmap(
-            config=config, mountains=mountains, terrain_amplifier=0.7, transform=transform
+    # only the first level (the cached map, or a coarse one) is computed in this run;
+    # finer levels and the full map follow on a worker thread, so a widget change
+    # reruns the script right away and cancels the outdated refinement
+    with diagnostics_recording():
+        refinement = st.session_state.terrain_refiner.refine(
+            config=config,
+            mountains=mountains,
+            terrain_amplifier=0.7,
+            transform=transform,
+            # the worker records into a trace of its own, shown once it is done
+            trace=Trace(memory=st.session_state.diagnostics_memory) if diagnostics_on else None,
         )
-        st.session_state.heightmap = heightmap
-
-        if "forest_map" not in st.session_state:
-            st.session_state.forest_map = generate_forest_adapted_to_terrain(
-                config=st.session_state.forest_config,
-                heightmap=st.session_state.heightmap,
-            )
-
-    colored_map = cm.terrain(st.session_state.heightmap)  # type: ignore
-    img_array = (colored_map[:, :, :3] * 255).astype("uint8")
-    image = Image.fromarray(img_array)
-    draw = ImageDraw.Draw(image)
-
-    y_trees, x_trees = np.where(st.session_state.forest_map == VegetationType.TREE)
-
-    tree_size = 4
-    for x, y in zip(x_trees, y_trees):
-        coords = [
-            (x, y - tree_size),
-            (x - tree_size, y + tree_size),
-            (x + tree_size, y + tree_size),
-        ]
-        draw.polygon(coords, fill="green", outline="darkgreen")
 
-    st.image(image, caption="Terrain Preview", width="stretch")
+    if refinement.error is not None:
+        st.error(f"Terrain generation failed: {refinement.error}")
+    elif not refinement.done:
+        refinement_preview(refinement)
+    else:
+        st.session_state.heightmap = refinement.heightmap
+
+        with diagnostics_recording():
+            if "forest_map" not in st.session_state:
+                st.session_state.forest_map = cached_generate_forest(
+                    cache=get_heightmap_cache(),
+                    config=st.session_state.forest_config,
+                    heightmap=st.session_state.heightmap,
+                )
+
+            image = render_preview(st.session_state.heightmap, st.session_state.forest_map, shading=PREVIEW_SHADING)
+
+        st.image(image, caption="Terrain Preview", width="stretch")
+
     with st.container(horizontal_alignment="center"):
         col_left, col_right = st.columns(2)
         with col_left:
-            if st.button("Update Forest", width="stretch"):
-                update_forest()
-                st.rerun()
+            # the forest and the export need the full-resolution map
+            st.button("Update Forest", width="stretch", on_click=reroll_forest, disabled=not refinement.done)
 
         with col_right:
-            if st.button("Export to Unreal", width="stretch"):
-                config_path, exe_path = resolve_paths()
-
-                TerrainConfig(
-                    XSize=width,
-                    YSize=height,
-                    Scale=100.0,
-                    ZMultiplier=7000.0,
-                    UVScale=1.0,
-                    Heightmap=st.session_state.heightmap.reshape(-1).tolist(),
-                    VegetationMap=st.session_state.forest_map.reshape(-1).tolist(),
-                    bWaterOn=water_on,
-                    WaterHeight=water_position,
-                    bFogOn=fog_on,
-                    FogDensity=final_fog_density,
-                ).export_to_json(config_path)
-
-                if exe_path:
-                    subprocess.run(exe_path)
+            if st.button("Export to Unreal", width="stretch", disabled=not refinement.done):
+                with diagnostics_recording():
+                    config_path, exe_path = resolve_paths()
+
+                    terrain_config = TerrainConfig(
+                        XSize=width,
+                        YSize=height,
+                        Scale=100.0,
+                        ZMultiplier=7000.0,
+                        UVScale=1.0,
+                        Heightmap=st.session_state.heightmap,
+                        # Unreal rebuilds the dense maps from the instances unless they are
+                        # exported; the UI simulates a single species, so every tree is species 0
+                        VegetationMap=st.session_state.forest_map if dense_maps else [],
+                        SpeciesMap=single_species_map(st.session_state.forest_map) if dense_maps else [],
+                        bWaterOn=water_on,
+                        WaterHeight=water_position,
+                        bFogOn=fog_on,
+                        FogDensity=final_fog_density,
+                        Instances=tree_instances(
+                            st.session_state.forest_map,
+                            st.session_state.heightmap,
+                            seed=st.session_state.forest_config.seed,
+                        ),
+                    )
+                    get_export_queue().submit(
+                        terrain_config,
+                        config_path,
+                        exe_path,
+                        # the files are written on the export thread, into a trace of their own
+                        trace=Trace(memory=st.session_state.diagnostics_memory) if diagnostics_on else None,
+                    )
+
+    @st.fragment(run_every=1.0)
+    def export_status() -> None:
+        queue = get_export_queue()
+        queue.prune()
+
+        for job in reversed(queue.jobs):
+            job_left, job_right = st.columns([4, 1])
+            with job_left:
+                if job.active:
+                    st.progress(job.progress, text=f"Export #{job.id}: {job.status}")
+                elif job.status == "failed":
+                    st.error(f"Export #{job.id} failed: {job.error}")
+                else:
+                    st.caption(f"Export #{job.id}: {job.status}")
+            with job_right:
+                if job.active or job.status == "launched":
+                    st.button("Cancel", key=f"cancel_export_{job.id}", on_click=job.cancel)
+
+    export_status()
+
+    if diagnostics_on:
+        run_trace = st.session_state.pop("run_trace", None)
+        if run_trace is not None:
+            st.session_state.last_trace = run_trace
+
+        with st.expander("Diagnostics", expanded=True):
+            last_trace = st.session_state.get("last_trace")
+            if last_trace is None or not last_trace.spans:
+                st.caption("Nothing was generated in the last run.")
+            else:
+                st.caption("Stages of the last run")
+                st.dataframe(last_trace.summary(), hide_index=True)
+
+                json_col, events_col = st.columns(2)
+                with json_col:
+                    st.download_button(
+                        "Download spans (JSON)",
+                        last_trace.to_json(),
+                        file_name="diagnostics.json",
+                        mime="application/json",
+                    )
+                with events_col:
+                    st.download_button(
+                        "Download trace events",
+                        last_trace.to_json(trace_events=True),
+                        file_name="diagnostics_trace.json",
+                        mime="application/json",
+                        help="Open in chrome://tracing or Perfetto.",
+                    )
+
+            if refinement.trace is not None and refinement.done:
+                st.caption("Background terrain refinement")
+                st.dataframe(refinement.trace.summary(), hide_index=True)
+
+            traced_exports = [job for job in get_export_queue().jobs if job.trace is not None]
+            if traced_exports:
+                job = traced_exports[-1]
+                st.caption(f"Export #{job.id} ({job.status})")
+                st.dataframe(job.trace.summary(), hide_index=True)
@@ -0,0 +1,195 @@
+import numpy as np
+from numpy.typing import NDArray
+
+# Permutation and gradient tables of the `noise` package (Ken Perlin's reference
+# permutation). Kept identical so that grids evaluated here line up with `pnoise2`.
+_PERM = np.array(
+    [
+        151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225,
+        140, 36, 103, 30, 69, 142, 8, 99, 37, 240, 21, 10, 23, 190, 6, 148,
+        247, 120, 234, 75, 0, 26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32,
+        57, 177, 33, 88, 237, 149, 56, 87, 174, 20, 125, 136, 171, 168, 68, 175,
+        74, 165, 71, 134, 139, 48, 27, 166, 77, 146, 158, 231, 83, 111, 229, 122,
+        60, 211, 133, 230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54,
+        65, 25, 63, 161, 1, 216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169,
+        200, 196, 135, 130, 116, 188, 159, 86, 164, 100, 109, 198, 173, 186, 3, 64,
+        52, 217, 226, 250, 124, 123, 5, 202, 38, 147, 118, 126, 255, 82, 85, 212,
+        207, 206, 59, 227, 47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170, 213,
+        119, 248, 152, 2, 44, 154, 163, 70, 221, 153, 101, 155, 167, 43, 172, 9,
+        129, 22, 39, 253, 19, 98, 108, 110, 79, 113, 224, 232, 178, 185, 112, 104,
+        218, 246, 97, 228, 251, 34, 242, 193, 238, 210, 144, 12, 191, 179, 162, 241,
+        81, 51, 145, 235, 249, 14, 239, 107, 49, 192, 214, 31, 181, 199, 106, 157,
+        184, 84, 204, 176, 115, 121, 50, 45, 127, 4, 150, 254, 138, 236, 205, 93,
+        222, 114, 67, 29, 24, 72, 243, 141, 128, 195, 78, 66, 215, 61, 156, 180,
+    ],
+    dtype=np.int64,
+)
+
+_GRAD = np.array(
+    [
+        [1, 1], [-1, 1], [1, -1], [-1, -1],
+        [1, 0], [-1, 0], [1, 0], [-1, 0],
+        [0, 1], [0, -1], [0, 1], [0, -1],
+        [1, 0], [-1, 0], [0, -1], [0, 1],
+    ],
+    dtype=np.float32,
+)
+
+
+def _gradient_tables(base: int) -> tuple[NDArray, NDArray]:
+    """Precompute gradient components for every (PERM[i], j) lattice pair.
+
+    `pnoise2` hashes a corner as PERM[PERM[PERM[i] + j]] & 15. Since PERM[i] is in
+    [0, 255] and j in [base, 255 + base], the whole hash chain collapses into two
+    small 2D tables, so each corner costs one gather per gradient component.
+    Indices past 511, out of bounds in `pnoise2` (see `fractal_noise2`), wrap around.
+
+    Args:
+        base (int): Noise base offset.
+
+    Returns:
+        tuple[NDArray, NDArray]: x and y gradient components indexed by [PERM[i], j].
+    """
+
+    a = np.arange(256)[:, None]
+    j = np.arange(256 + base)[None, :]
+    hashes = _PERM[_PERM[(a + j) & 255]] & 15
+    return _GRAD[hashes, 0], _GRAD[hashes, 1]
+
+
+def _lattice(
+    coords: NDArray, repeat: np.float32, base: int
+) -> tuple[NDArray, NDArray, NDArray, NDArray]:
+    """Split 1D coordinates into lattice indices, fractional parts and fade weights.
+
+    Args:
+        coords (NDArray): float32 coordinates along one axis.
+        repeat (np.float32): Repeat period along this axis for the current octave.
+        base (int): Noise base offset.
+
+    Returns:
+        tuple[NDArray, NDArray, NDArray, NDArray]: Lower and upper lattice indices,
+            fractional offsets and their quintic fade weights.
+    """
+
+    with np.errstate(invalid="ignore"):
+        lower = np.floor(np.fmod(coords, repeat)).astype(np.int64)
+        upper = np.fmod((lower + 1).astype(np.float32), repeat).astype(np.int64)
+
+    frac = coords - np.floor(coords)
+    fade = frac * frac * frac * (frac * (frac * np.float32(6) - np.float32(15)) + np.float32(10))
+    return (lower & 255) + base, (upper & 255) + base, frac, fade
+
+
+def _noise2_grid(
+    xs: NDArray,
+    ys: NDArray,
+    repeatx: np.float32,
+    repeaty: np.float32,
+    base: int,
+    grad_x: NDArray,
+    grad_y: NDArray,
+) -> NDArray:
+    """Evaluate a single Perlin octave on the grid spanned by xs (rows) and ys (columns)."""
+
+    i, ii, x, fx = _lattice(xs, repeatx, base)
+    j, jj, y, fy = _lattice(ys, repeaty, base)
+
+    a = _PERM[i & 255]
+    b = _PERM[ii & 255]
+
+    # Gather the columns once (256 rows), then expand to the grid with cheap row takes
+    gx_j, gy_j = grad_x[:, j], grad_y[:, j]
+    gx_jj, gy_jj = grad_x[:, jj], grad_y[:, jj]
+
+    x0 = x[:, None]
+    x1 = x0 - np.float32(1)
+    y0 = y[None, :]
+    y1 = y0 - np.float32(1)
+    fx = fx[:, None]
+    fy = fy[None, :]
+
+    # lerp(t, a, b) = a + t * (b - a), evaluated in the same order as the C source
+    low = gx_j.take(a, axis=0) * x0 + gy_j.take(a, axis=0) * y0
+    low += fx * (gx_j.take(b, axis=0) * x1 + gy_j.take(b, axis=0) * y0 - low)
+    high = gx_jj.take(a, axis=0) * x0 + gy_jj.take(a, axis=0) * y1
+    high += fx * (gx_jj.take(b, axis=0) * x1 + gy_jj.take(b, axis=0) * y1 - high)
+
+    high -= low
+    high *= fy
+    low += high
+    return low
+
+
+def fractal_noise2(
+    xs: NDArray,
+    ys: NDArray,
+    octaves: int = 1,
+    persistence: float = 0.5,
+    lacunarity: float = 2.0,
+    repeatx: float = 1024.0,
+    repeaty: float = 1024.0,
+    base: int = 0,
+) -> NDArray:
+    """
+    Vectorized equivalent of `noise.pnoise2` evaluated on a coordinate grid.
+
+    Element [r, c] of the result equals `pnoise2(xs[r], ys[c], ...)`. The whole grid
+    is evaluated per octave with NumPy, using float32 arithmetic in the same order
+    as the C implementation, so for `base` 0 and 1 the results are bit-identical to
+    `pnoise2` (pinned to 1e-6 by the tests) for any octaves, lacunarity and repeat.
+
+    For `base` >= 2 they differ: `pnoise2` hashes a corner through PERM[PERM[i] + j]
+    with j up to 255 + base, which reads past the end of its 512-entry permutation
+    table whenever PERM[i] + j > 511. Those reads are undefined behaviour whose values
+    depend on how the `noise` extension was built, so they are not reproduced; the
+    table is wrapped instead. Corners that stay inside the table still match, so the
+    two backends agree on parts of the map and differ elsewhere (by up to ~1).
+
+    Args:
+        xs (NDArray): 1D array of x coordinates, one per output row.
+        ys (NDArray): 1D array of y coordinates, one per output column.
+        octaves (int, optional): Number of noise octaves. Defaults to 1.
+        persistence (float, optional): Amplitude multiplier between octaves. Defaults to 0.5.
+        lacunarity (float, optional): Frequency multiplier between octaves. Defaults to 2.0.
+        repeatx (float, optional): Repeat period along x. Defaults to 1024.0.
+        repeaty (float, optional): Repeat period along y. Defaults to 1024.0.
+        base (int, optional): Offset into the permutation table. Defaults to 0.
+
+    Returns:
+        NDArray: float32 array of shape (len(xs), len(ys)).
+    """
+
+    if octaves < 1:
+        raise ValueError("Expected octaves value > 0")
+
+    xs = np.asarray(xs, dtype=np.float32)
+    ys = np.asarray(ys, dtype=np.float32)
+    grad_x, grad_y = _gradient_tables(base)
+
+    freq = np.float32(1.0)
+    amp = np.float32(1.0)
+    max_amp = np.float32(0.0)
+    total = None
+
+    for _ in range(octaves):
+        octave = _noise2_grid(
+            xs * freq,
+            ys * freq,
+            np.float32(repeatx) * freq,
+            np.float32(repeaty) * freq,
+            base,
+            grad_x,
+            grad_y,
+        )
+        octave *= amp
+        if total is None:
+            total = octave
+        else:
+            total += octave
+        max_amp += amp
+        freq *= np.float32(lacunarity)
+        amp *= np.float32(persistence)
+
+    total /= max_amp
+    return total
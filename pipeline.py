@@ -0,0 +1,452 @@
+import threading
+import numpy as np
+from contextlib import nullcontext
+from typing import Callable, Iterator
+from numpy.typing import DTypeLike, NDArray
+from concurrent.futures import Future, ThreadPoolExecutor
+from cache import ArrayCache, stable_hash
+from diagnostics import Trace, recording, span
+from utils import (
+    HEIGHT_DTYPE,
+    Mountain,
+    PerlinNoiseConfig,
+    TerrainTransformConfig,
+    mountain_mask,
+    normalize_mask,
+    generate_noise,
+    level_steps,
+    normalize_terrain,
+    composite_heightmap,
+    apply_directional_slope,
+    generate_heightmap_level,
+)
+
+
+class TerrainPipeline:
+    """
+    Incremental heightmap generation split into explicit, cached stages.
+
+    Every stage keeps its last output (layer) together with a key hashed from its own
+    parameters and the keys of the stages it depends on. A stage is recomputed only
+    when that key changes, so e.g. editing a mountain rebuilds just the mask and the
+    final composite, while changing the TerrainTransformConfig reuses the raw noise.
+
+    Stages and their dependencies:
+        - noise: PerlinNoiseConfig
+        - terrain: noise, TerrainTransformConfig (slope ramp, normalisation, flatness, clamp)
+        - mask: map size, mountains
+        - heightmap: terrain, mask, flatness, terrain_amplifier
+
+    The output is identical to `generate_heightmap`.
+
+    Attributes:
+        backend (str): Noise backend, one of NOISE_BACKENDS.
+        dtype (np.dtype): dtype of all layers.
+        cache (ArrayCache | None): Optional shared cache also holding the stage layers,
+            so that layers computed by other pipelines (e.g. other sessions) are reused.
+        recomputed (list[str]): Names of the stages recomputed by the last `run` call.
+    """
+
+    STAGES = ("noise", "terrain", "mask", "heightmap")
+
+    def __init__(
+        self,
+        backend: str = "numpy",
+        cache: ArrayCache | None = None,
+        dtype: DTypeLike = HEIGHT_DTYPE,
+    ) -> None:
+        """
+        Initialize the pipeline.
+
+        Args:
+            backend (str, optional): Noise backend, one of NOISE_BACKENDS. Defaults to "numpy".
+            cache (ArrayCache, optional): Shared cache for stage layers. Defaults to None.
+            dtype (DTypeLike, optional): dtype of all layers. Defaults to HEIGHT_DTYPE.
+        """
+
+        self.backend = backend
+        self.dtype = np.dtype(dtype)
+        self.cache = cache
+        self.recomputed: list[str] = []
+
+        self._layers: dict[str, tuple[str, NDArray | None]] = {}
+
+    def run(
+        self,
+        config: PerlinNoiseConfig,
+        transform: TerrainTransformConfig,
+        mountains: list[Mountain] | None = None,
+        terrain_amplifier: float = 0.5,
+    ) -> NDArray:
+        """
+        Generate the heightmap, recomputing only the stages whose inputs changed.
+
+        Stages are resolved from the heightmap backwards: when the heightmap is current
+        or cached, no upstream stage is looked up or computed, and otherwise only the
+        upstream stages whose layers are missing are.
+
+        Args:
+            config (PerlinNoiseConfig): Configuration object containing Perlin noise parameters.
+            transform (TerrainTransformConfig): Terrain transformation parameters.
+            mountains (list[Mountain], optional): List of Mountain objects used to modify the terrain.
+            terrain_amplifier (float, optional): Amplification factor for the terrain. Default is 0.5.
+
+        Returns:
+            NDArray: A 2D array representing the generated heightmap.
+        """
+
+        self.recomputed = []
+        keys = self._keys(config, transform, mountains, terrain_amplifier)
+
+        # upstream stages are only looked up or built when the heightmap itself misses,
+        # so a cached heightmap never pulls in the full-resolution noise
+        def noise() -> NDArray:
+            return self._stage(
+                "noise", keys["noise"], lambda: generate_noise(config, backend=self.backend, dtype=self.dtype)
+            )
+
+        def build_terrain() -> NDArray:
+            terrain = apply_directional_slope(noise().copy(), config, transform)
+            return normalize_terrain(terrain, (terrain.min(), terrain.max()), transform)
+
+        def build_mask() -> NDArray | None:
+            if not mountains:
+                return None
+            mask = mountain_mask(config, mountains, dtype=self.dtype)
+            return normalize_mask(mask, (mask.min(), mask.max()))
+
+        def build_heightmap() -> NDArray:
+            terrain = self._stage("terrain", keys["terrain"], build_terrain)
+            mask = self._stage("mask", keys["mask"], build_mask)
+            return composite_heightmap(terrain, mask, transform, terrain_amplifier)
+
+        return self._stage("heightmap", keys["heightmap"], build_heightmap)
+
+    def run_levels(
+        self,
+        config: PerlinNoiseConfig,
+        transform: TerrainTransformConfig,
+        mountains: list[Mountain] | None = None,
+        terrain_amplifier: float = 0.5,
+        sizes: tuple[int, ...] = (256, 1024),
+    ) -> Iterator[tuple[int, NDArray]]:
+        """
+        Generate the heightmap progressively, yielding coarse previews before the full map.
+
+        Coarse levels sample the map on a strided grid (see `generate_heightmap_level`),
+        so the first one is ready almost immediately even for very large maps. The last
+        level is always the full-resolution `run` output. When the full heightmap is
+        already up to date, the coarse levels are skipped.
+
+        Args:
+            config (PerlinNoiseConfig): Configuration object containing Perlin noise parameters.
+            transform (TerrainTransformConfig): Terrain transformation parameters.
+            mountains (list[Mountain], optional): List of Mountain objects used to modify the terrain.
+            terrain_amplifier (float, optional): Amplification factor for the terrain. Default is 0.5.
+            sizes (tuple[int, ...], optional): Maximum sizes of the coarse levels along
+                either axis (see `level_steps`). Defaults to (256, 1024).
+
+        Yields:
+            tuple[int, NDArray]: Sampling step and heightmap of every level, ending with step 1.
+        """
+
+        if not self._is_current(config, transform, mountains, terrain_amplifier):
+            for step in level_steps((config.height, config.width), sizes)[:-1]:
+                yield step, generate_heightmap_level(
+                    config, transform, mountains, terrain_amplifier, step, self.backend, self.dtype
+                )
+
+        yield 1, self.run(config, transform, mountains, terrain_amplifier)
+
+    def cached(
+        self,
+        config: PerlinNoiseConfig,
+        transform: TerrainTransformConfig,
+        mountains: list[Mountain] | None = None,
+        terrain_amplifier: float = 0.5,
+    ) -> NDArray | None:
+        """
+        Return the heightmap if it is current or cached, without computing anything.
+
+        Unlike `run`, this never updates the layers, so it can be called while another
+        thread runs the pipeline.
+
+        Args:
+            config (PerlinNoiseConfig): Configuration object containing Perlin noise parameters.
+            transform (TerrainTransformConfig): Terrain transformation parameters.
+            mountains (list[Mountain], optional): List of Mountain objects used to modify the terrain.
+            terrain_amplifier (float, optional): Amplification factor for the terrain. Default is 0.5.
+
+        Returns:
+            NDArray | None: The heightmap, or None if it would have to be computed.
+        """
+
+        key = self._keys(config, transform, mountains, terrain_amplifier)["heightmap"]
+        layer_key, value = self._layers.get("heightmap", (None, None))
+        if layer_key == key:
+            return value
+        return self.cache.get(key) if self.cache is not None else None
+
+    def layer(self, name: str) -> NDArray | None:
+        """
+        Return the last output of a stage.
+
+        Upstream layers are only refreshed when the heightmap has to be rebuilt, so
+        after a cached heightmap they may belong to earlier parameters.
+
+        Args:
+            name (str): Stage name, one of STAGES.
+
+        Returns:
+            NDArray | None: The layer, or None if the stage has not run (or has no output).
+        """
+
+        if name not in self.STAGES:
+            raise ValueError(f"Unknown stage {name!r}, expected one of {list(self.STAGES)}")
+
+        _, value = self._layers.get(name, (None, None))
+        return value
+
+    def invalidate(self, name: str | None = None) -> None:
+        """
+        Drop the layer of a stage (or of all stages) so it is recomputed on the next run.
+
+        Args:
+            name (str, optional): Stage name. Defaults to None, invalidating all stages.
+        """
+
+        if name is None:
+            self._layers.clear()
+        else:
+            self._layers.pop(name, None)
+
+    def _keys(
+        self,
+        config: PerlinNoiseConfig,
+        transform: TerrainTransformConfig,
+        mountains: list[Mountain] | None,
+        terrain_amplifier: float,
+    ) -> dict[str, str]:
+        """Hash the parameters of every stage, chained through the keys of its inputs."""
+
+        keys = {"noise": stable_hash("noise", config, self.backend, self.dtype.str)}
+        keys["terrain"] = stable_hash("terrain", keys["noise"], transform)
+        keys["mask"] = stable_hash("mask", config.height, config.width, mountains or [], self.dtype.str)
+        keys["heightmap"] = stable_hash(
+            "heightmap",
+            keys["terrain"],
+            keys["mask"],
+            transform.flatness,
+            float(terrain_amplifier),
+        )
+        return keys
+
+    def _is_current(
+        self,
+        config: PerlinNoiseConfig,
+        transform: TerrainTransformConfig,
+        mountains: list[Mountain] | None,
+        terrain_amplifier: float,
+    ) -> bool:
+        """Whether `run` would return the heightmap without recomputing any stage."""
+
+        key = self._keys(config, transform, mountains, terrain_amplifier)["heightmap"]
+        if self._layers.get("heightmap", (None, None))[0] == key:
+            return True
+        # a stale own layer does not rule out a heightmap cached by another pipeline
+        return self.cache is not None and key in self.cache
+
+    def _stage(
+        self,
+        name: str,
+        key: str,
+        compute: Callable[[], NDArray | None],
+    ) -> NDArray | None:
+        """Return the stage layer, reusing it when its key is unchanged."""
+
+        if name in self._layers and self._layers[name][0] == key:
+            return self._layers[name][1]
+
+        value = self.cache.get(key) if self.cache is not None else None
+        if value is None:
+            with span(f"TerrainPipeline.{name}") as active:
+                value = compute()
+                if value is not None:
+                    active.annotate(shape=list(value.shape), nbytes=value.nbytes)
+            self.recomputed.append(name)
+            if value is not None:
+                value.flags.writeable = False
+                if self.cache is not None:
+                    self.cache.put(key, value)
+
+        self._layers[name] = (key, value)
+        return value
+
+
+class Refinement:
+    """
+    A progressive heightmap generation submitted to a BackgroundRefiner.
+
+    Levels arrive coarsest first and end with the full-resolution heightmap (step 1).
+    All attributes are updated from the worker thread and can be read at any time.
+
+    Attributes:
+        key (str): Heightmap key of the parameters being refined.
+        level (tuple[int, NDArray]): Sampling step and heightmap of the latest level.
+        error (str | None): Error message of a failed refinement.
+        trace (Trace | None): Trace the refinement's spans are recorded into, if any.
+    """
+
+    def __init__(self, key: str, level: tuple[int, NDArray], trace: Trace | None = None) -> None:
+        self.key = key
+        self.level = level
+        self.error: str | None = None
+        self.trace = trace
+
+        self._cancelled = threading.Event()
+        self._future: Future | None = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the full-resolution heightmap is ready."""
+
+        return self.level[0] == 1
+
+    @property
+    def heightmap(self) -> NDArray:
+        """The latest level's heightmap."""
+
+        return self.level[1]
+
+    def cancel(self) -> None:
+        """
+        Cancel the refinement.
+
+        A queued refinement never starts and a running one stops before its next level.
+        A full-resolution run already under way finishes, so its stages still reach the
+        cache.
+        """
+
+        self._cancelled.set()
+        if self._future is not None:
+            self._future.cancel()
+
+
+class BackgroundRefiner:
+    """
+    Progressive heightmap generation off the calling thread.
+
+    `refine` returns as soon as the first level is available: the heightmap itself if
+    it is current or cached, otherwise the coarsest level (see `level_steps`), which is
+    computed in the calling thread. The finer levels and the full-resolution
+    `TerrainPipeline.run` follow on a single worker thread, so the caller (e.g. a
+    Streamlit script) finishes right away and polls the Refinement instead of waiting.
+
+    Refining new parameters cancels the previous refinement. A full-resolution run
+    that is already under way cannot be interrupted; it delays the finer levels of the
+    next refinement, never its first level.
+
+    The pipeline is only run on the worker thread, so it must not be run elsewhere
+    while the refiner is in use.
+
+    Attributes:
+        pipeline (TerrainPipeline): The pipeline computing the full-resolution heightmap.
+        sizes (tuple[int, ...]): Maximum sizes of the coarse levels (see `level_steps`).
+    """
+
+    def __init__(self, pipeline: TerrainPipeline, sizes: tuple[int, ...] = (256, 1024)) -> None:
+        self.pipeline = pipeline
+        self.sizes = sizes
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="refine")
+        self._current: Refinement | None = None
+
+    def refine(
+        self,
+        config: PerlinNoiseConfig,
+        transform: TerrainTransformConfig,
+        mountains: list[Mountain] | None = None,
+        terrain_amplifier: float = 0.5,
+        trace: Trace | None = None,
+    ) -> Refinement:
+        """
+        Return the refinement of the given parameters, starting it if needed.
+
+        Calling it again with the same parameters returns the running, finished or
+        failed refinement, so it can be called on every UI rerun.
+
+        Args:
+            config (PerlinNoiseConfig): Configuration object containing Perlin noise parameters.
+            transform (TerrainTransformConfig): Terrain transformation parameters.
+            mountains (list[Mountain], optional): List of Mountain objects used to modify the terrain.
+            terrain_amplifier (float, optional): Amplification factor for the terrain. Default is 0.5.
+            trace (Trace, optional): Trace to record a new refinement's spans into. Defaults to None.
+
+        Returns:
+            Refinement: The refinement, with at least its first level.
+        """
+
+        key = self.pipeline._keys(config, transform, mountains, terrain_amplifier)["heightmap"]
+        current = self._current
+        if current is not None and current.key == key:
+            return current
+        if current is not None:
+            current.cancel()
+
+        with recording(trace) if trace is not None else nullcontext():
+            heightmap = self.pipeline.cached(config, transform, mountains, terrain_amplifier)
+            if heightmap is not None:
+                self._current = Refinement(key, (1, heightmap), trace)
+                return self._current
+
+            # computed without the pipeline, which may be busy on the worker thread; for
+            # maps within the smallest level size this is already the full map
+            steps = level_steps((config.height, config.width), self.sizes)
+            first = generate_heightmap_level(
+                config,
+                transform,
+                mountains,
+                terrain_amplifier,
+                steps[0],
+                self.pipeline.backend,
+                self.pipeline.dtype,
+            )
+            refinement = Refinement(key, (steps[0], first), trace)
+
+        if not refinement.done:
+            refinement._future = self._executor.submit(
+                self._run, refinement, steps[1:], config, transform, mountains, terrain_amplifier
+            )
+        self._current = refinement
+        return refinement
+
+    def _run(
+        self,
+        refinement: Refinement,
+        steps: list[int],
+        config: PerlinNoiseConfig,
+        transform: TerrainTransformConfig,
+        mountains: list[Mountain] | None,
+        terrain_amplifier: float,
+    ) -> None:
+        trace = refinement.trace
+        try:
+            with recording(trace) if trace is not None else nullcontext():
+                for step in steps:
+                    if refinement._cancelled.is_set():
+                        return
+                    if step > 1:
+                        heightmap = generate_heightmap_level(
+                            config,
+                            transform,
+                            mountains,
+                            terrain_amplifier,
+                            step,
+                            self.pipeline.backend,
+                            self.pipeline.dtype,
+                        )
+                    else:
+                        heightmap = self.pipeline.run(config, transform, mountains, terrain_amplifier)
+                    refinement.level = (step, heightmap)
+        except Exception as error:
+            refinement.error = str(error)
@@ -0,0 +1,180 @@
+import numpy as np
+import matplotlib.cm as cm
+from functools import lru_cache
+from numpy.typing import NDArray
+from pyforest import VegetationType
+from diagnostics import traced
+from attributes import surface_normals
+
+# Colours of the tree glyph, as in the original PIL preview
+TREE_FILL = (0, 128, 0)  # green
+TREE_OUTLINE = (0, 100, 0)  # darkgreen
+
+# Unit direction towards the light of the hillshade: from the north-west, 45° high
+LIGHT = np.array([-0.5, -0.5, np.sqrt(0.5)], dtype=np.float32)
+
+
+@lru_cache(maxsize=None)
+def terrain_lut() -> NDArray:
+    """
+    Precomputes the `cm.terrain` colour map as a uint8 lookup table.
+
+    The table holds the colour map's own entries, so indexing it with
+    `floor(height * len(lut))` gives the same colours as `cm.terrain(height)`.
+
+    Returns:
+        NDArray: Read-only uint8 array of shape (cm.terrain.N, 3).
+    """
+
+    lut = (cm.terrain(np.arange(cm.terrain.N))[:, :3] * 255).astype(np.uint8)  # type: ignore
+    lut.flags.writeable = False
+    return lut
+
+
+@lru_cache(maxsize=None)
+def tree_sprite(size: int) -> tuple[NDArray, NDArray, NDArray]:
+    """
+    Rasterises the tree glyph: a filled triangle with a one pixel outline.
+
+    The triangle has its apex `size` pixels above the tree and its base `size` pixels
+    below, spanning `size` pixels to either side, like the original polygon preview.
+
+    Args:
+        size (int): Half size of the glyph in pixels.
+
+    Returns:
+        tuple[NDArray, NDArray, NDArray]: Row offsets, column offsets and uint8 RGB
+            colours of the glyph pixels, outline pixels last.
+    """
+
+    dy, dx = np.mgrid[-size : size + 1, -size : size + 1]
+    # the triangle widens by half a pixel per row from the apex down
+    inside = np.abs(dx) * 2 <= dy + size
+
+    padded = np.pad(inside, 1)
+    interior = (
+        inside
+        & padded[:-2, 1:-1]
+        & padded[2:, 1:-1]
+        & padded[1:-1, :-2]
+        & padded[1:-1, 2:]
+    )
+    outline = inside & ~interior
+
+    offsets_y = np.concatenate([dy[interior], dy[outline]])
+    offsets_x = np.concatenate([dx[interior], dx[outline]])
+    colours = np.concatenate(
+        [
+            np.tile(np.array(TREE_FILL, dtype=np.uint8), (int(interior.sum()), 1)),
+            np.tile(np.array(TREE_OUTLINE, dtype=np.uint8), (int(outline.sum()), 1)),
+        ]
+    )
+    return offsets_y, offsets_x, colours
+
+
+def preview_step(shape: tuple[int, int], max_size: int) -> int:
+    """
+    Returns the sampling step that fits a map of the given shape into `max_size` pixels.
+
+    Args:
+        shape (tuple[int, int]): Map shape (height, width).
+        max_size (int): Maximum preview size along either axis.
+
+    Returns:
+        int: Step between sampled cells, at least 1.
+    """
+
+    return max(1, -(-max(shape) // max_size))
+
+
+def stamp_trees(
+    image: NDArray,
+    rows: NDArray,
+    cols: NDArray,
+    tree_size: int = 4,
+) -> NDArray:
+    """
+    Draws a tree glyph at every given pixel with a single vectorized scatter.
+
+    Trees falling on the same pixel are drawn once, so the cost is bounded by the
+    image size rather than by the number of trees.
+
+    Args:
+        image (NDArray): uint8 RGB image of shape (H, W, 3), drawn into in place.
+        rows (NDArray): Pixel rows of the trees.
+        cols (NDArray): Pixel columns of the trees.
+        tree_size (int, optional): Half size of the glyph in pixels. Defaults to 4.
+
+    Returns:
+        NDArray: The image.
+    """
+
+    height, width = image.shape[:2]
+    if len(rows) == 0:
+        return image
+
+    pixels = np.unique(np.asarray(rows, dtype=np.int64) * width + np.asarray(cols, dtype=np.int64))
+    rows, cols = np.divmod(pixels, width)
+
+    offsets_y, offsets_x, colours = tree_sprite(tree_size)
+
+    # (glyph pixel, tree) grids; glyph pixels are ordered so that outlines win
+    ys = offsets_y[:, None] + rows[None, :]
+    xs = offsets_x[:, None] + cols[None, :]
+    visible = (ys >= 0) & (ys < height) & (xs >= 0) & (xs < width)
+
+    glyph_pixel = np.broadcast_to(np.arange(len(offsets_y))[:, None], ys.shape)
+    image[ys[visible], xs[visible]] = colours[glyph_pixel[visible]]
+    return image
+
+
+@traced()
+def render_preview(
+    heightmap: NDArray,
+    forest_map: NDArray | None = None,
+    max_size: int = 1024,
+    tree_size: int = 4,
+    shading: float = 0.0,
+    z_scale: float = 70.0,
+) -> NDArray:
+    """
+    Renders a coloured terrain preview with tree glyphs, at display resolution.
+
+    The heightmap is first sampled down to at most `max_size` pixels per side and then
+    coloured through a uint8 `cm.terrain` lookup table, so no full-resolution float
+    RGBA image is ever allocated. With `shading`, the colours are darkened by a
+    hillshade whose normals are computed from the sampled heightmap too, so its cost
+    is bounded by the preview size as well. Trees are stamped with `stamp_trees`.
+
+    Args:
+        heightmap (NDArray): 2D array of heights in [0, 1].
+        forest_map (NDArray, optional): Forest map with VegetationType values. Defaults to None.
+        max_size (int, optional): Maximum preview size along either axis. Defaults to 1024.
+        tree_size (int, optional): Half size of the tree glyph in preview pixels. Defaults to 4.
+        shading (float, optional): Strength of the hillshade in [0, 1]. Defaults to 0.0 (flat colours).
+        z_scale (float, optional): Height of a unit heightmap step in cell widths for the
+            hillshade. Defaults to 70.0, the ZMultiplier / Scale ratio of the Unreal export.
+
+    Returns:
+        NDArray: uint8 RGB image of shape (ceil(H / step), ceil(W / step), 3).
+    """
+
+    step = preview_step(heightmap.shape, max_size)
+    lut = terrain_lut()
+
+    sampled = heightmap[::step, ::step]
+    levels = np.clip(sampled * len(lut), 0, len(lut) - 1).astype(np.intp)
+    image = lut[levels]
+
+    if shading > 0 and min(sampled.shape) > 1:
+        # sampled cells are `step` cells apart, so the height change per cell shrinks by step
+        gradient = np.stack(np.gradient(sampled.astype(np.float32, copy=False)))
+        normals = surface_normals(gradient, z_scale / step)
+        lambert = np.clip(normals @ LIGHT, 0.0, 1.0)
+        image = (image * (1.0 - shading * (1.0 - lambert))[..., None]).astype(np.uint8)
+
+    if forest_map is not None:
+        ys, xs = np.nonzero(forest_map == VegetationType.TREE)
+        stamp_trees(image, ys // step, xs // step, tree_size)
+
+    return image
@@ -1 +1,10 @@
-from .cpp_module_wrapper import PyForest, VegetationType
+from .cpp_module_wrapper import (
+    Species,
+    PyForest,
+    VegetationType,
+    TREE_DTYPE,
+    SEED_DTYPE,
+    SNAPSHOT_HEADER_DTYPE,
+    snapshot_iterations,
+    simulate_forests,
+)
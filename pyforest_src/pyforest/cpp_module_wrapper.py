@@ -1,8 +1,11 @@
 import numpy as np
 from enum import IntEnum
+from typing import Any
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 from pyforest import pyforest  # type: ignore
 import matplotlib.pyplot as plt
-from numpy.typing import NDArray
+from numpy.typing import DTypeLike, NDArray
 
 
 class VegetationType(IntEnum):
@@ -12,6 +15,68 @@ class VegetationType(IntEnum):
     TREE = 2
 
 
+# Record layouts of the C++ Tree and Seed structs
+TREE_DTYPE = np.dtype([("x", np.intc), ("y", np.intc), ("species", np.intc)])
+SEED_DTYPE = np.dtype(
+    [("x", np.intc), ("y", np.intc), ("species", np.intc), ("strength", np.float64)],
+    align=True,
+)
+
+# Layout of the fixed-size head of a forest snapshot (see PyForest.snapshot)
+SNAPSHOT_HEADER_DTYPE = np.dtype(
+    [
+        ("magic", "S4"),
+        ("version", np.uint32),
+        ("width", np.int32),
+        ("height", np.int32),
+        ("iterations", np.int64),
+        ("n_species", np.int32),
+        ("rng_size", np.uint32),
+        ("n_trees", np.uint64),
+        ("n_seeds", np.uint64),
+    ],
+    align=True,
+)
+
+
+def snapshot_iterations(state: bytes | NDArray) -> int:
+    """
+    Return the number of iterations a forest snapshot was taken after.
+
+    Args:
+        state (bytes | NDArray): Snapshot from `PyForest.snapshot`, as bytes or a uint8 array.
+
+    Returns:
+        int: Completed seed–grow–decay cycles.
+    """
+    header = np.frombuffer(state, dtype=SNAPSHOT_HEADER_DTYPE, count=1)[0]
+    return int(header["iterations"])
+
+
+@dataclass
+class Species:
+    """
+    Simulation rules of one vegetation species.
+
+    Attributes:
+        initial_trees (int): Number of initial trees of this species.
+        seed_radius (int): Maximum distance around a tree where its seeds may spawn.
+        seed_strength (float): Initial probability of a seed growing into a tree.
+        seed_decay_rate (float): Fraction of seed strength lost per iteration.
+        space_between_trees (int): Minimum distance kept free around a tree of this species.
+        preference (NDArray | None): Optional float32 (height, width) weights in [0, 1]
+            scaling the seed strength per cell (e.g. from height and slope preference
+            curves). Cells with weight 0 never receive trees of this species.
+    """
+
+    initial_trees: int = 5
+    seed_radius: int = 15
+    seed_strength: float = 0.05
+    seed_decay_rate: float = 0.2
+    space_between_trees: int = 5
+    preference: NDArray | None = None
+
+
 class PyForest:
     """
     Python wrapper around the C++ pyforest module for forest generation.
@@ -21,10 +86,18 @@ class PyForest:
     repeatedly seeding trees, growing seeds into trees, and decaying seeds,
     over a fixed number of iterations.
 
+    Each instance wraps its own `pyforest.Forest` (map, trees, seeds and RNG), so
+    several forests can exist and be simulated independently at the same time.
+
     Attributes:
+        _forest (pyforest.Forest): The C++ forest simulation.
         _width (int): Width of the forest.
         _height (int): Height of the forest.
         _n_iterations (int): Number of simulation iterations (seed–grow–decay cycles).
+        _cleared (bool): Whether get_map has removed the seeds from the simulation.
+        _mask (NDArray | None): Plantability mask read by the C++ simulation.
+        _species_rules (list[tuple] | None): Species rules (and preference grids) passed to the C++ simulation.
+        _n_species (int): Number of simulated species.
     """
 
     def __init__(
@@ -37,11 +110,15 @@ class PyForest:
         seed_decay_rate: float = 0.2,
         n_iterations: int = 3,
         space_between_trees: int = 5,
+        seed: int | None = None,
+        mask: NDArray | None = None,
+        species: list[Species] | None = None,
+        state: bytes | NDArray | None = None,
     ) -> None:
         """
         Initialize the forest simulation.
 
-        This initializes the C++ pyforest backend with the given parameters
+        This creates a C++ pyforest.Forest with the given parameters
         and executes a fixed number of simulation iterations. Each iteration
         performs: seeding around existing trees, growth of seeds into trees
         based on their strength, and decay of remaining seeds.
@@ -55,9 +132,43 @@ class PyForest:
             seed_decay_rate (float, optional): Fraction of seed strength lost per iteration. Defaults to 0.2.
             n_iterations (int, optional): Number of simulation cycles to run. Defaults to 3.
             space_between_trees (int, optional): Minimum distance between tree centers. Defaults to 5.
+            seed (int, optional): Seed of the random generator. Identical parameters and seed
+                give identical forests. Defaults to None (random seed).
+            mask (NDArray, optional): Boolean (height, width) plantability mask. Initial trees
+                and seeds are only placed on True cells. The C++ side reads the array in place,
+                so it must not be modified while the forest is alive. Defaults to None (all plantable).
+            species (list[Species], optional): Species simulated together on one shared map,
+                so spacing also applies between species. When given, the single-species
+                arguments (initial_trees, seed_radius, seed_strength, seed_decay_rate and
+                space_between_trees) are ignored. Defaults to None (one species).
+            state (bytes | NDArray, optional): Snapshot (see `snapshot`) of a forest with the
+                same parameters, seed, mask and species to continue from, so only the
+                iterations beyond the snapshot's are run. Defaults to None (start from scratch).
+
+        Raises:
+            ValueError: If `state` holds more than n_iterations iterations, or belongs to
+                a forest of another size or number of species.
         """
 
-        pyforest.init_forest(
+        if mask is not None:
+            # no copy for C-contiguous bool arrays
+            mask = np.ascontiguousarray(mask, dtype=np.bool_)
+
+        species_rules = None
+        if species is not None:
+            species_rules = [
+                (
+                    sp.initial_trees,
+                    sp.seed_radius,
+                    sp.seed_strength,
+                    sp.seed_decay_rate,
+                    sp.space_between_trees,
+                    None if sp.preference is None else np.ascontiguousarray(sp.preference, dtype=np.float32),
+                )
+                for sp in species
+            ]
+
+        self._forest = pyforest.Forest(
             width,
             height,
             initial_trees,
@@ -65,11 +176,26 @@ class PyForest:
             seed_strength,
             seed_decay_rate,
             space_between_trees,
+            seed,
+            mask,
+            species_rules,
         )
 
+        # keep the grids read in place by the C++ side alive
+        self._mask = mask
+        self._species_rules = species_rules
+        self._n_species = len(species) if species is not None else 1
         self._width = width
         self._height = height
         self._n_iterations = n_iterations
+        self._cleared = False
+
+        if state is not None:
+            if snapshot_iterations(state) > n_iterations:
+                raise ValueError(
+                    f"The snapshot holds {snapshot_iterations(state)} iterations, more than n_iterations={n_iterations}"
+                )
+            self._forest.restore(state)
 
         self._generate()
 
@@ -82,13 +208,55 @@ class PyForest:
         - Growing seeds into trees with probability proportional to seed strength
         - Decaying remaining seeds
 
-        The simulation stops after the fixed iteration count.
+        The simulation stops after the fixed iteration count; iterations already run
+        (e.g. restored from a snapshot) are not repeated. All iterations run in a single
+        C++ call with the GIL released, so other Python threads (e.g. other forests of a
+        batch) keep running meanwhile.
+        """
+
+        self._forest.run(self._n_iterations - self._forest.iterations)
+
+    @property
+    def n_iterations(self) -> int:
+        """Number of simulation iterations run so far."""
+        return self._forest.iterations
+
+    def step(self, n_iterations: int = 1) -> None:
         """
+        Continue the simulation for more iterations.
+
+        Running n iterations and then stepping k more gives the same forest as running
+        n + k iterations at once. get_map removes the seeds, so it ends the simulation.
 
-        for _ in range(self._n_iterations):
-            pyforest.seed_trees()
-            pyforest.grow_trees()
-            pyforest.decay_seeds()
+        Args:
+            n_iterations (int, optional): Number of additional iterations. Defaults to 1.
+
+        Raises:
+            RuntimeError: If get_map has already removed the seeds.
+        """
+        if self._cleared:
+            raise RuntimeError("Cannot continue after get_map, which removes the seeds")
+        self._forest.run(n_iterations)
+        self._n_iterations += n_iterations
+
+    def snapshot(self) -> bytes:
+        """
+        Serialise the simulation state: map, trees, seeds, random generator and
+        iteration count.
+
+        A new PyForest created with the same parameters and `state=snapshot` continues
+        exactly where this one stopped. The snapshot is a compact native-endian binary
+        blob, meant for caching on the same machine rather than as an exchange format.
+
+        Returns:
+            bytes: The snapshot.
+
+        Raises:
+            RuntimeError: If get_map has already removed the seeds.
+        """
+        if self._cleared:
+            raise RuntimeError("Take the snapshot before get_map, which removes the seeds")
+        return self._forest.snapshot()
 
     def display_forest(self, plot_seeds: bool = False) -> None:
         """
@@ -103,7 +271,7 @@ class PyForest:
         - Coverage fraction in the title
         """
 
-        forest_map: NDArray = np.array(pyforest.get_map())
+        forest_map: NDArray = np.asarray(self._forest.get_map())
 
         trees = forest_map == VegetationType.TREE
         seeds = forest_map == VegetationType.SEED
@@ -112,7 +280,7 @@ class PyForest:
         y_seeds, x_seeds = np.where(seeds)
 
         plt.figure(figsize=(5, 5))
-        plt.suptitle(f"Coverage: {pyforest.get_coverage():.2f}")
+        plt.suptitle(f"Coverage: {self._forest.get_coverage():.2f}")
         if plot_seeds:
             plt.scatter(x_seeds, y_seeds, marker=".", color="brown")
         plt.scatter(x_trees, y_trees, marker="^", color="green")
@@ -122,16 +290,119 @@ class PyForest:
 
         plt.show()
 
-    def get_map(self) -> NDArray:
+    def get_map(self, copy: bool = False) -> NDArray:
         """
         Return the forest map as a NumPy array.
 
         All seeds are removed from the map before returning.
 
+        The C++ map stores one int8 per cell. By default the array is a read-only,
+        zero-copy view of it: the view is live, so it reflects any later change of the
+        simulation's map (e.g. through `pyforest.Forest.run`), and it cannot be written
+        into the simulation's storage. With copy=True, an independent, writable int8
+        copy is returned instead.
+
+        Args:
+            copy (bool, optional): Whether to return a copy. Defaults to False.
+
         Returns:
-            NDArray: 2D NumPy array of integers representing the forest grid.
+            NDArray: 2D int8 NumPy array representing the forest grid.
                      Values correspond to VegetationType Enum:
                      -1 = UNPLANTABLE, 0 = EMPTY, 1 = SEED, 2 = TREE
         """
-        pyforest.clear_map()
-        return np.array(pyforest.get_map())
+        self._forest.clear_map()
+        self._cleared = True
+
+        if copy:
+            return np.frombuffer(self._forest.get_map_compact(), dtype=np.int8).reshape(
+                self._height, self._width
+            ).copy()
+
+        # the buffer itself is read-only, so the array is too
+        return np.asarray(self._forest.get_map())
+
+    def get_species_map(self) -> NDArray:
+        """
+        Return the species of the tree on every cell.
+
+        Returns:
+            NDArray: 2D int8 array with the species index of every tree and -1 elsewhere.
+        """
+        return np.frombuffer(self._forest.get_species_map(), dtype=np.int8).reshape(
+            self._height, self._width
+        )
+
+    def get_instances(self) -> list[NDArray]:
+        """
+        Return the tree positions grouped by species.
+
+        Returns:
+            list[NDArray]: One (N, 2) int32 array of (x, y) positions per species, in species order.
+        """
+        species_map = self.get_species_map()
+        ys, xs = np.nonzero(species_map >= 0)
+        order = np.argsort(species_map[ys, xs], kind="stable")
+        positions = np.stack([xs[order], ys[order]], axis=1).astype(np.int32)
+
+        counts = np.bincount(species_map[ys, xs], minlength=self._n_species)
+        return np.split(positions, np.cumsum(counts)[:-1])
+
+    def get_trees(self) -> NDArray:
+        """
+        Return the tree positions.
+
+        Returns:
+            NDArray: Structured array with TREE_DTYPE fields "x", "y" and "species".
+        """
+        return np.frombuffer(self._forest.get_trees(), dtype=TREE_DTYPE)
+
+    def get_seeds(self) -> NDArray:
+        """
+        Return the live seeds.
+
+        Returns:
+            NDArray: Structured array with SEED_DTYPE fields "x", "y", "species" and "strength".
+        """
+        return np.frombuffer(self._forest.get_seeds(), dtype=SEED_DTYPE)
+
+
+def simulate_forests(
+    params: list[dict[str, Any]],
+    max_workers: int | None = None,
+    dtype: DTypeLike = np.int8,
+) -> NDArray:
+    """
+    Run several independent forest simulations concurrently and stack their maps.
+
+    Every entry of `params` holds the keyword arguments of one PyForest. The simulations
+    run on a thread pool; since the C++ simulation releases the GIL, they execute in
+    parallel on multiple cores without the pickling overhead of a process pool.
+
+    Args:
+        params (list[dict[str, Any]]): PyForest keyword arguments, one dict per forest.
+            All forests must have the same width and height.
+        max_workers (int, optional): Maximum number of threads. Defaults to None (ThreadPoolExecutor default).
+        dtype (DTypeLike, optional): dtype of the stacked maps. Defaults to int8, the
+            simulation's own cell type; wider integer types upcast the maps.
+
+    Returns:
+        NDArray: Array of shape (K, height, width) with the map of every forest, in order.
+    """
+
+    if not params:
+        raise ValueError("Expected at least one forest")
+
+    shapes = {(p["height"], p["width"]) for p in params}
+    if len(shapes) != 1:
+        raise ValueError(f"All forests must have the same size, got {sorted(shapes)}")
+
+    out = np.empty((len(params), *shapes.pop()), dtype=dtype)
+
+    def simulate(index: int) -> None:
+        out[index] = PyForest(**params[index]).get_map()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # list() propagates exceptions raised in the workers
+        list(executor.map(simulate, range(len(params))))
+
+    return out
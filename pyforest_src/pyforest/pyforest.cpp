@@ -2,6 +2,13 @@
 #include <Python.h>
 #include <vector>
 #include <random>
+#include <memory>
+#include <cstdint>
+#include <cstring>
+#include <mutex>
+#include <new>
+#include <string>
+#include <sstream>
 
 enum VegetationType {
     UNPLANTABLE = -1,
@@ -10,86 +17,228 @@ enum VegetationType {
     TREE = 2
 };
 
+// Storage type of a map cell: VegetationType values fit in one byte.
+typedef int8_t Cell;
+
 struct Seed {
-    int x, y;
+    int x, y, species;
     double strength;
 };
 
 struct Tree {
-    int x, y;
+    int x, y, species;
 };
 
-struct Forest {
-    int width = 0;
-    int height = 0;
+// Copies seeds as packed records with zeroed padding, so the bytes only depend on the
+// seed values.
+static void write_seeds(const std::vector<Seed> &seeds, char *out) {
+    memset(out, 0, seeds.size() * sizeof(Seed));
+    for (const Seed &seed : seeds) {
+        Seed *record = (Seed*)out;
+        record->x = seed.x;
+        record->y = seed.y;
+        record->species = seed.species;
+        record->strength = seed.strength;
+        out += sizeof(Seed);
+    }
+}
+
+struct Offset {
+    int dx, dy;
+};
+
+// Offsets (dx, dy) with dx^2 + dy^2 <= radius^2, in x-major order.
+static std::vector<Offset> disk_offsets(int radius, bool include_center) {
+    std::vector<Offset> offsets;
+    for (int dx = -radius; dx <= radius; ++dx) {
+        for (int dy = -radius; dy <= radius; ++dy) {
+            if (dx * dx + dy * dy > radius * radius) continue;
+            if (!include_center && dx == 0 && dy == 0) continue;
+            offsets.push_back(Offset{dx, dy});
+        }
+    }
+    return offsets;
+}
+
+// Simulation rules of one species.
+struct Species {
+    int initial_trees = 5;
     int seed_radius = 15;
     double seed_strength = 0.05;
     double seed_decay_rate = 0.2;
     int space_between_trees = 5;
 
-    std::vector<int> map;
+    // optional width * height weights in [0, 1] scaling the seed strength per cell,
+    // borrowed from the caller's buffer; nullptr means 1 everywhere
+    const float *preference = nullptr;
+
+    // precomputed seeding and tree spacing stencils
+    std::vector<Offset> seed_disk;
+    std::vector<Offset> spacing_disk;
+
+    inline double strength_at(int id) const {return preference ? seed_strength * preference[id] : seed_strength;}
+};
+
+// Maximum number of species, so that species ids fit the int8 species map.
+static const int MAX_SPECIES = 127;
+
+// Fixed-size head of a forest snapshot, followed by the map cells, the trees, the
+// seeds and the textual state of the random generator. Species ids and the seed
+// index are rebuilt on restore, so they are not stored.
+struct SnapshotHeader {
+    char magic[4];
+    uint32_t version;
+    int32_t width;
+    int32_t height;
+    int64_t iterations;
+    int32_t n_species;
+    uint32_t rng_size;
+    uint64_t n_trees;
+    uint64_t n_seeds;
+};
+
+static const char SNAPSHOT_MAGIC[4] = {'P', 'F', 'S', 'T'};
+static const uint32_t SNAPSHOT_VERSION = 1;
+
+struct Forest {
+    int width = 0;
+    int height = 0;
+    std::vector<Species> species;
+
+    // shared so that exported buffers keep the storage alive after a re-init
+    std::shared_ptr<std::vector<Cell>> map_data = std::make_shared<std::vector<Cell>>();
     std::vector<Tree> trees;
     std::vector<Seed> seeds;
 
+    // index into `seeds` of the seed on every cell, -1 if none: one seed per cell
+    std::vector<int> seed_index;
+
+    // species of the last tree placed on every cell
+    std::vector<int8_t> species_ids;
+
+    // optional width * height plantability mask (non-zero = plantable), borrowed from
+    // the caller's buffer; nullptr means every cell is plantable
+    const uint8_t *plantable = nullptr;
+
     std::mt19937_64 rng;
     std::uniform_real_distribution<double> uni01;
 
-    Forest() : rng(std::random_device{}()), uni01(0.0, 1.0) {}
+    // seed-grow-decay cycles completed through run()
+    int64_t iterations = 0;
+
+    // the generator is (re)seeded by init
+    Forest() : uni01(0.0, 1.0) {}
 
     inline int idx(int x, int y) const {return y * width + x;}
+    inline std::vector<Cell>& map() {return *map_data;}
+    inline const std::vector<Cell>& map() const {return *map_data;}
+    inline bool is_plantable(int id) const {return !plantable || plantable[id];}
 
     void init(
         int w,
         int h,
-        int initial_trees,
-        int seed_radius_,
-        double seed_strength_,
-        double seed_decay_rate_,
-        int space_between_trees_
+        std::vector<Species> species_,
+        bool has_seed,
+        unsigned long long seed,
+        const uint8_t *plantable_
     ) {
+        // a fixed seed makes the whole simulation reproducible
+        rng.seed(has_seed ? seed : std::random_device{}());
+        uni01.reset();
+        iterations = 0;
+
         width = w;
         height = h;
-        seed_radius = seed_radius_;
-        seed_strength = seed_strength_;
-        seed_decay_rate = seed_decay_rate_;
-        space_between_trees = space_between_trees_;
+        species = std::move(species_);
+        plantable = plantable_;
 
-        map.assign(width * height, VegetationType::EMPTY);
+        // fresh storage, previously exported maps keep their own
+        map_data = std::make_shared<std::vector<Cell>>(width * height, (Cell)VegetationType::EMPTY);
         trees.clear();
         seeds.clear();
+        seed_index.assign(width * height, -1);
+        species_ids.assign(width * height, -1);
 
+        for (Species &sp : species) {
+            sp.seed_disk = disk_offsets(sp.seed_radius, true);
+            sp.spacing_disk = disk_offsets(sp.space_between_trees, false);
+        }
+
+        for (int s = 0; s < (int)species.size(); ++s) {
+            if (plantable || species[s].preference) {
+                place_initial_trees_masked(s);
+            } else {
+                place_initial_trees(s);
+            }
+        }
+    }
+
+    void place_initial_trees(int s) {
         std::uniform_int_distribution<int> dx(0, width - 1);
         std::uniform_int_distribution<int> dy(0, height - 1);
 
-        for (int i = 0; i < initial_trees; ++i) {
+        for (int i = 0; i < species[s].initial_trees; ++i) {
             int x = dx(rng);
             int y = dy(rng);
-            if (map[idx(x, y)] != VegetationType::TREE) {
-                place_tree(x, y);
+            if (map()[idx(x, y)] != VegetationType::TREE) {
+                place_tree(x, y, s);
             }
         }
     }
 
-    void seed_trees() {
-        for (const Tree &tree : trees) {
-            for (int x = tree.x - seed_radius; x <= tree.x + seed_radius; ++x) {
-                if (x < 0 || x >= width) continue;
+    void place_initial_trees_masked(int s) {
+        // draw from the plantable, preferred cells only, so sparse masks still get their trees
+        const Species &sp = species[s];
+        std::vector<int> candidates;
+        for (int id = 0; id < width * height; ++id) {
+            if (is_plantable(id) && (!sp.preference || sp.preference[id] > 0.0f)) candidates.push_back(id);
+        }
+        if (candidates.empty()) return;
+
+        std::uniform_int_distribution<size_t> pick(0, candidates.size() - 1);
 
-                for (int y = tree.y - seed_radius; y <= tree.y + seed_radius; ++y) {
-                    if (y < 0 || y >= height) continue;
+        for (int i = 0; i < sp.initial_trees; ++i) {
+            int id = candidates[pick(rng)];
+            if (map()[id] != VegetationType::TREE) {
+                place_tree(id % width, id / width, s);
+            }
+        }
+    }
 
-                    int dx = x - tree.x;
-                    int dy = y - tree.y;
-                    int id = idx(x, y);
+    void seed_trees() {
+        // a cell holds at most one seed. Seeding a cell that already has a seed of the
+        // same species combines both as independent chances to grow:
+        // p = 1 - (1 - p_old) * (1 - p_new); a seed of another species replaces it
+        // only if it is stronger.
+        for (const Tree &tree : trees) {
+            const Species &sp = species[tree.species];
 
-                    if (dx * dx + dy * dy > seed_radius * seed_radius) continue;
-                    if (map[id] == VegetationType::TREE) continue;
-                    if (map[id] == VegetationType::UNPLANTABLE) continue;
+            for (const Offset &offset : sp.seed_disk) {
+                int x = tree.x + offset.dx;
+                int y = tree.y + offset.dy;
+                if (x < 0 || x >= width || y < 0 || y >= height) continue;
 
-                    Seed seed{x, y, seed_strength};
-                    seeds.push_back(seed);
-                    map[id] = VegetationType::SEED;
+                int id = idx(x, y);
+                if (map()[id] == VegetationType::TREE) continue;
+                if (map()[id] == VegetationType::UNPLANTABLE) continue;
+                if (!is_plantable(id)) continue;
+
+                double strength = sp.strength_at(id);
+                if (strength <= 0.0) continue;
+
+                if (seed_index[id] >= 0) {
+                    Seed &seed = seeds[seed_index[id]];
+                    if (seed.species == tree.species) {
+                        seed.strength = 1.0 - (1.0 - seed.strength) * (1.0 - strength);
+                    } else if (strength > seed.strength) {
+                        seed.species = tree.species;
+                        seed.strength = strength;
+                    }
+                } else {
+                    seed_index[id] = (int)seeds.size();
+                    seeds.push_back(Seed{x, y, tree.species, strength});
                 }
+                map()[id] = VegetationType::SEED;
             }
         }
     }
@@ -101,114 +250,407 @@ struct Forest {
             double r = uni01(rng);
             if (r < seed.strength) {
                 // becomes tree
-                if (map[idx(seed.x, seed.y)] != VegetationType::TREE) {
-                    place_tree(seed.x, seed.y);
+                if (map()[idx(seed.x, seed.y)] != VegetationType::TREE) {
+                    place_tree(seed.x, seed.y, seed.species);
                 }
 
                 // remove seed by swapping with last and pop_back because it is faster
+                seed_index[idx(seed.x, seed.y)] = -1;
                 seeds[i] = seeds.back();
                 seeds.pop_back();
+                if (i < (int)seeds.size()) seed_index[idx(seeds[i].x, seeds[i].y)] = i;
             }
         }
     }
 
     void decay_seeds() {
-        for (auto &seed : seeds) {
-            seed.strength -= (seed_decay_rate * seed_strength);
-        }
+        // decay and compact in a single pass
+        size_t kept = 0;
+        for (size_t i = 0; i < seeds.size(); ++i) {
+            Seed seed = seeds[i];
+            const Species &sp = species[seed.species];
+            seed.strength -= (sp.seed_decay_rate * sp.seed_strength);
 
-        std::vector<Seed> kept;
-        kept.reserve(seeds.size());
-        for (const auto &seed : seeds) {
+            int id = idx(seed.x, seed.y);
             if (seed.strength > 0.0) {
-                kept.push_back(seed);
+                seed_index[id] = (int)kept;
+                seeds[kept++] = seed;
             } else {
-                int id = idx(seed.x, seed.y);
-                if (map[id] == VegetationType::SEED) map[id] = VegetationType::EMPTY;
+                seed_index[id] = -1;
+                if (map()[id] == VegetationType::SEED) map()[id] = VegetationType::EMPTY;
             }
         }
 
-        seeds.swap(kept);
+        seeds.resize(kept);
     }
 
     void clear_map() {
-        for (int x = 0; x < width; ++x) {
-            for (int y = 0; y < height; ++y) {
-                int id = idx(x, y);
-                if (map[id] == VegetationType::SEED || map[id] == VegetationType::UNPLANTABLE) map[id] = VegetationType::EMPTY; 
-            }
+        for (Cell &value : map()) {
+            if (value == VegetationType::SEED || value == VegetationType::UNPLANTABLE) value = VegetationType::EMPTY;
         }
 
+        for (const Seed &seed : seeds) {
+            seed_index[idx(seed.x, seed.y)] = -1;
+        }
         seeds.clear();
     }
 
-    void place_tree(int pos_x, int pos_y) {
-        for (int x = pos_x - space_between_trees; x <= pos_x + space_between_trees; ++x) {
-            if (x < 0 || x >= width) continue;
+    void run(int n_iterations) {
+        for (int i = 0; i < n_iterations; ++i) {
+            seed_trees();
+            grow_trees();
+            decay_seeds();
+            ++iterations;
+        }
+    }
 
-            for (int y = pos_y - space_between_trees; y <= pos_y + space_between_trees; ++y) {
-                if (y < 0 || y >= height || (x == pos_x && y == pos_y)) continue;
+    PyObject* snapshot_py() const {
+        std::ostringstream rng_state;
+        rng_state << rng;
+        const std::string rng_text = rng_state.str();
+
+        SnapshotHeader header;
+        memset(&header, 0, sizeof(header));
+        memcpy(header.magic, SNAPSHOT_MAGIC, sizeof(header.magic));
+        header.version = SNAPSHOT_VERSION;
+        header.width = width;
+        header.height = height;
+        header.iterations = iterations;
+        header.n_species = (int32_t)species.size();
+        header.rng_size = (uint32_t)rng_text.size();
+        header.n_trees = trees.size();
+        header.n_seeds = seeds.size();
+
+        const size_t map_size = map().size() * sizeof(Cell);
+        const size_t trees_size = trees.size() * sizeof(Tree);
+        const size_t seeds_size = seeds.size() * sizeof(Seed);
+        const size_t total = sizeof(header) + map_size + trees_size + seeds_size + rng_text.size();
+
+        PyObject *buffer = PyBytes_FromStringAndSize(NULL, (Py_ssize_t)total);
+        if (!buffer) return NULL;
+
+        char *out = PyBytes_AS_STRING(buffer);
+        memcpy(out, &header, sizeof(header));
+        out += sizeof(header);
+        if (map_size) memcpy(out, map().data(), map_size);
+        out += map_size;
+        if (trees_size) memcpy(out, trees.data(), trees_size);
+        out += trees_size;
+        // the seeds' padding is zeroed, so equal states give equal snapshots
+        write_seeds(seeds, out);
+        out += seeds_size;
+        if (!rng_text.empty()) memcpy(out, rng_text.data(), rng_text.size());
+
+        return buffer;
+    }
 
-                int dx = x - pos_x;
-                int dy = y - pos_y;
-                if (dx * dx + dy * dy > space_between_trees * space_between_trees) continue;
+    // Replaces the map, trees, seeds, generator and iteration count by those of a
+    // snapshot of a forest of the same size and species. Returns an error message,
+    // or nullptr on success; the forest is left untouched on error.
+    const char* restore(const char *data, size_t size) {
+        SnapshotHeader header;
+        if (size < sizeof(header)) return "snapshot is truncated";
+        memcpy(&header, data, sizeof(header));
+
+        if (memcmp(header.magic, SNAPSHOT_MAGIC, sizeof(header.magic)) != 0) return "not a forest snapshot";
+        if (header.version != SNAPSHOT_VERSION) return "unsupported snapshot version";
+        if (header.width != width || header.height != height) return "snapshot has a different forest size";
+        if (header.n_species != (int32_t)species.size()) return "snapshot has a different number of species";
+
+        const size_t cells = (size_t)width * height;
+        if (header.n_trees > cells || header.n_seeds > cells) return "snapshot is corrupt";
+        const size_t expected = sizeof(header) + cells * sizeof(Cell) + header.n_trees * sizeof(Tree)
+            + header.n_seeds * sizeof(Seed) + header.rng_size;
+        if (size != expected) return "snapshot is truncated";
+
+        const char *in = data + sizeof(header);
+        auto new_map = std::make_shared<std::vector<Cell>>(cells);
+        memcpy(new_map->data(), in, cells * sizeof(Cell));
+        in += cells * sizeof(Cell);
+
+        std::vector<Tree> new_trees(header.n_trees);
+        if (header.n_trees) memcpy(new_trees.data(), in, header.n_trees * sizeof(Tree));
+        in += header.n_trees * sizeof(Tree);
+
+        std::vector<Seed> new_seeds(header.n_seeds);
+        if (header.n_seeds) memcpy(new_seeds.data(), in, header.n_seeds * sizeof(Seed));
+        in += header.n_seeds * sizeof(Seed);
+
+        std::mt19937_64 new_rng;
+        std::istringstream rng_state(std::string(in, header.rng_size));
+        rng_state >> new_rng;
+        if (rng_state.fail()) return "snapshot is corrupt";
+
+        // rebuild the per-cell indexes, checking every record on the way
+        std::vector<int8_t> new_species_ids(cells, -1);
+        for (const Tree &tree : new_trees) {
+            if (tree.x < 0 || tree.x >= width || tree.y < 0 || tree.y >= height) return "snapshot is corrupt";
+            if (tree.species < 0 || tree.species >= header.n_species) return "snapshot is corrupt";
+            new_species_ids[idx(tree.x, tree.y)] = (int8_t)tree.species;
+        }
 
-                int id = idx(x, y);
-                map[id] = VegetationType::UNPLANTABLE;
-            }
+        std::vector<int> new_seed_index(cells, -1);
+        for (size_t i = 0; i < new_seeds.size(); ++i) {
+            const Seed &seed = new_seeds[i];
+            if (seed.x < 0 || seed.x >= width || seed.y < 0 || seed.y >= height) return "snapshot is corrupt";
+            if (seed.species < 0 || seed.species >= header.n_species) return "snapshot is corrupt";
+            if (new_seed_index[idx(seed.x, seed.y)] >= 0) return "snapshot is corrupt";
+            new_seed_index[idx(seed.x, seed.y)] = (int)i;
         }
 
-        map[idx(pos_x, pos_y)] = VegetationType::TREE;
-        trees.push_back(Tree{pos_x, pos_y});
+        // fresh storage, previously exported maps keep their own
+        map_data = std::move(new_map);
+        trees.swap(new_trees);
+        seeds.swap(new_seeds);
+        species_ids.swap(new_species_ids);
+        seed_index.swap(new_seed_index);
+        rng = new_rng;
+        uni01.reset();
+        iterations = header.iterations;
+        return nullptr;
     }
 
-    PyObject* get_trees_py() const {
-        PyObject* list = PyList_New((Py_ssize_t)trees.size());
-        for (size_t i = 0; i < trees.size(); ++i) {
-            PyObject *tuple = Py_BuildValue("(ii)", trees[i].x, trees[i].y);
-            PyList_SetItem(list, (Py_ssize_t)i, tuple);
+    void place_tree(int pos_x, int pos_y, int s) {
+        for (const Offset &offset : species[s].spacing_disk) {
+            int x = pos_x + offset.dx;
+            int y = pos_y + offset.dy;
+            if (x < 0 || x >= width || y < 0 || y >= height) continue;
+
+            map()[idx(x, y)] = VegetationType::UNPLANTABLE;
         }
 
-        return list;
+        int id = idx(pos_x, pos_y);
+        map()[id] = VegetationType::TREE;
+        species_ids[id] = (int8_t)s;
+        trees.push_back(Tree{pos_x, pos_y, s});
     }
 
-    PyObject* get_seeds_py() const {
-        PyObject* list = PyList_New((Py_ssize_t)seeds.size());
-        for (size_t i = 0; i < seeds.size(); ++i) {
-            PyObject *tuple = Py_BuildValue("(iid)", seeds[i].x, seeds[i].y, seeds[i].strength);
-            PyList_SetItem(list, (Py_ssize_t)i, tuple);
+    double get_coverage() const {
+        // fraction of the map cells holding a tree
+        if (map().empty()) return 0.0;
+
+        size_t covered = 0;
+        for (Cell value : map()) {
+            if (value == VegetationType::TREE) ++covered;
         }
 
-        return list;
+        return (double)covered / (double)map().size();
     }
 
-    PyObject* get_map_py() const {
-        PyObject *rows = PyList_New((Py_ssize_t)height);
-        for (int y = 0; y < height; ++y) {
-            PyObject *row = PyList_New((Py_ssize_t)width);
-            for (int x = 0; x < width; ++x) {
-                int value = map[idx(x, y)];
-                PyObject *v = PyLong_FromLong((long)value);
-                PyList_SetItem(row, (Py_ssize_t)x, v);
-            }
-            PyList_SetItem(rows, (Py_ssize_t)y, row);
+    PyObject* get_trees_py() const {
+        // packed (x, y, species) int32 records, viewed as a structured array on the Python side
+        return PyByteArray_FromStringAndSize((const char*)trees.data(), (Py_ssize_t)(trees.size() * sizeof(Tree)));
+    }
+
+    PyObject* get_seeds_py() const {
+        // packed (x, y, species, strength) records, viewed as a structured array on the Python side
+        PyObject *buffer = PyByteArray_FromStringAndSize(NULL, (Py_ssize_t)(seeds.size() * sizeof(Seed)));
+        if (!buffer) return NULL;
+
+        write_seeds(seeds, PyByteArray_AS_STRING(buffer));
+        return buffer;
+    }
+
+    PyObject* get_map_compact_py() const {
+        PyObject *buffer = PyByteArray_FromStringAndSize(NULL, (Py_ssize_t)map().size());
+        if (!buffer) return NULL;
+
+        memcpy(PyByteArray_AS_STRING(buffer), map().data(), map().size() * sizeof(Cell));
+
+        return buffer;
+    }
+
+    PyObject* get_species_map_py() const {
+        // int8 species id of the tree on every cell, -1 where there is no tree
+        PyObject *buffer = PyByteArray_FromStringAndSize(NULL, (Py_ssize_t)map().size());
+        if (!buffer) return NULL;
+
+        int8_t *out = (int8_t*)PyByteArray_AS_STRING(buffer);
+        for (size_t i = 0; i < map().size(); ++i) {
+            out[i] = map()[i] == VegetationType::TREE ? species_ids[i] : -1;
         }
 
-        return rows;
+        return buffer;
+    }
+};
+
+// --- Zero-copy map export ---
+
+// Exposes the forest map through the buffer protocol as a read-only 2D int8 array,
+// so np.asarray() views the C++ storage directly instead of copying it. Writable
+// requests are refused: the map is only changed by the simulation, under its mutex.
+struct MapBufferObject {
+    PyObject_HEAD
+    std::shared_ptr<std::vector<Cell>> data;
+    Py_ssize_t shape[2];
+    Py_ssize_t strides[2];
+};
+
+static void MapBuffer_dealloc(MapBufferObject *self) {
+    self->data.~shared_ptr();
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+static int MapBuffer_getbuffer(MapBufferObject *self, Py_buffer *view, int flags) {
+    if (flags & PyBUF_WRITABLE) {
+        PyErr_SetString(PyExc_BufferError, "The forest map buffer is read-only");
+        view->obj = NULL;
+        return -1;
     }
+
+    view->obj = (PyObject*)self;
+    Py_INCREF(self);
+    view->buf = self->data->data();
+    view->len = (Py_ssize_t)(self->data->size() * sizeof(Cell));
+    view->readonly = 1;
+    view->itemsize = sizeof(Cell);
+    view->format = (flags & PyBUF_FORMAT) ? (char*)"b" : NULL;
+    view->ndim = 2;
+    view->shape = (flags & PyBUF_ND) ? self->shape : NULL;
+    view->strides = (flags & PyBUF_STRIDES) ? self->strides : NULL;
+    view->suboffsets = NULL;
+    view->internal = NULL;
+    return 0;
+}
+
+static PyBufferProcs MapBuffer_as_buffer = {
+    (getbufferproc)MapBuffer_getbuffer,
+    NULL,
+};
+
+static PyTypeObject MapBufferType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "pyforest.MapBuffer",
 };
 
-static Forest g_forest;
+static PyObject* new_map_buffer(const Forest &forest) {
+    MapBufferObject *self = PyObject_New(MapBufferObject, &MapBufferType);
+    if (!self) return NULL;
+
+    new (&self->data) std::shared_ptr<std::vector<Cell>>(forest.map_data);
+    self->shape[0] = forest.height;
+    self->shape[1] = forest.width;
+    self->strides[0] = (Py_ssize_t)(forest.width * sizeof(Cell));
+    self->strides[1] = sizeof(Cell);
+
+    return (PyObject*)self;
+}
 
 
 // --- Python Wrappers ---
 
-static PyObject* py_init_forest(PyObject*, PyObject* args, PyObject* kwargs) {
-    int w, h, initial_trees = 5;
-    int seed_radius = 15;
-    double seed_strength = 0.05;
-    double seed_decay_rate = 0.2;
-    int space_between_trees = 5;
+// pyforest.Forest: every instance owns its own map, trees, seeds and RNG, so several
+// forests can be simulated independently in one process. Simulation steps run with
+// the GIL released; the per-instance mutex serialises calls on the same forest.
+struct ForestObject {
+    PyObject_HEAD
+    Forest forest;
+    std::mutex mutex;
+    // views of the mask and preference grids passed to init, held so the forest can
+    // read them in place
+    std::vector<Py_buffer> views;
+};
+
+static void release_views(ForestObject *self) {
+    self->forest.plantable = nullptr;
+    for (Species &sp : self->forest.species) sp.preference = nullptr;
+
+    for (Py_buffer &view : self->views) PyBuffer_Release(&view);
+    self->views.clear();
+}
+
+// Gets a contiguous (height, width) view of a per-cell grid with one of the given
+// single-character formats. Sets a ValueError naming the argument on mismatch.
+static bool get_grid_view(PyObject *obj, int w, int h, const char *formats, Py_ssize_t itemsize, const char *error, Py_buffer *view) {
+    if (PyObject_GetBuffer(obj, view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0) return false;
+
+    const char *format = view->format ? view->format : "B";
+    bool format_matches = view->itemsize == itemsize && strchr(formats, format[0]) && format[1] == '\0';
+    bool shape_matches = view->len == (Py_ssize_t)w * h * itemsize
+        && (view->ndim != 2 || (view->shape[0] == h && view->shape[1] == w));
+
+    if (!format_matches || !shape_matches) {
+        PyBuffer_Release(view);
+        PyErr_SetString(PyExc_ValueError, error);
+        return false;
+    }
+    return true;
+}
+
+// Parses the `species` argument: a sequence of (initial_trees, seed_radius, seed_strength,
+// seed_decay_rate, space_between_trees, preference) tuples. Preference grids are
+// appended to `views`, which the caller releases on failure.
+static bool parse_species(PyObject *obj, int w, int h, std::vector<Species> &species, std::vector<Py_buffer> &views) {
+    PyObject *items = PySequence_Fast(obj, "species must be a sequence of tuples");
+    if (!items) return false;
+
+    Py_ssize_t n = PySequence_Fast_GET_SIZE(items);
+    if (n < 1 || n > MAX_SPECIES) {
+        Py_DECREF(items);
+        PyErr_Format(PyExc_ValueError, "expected between 1 and %d species", MAX_SPECIES);
+        return false;
+    }
+
+    for (Py_ssize_t i = 0; i < n; ++i) {
+        Species sp;
+        PyObject *preference_obj = Py_None;
+
+        if (!PyArg_ParseTuple(PySequence_Fast_GET_ITEM(items, i), "iiddiO;species entries must be (initial_trees, seed_radius, seed_strength, seed_decay_rate, space_between_trees, preference)",
+                              &sp.initial_trees, &sp.seed_radius, &sp.seed_strength, &sp.seed_decay_rate, &sp.space_between_trees, &preference_obj)) {
+            Py_DECREF(items);
+            return false;
+        }
+
+        if (preference_obj != Py_None) {
+            Py_buffer view;
+            if (!get_grid_view(preference_obj, w, h, "f", sizeof(float), "preference must be a contiguous (height, width) float32 buffer", &view)) {
+                Py_DECREF(items);
+                return false;
+            }
+            views.push_back(view);
+            sp.preference = (const float*)view.buf;
+        }
+
+        species.push_back(sp);
+    }
+
+    Py_DECREF(items);
+    return true;
+}
+
+// Acquires the forest mutex without blocking other Python threads while waiting.
+static void lock_forest(ForestObject *self) {
+    if (!self->mutex.try_lock()) {
+        Py_BEGIN_ALLOW_THREADS
+        self->mutex.lock();
+        Py_END_ALLOW_THREADS
+    }
+}
+
+static PyObject* Forest_new(PyTypeObject *type, PyObject*, PyObject*) {
+    ForestObject *self = (ForestObject*)type->tp_alloc(type, 0);
+    if (!self) return NULL;
+
+    new (&self->forest) Forest();
+    new (&self->mutex) std::mutex();
+    new (&self->views) std::vector<Py_buffer>();
+    return (PyObject*)self;
+}
+
+static void Forest_dealloc(ForestObject *self) {
+    release_views(self);
+    self->views.~vector();
+    self->mutex.~mutex();
+    self->forest.~Forest();
+    Py_TYPE(self)->tp_free((PyObject*)self);
+}
+
+static int Forest_init(ForestObject *self, PyObject* args, PyObject* kwargs) {
+    int w, h;
+    Species single;
+    PyObject *seed_obj = Py_None;
+    PyObject *mask_obj = Py_None;
+    PyObject *species_obj = Py_None;
 
     static const char *kwlist[] = {
         "width",
@@ -218,72 +660,259 @@ static PyObject* py_init_forest(PyObject*, PyObject* args, PyObject* kwargs) {
         "seed_strength",
         "seed_decay_rate",
         "space_between_trees",
+        "seed",
+        "mask",
+        "species",
         NULL,
     };
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ii|iiddi", (char**)kwlist,
-                                     &w, &h, &initial_trees, &seed_radius, &seed_strength, &seed_decay_rate, &space_between_trees)) {
-        PyErr_Print();
-        return NULL;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "ii|iiddiOOO", (char**)kwlist,
+                                     &w, &h, &single.initial_trees, &single.seed_radius, &single.seed_strength,
+                                     &single.seed_decay_rate, &single.space_between_trees, &seed_obj, &mask_obj, &species_obj)) {
+        return -1;
     }
 
-    g_forest.init(w, h, initial_trees, seed_radius, seed_strength, seed_decay_rate, space_between_trees);
+    bool has_seed = seed_obj != Py_None;
+    unsigned long long seed = 0;
+    if (has_seed) {
+        if (!PyLong_Check(seed_obj)) {
+            PyErr_SetString(PyExc_TypeError, "seed must be an int or None");
+            return -1;
+        }
+        seed = PyLong_AsUnsignedLongLongMask(seed_obj);
+        if (seed == (unsigned long long)-1 && PyErr_Occurred()) return -1;
+    }
+
+    if (w <= 0 || h <= 0) {
+        PyErr_SetString(PyExc_ValueError, "width and height must be positive");
+        return -1;
+    }
+
+    std::vector<Py_buffer> views;
+    const uint8_t *plantable = nullptr;
+    if (mask_obj != Py_None) {
+        Py_buffer view;
+        if (!get_grid_view(mask_obj, w, h, "?Bb", 1, "mask must be a contiguous (height, width) bool or uint8 buffer", &view)) return -1;
+        views.push_back(view);
+        plantable = (const uint8_t*)view.buf;
+    }
 
+    // without `species`, the scalar arguments describe a single species
+    std::vector<Species> species;
+    if (species_obj == Py_None) {
+        species.push_back(single);
+    } else if (!parse_species(species_obj, w, h, species, views)) {
+        for (Py_buffer &view : views) PyBuffer_Release(&view);
+        return -1;
+    }
+
+    lock_forest(self);
+    release_views(self);
+    self->views.swap(views);
+
+    Py_BEGIN_ALLOW_THREADS
+    self->forest.init(w, h, std::move(species), has_seed, seed, plantable);
+    Py_END_ALLOW_THREADS
+    self->mutex.unlock();
+
+    return 0;
+}
+
+static PyObject* Forest_seed_trees(ForestObject *self, PyObject*) {
+    lock_forest(self);
+    Py_BEGIN_ALLOW_THREADS
+    self->forest.seed_trees();
+    Py_END_ALLOW_THREADS
+    self->mutex.unlock();
     Py_RETURN_NONE;
 }
 
-static PyObject* py_seed_trees(PyObject*, PyObject*) {
-    g_forest.seed_trees();
+static PyObject* Forest_grow_trees(ForestObject *self, PyObject*) {
+    lock_forest(self);
+    Py_BEGIN_ALLOW_THREADS
+    self->forest.grow_trees();
+    Py_END_ALLOW_THREADS
+    self->mutex.unlock();
     Py_RETURN_NONE;
 }
 
-static PyObject* py_grow_trees(PyObject*, PyObject*) {
-    g_forest.grow_trees();
+static PyObject* Forest_decay_seeds(ForestObject *self, PyObject*) {
+    lock_forest(self);
+    Py_BEGIN_ALLOW_THREADS
+    self->forest.decay_seeds();
+    Py_END_ALLOW_THREADS
+    self->mutex.unlock();
+    Py_RETURN_NONE;
+}
+
+static PyObject* Forest_run(ForestObject *self, PyObject* args) {
+    int n_iterations;
+    if (!PyArg_ParseTuple(args, "i", &n_iterations)) return NULL;
+
+    lock_forest(self);
+    Py_BEGIN_ALLOW_THREADS
+    self->forest.run(n_iterations);
+    Py_END_ALLOW_THREADS
+    self->mutex.unlock();
     Py_RETURN_NONE;
 }
 
-static PyObject* py_decay_seeds(PyObject*, PyObject*) {
-    g_forest.decay_seeds();
+static PyObject* Forest_snapshot(ForestObject *self, PyObject*) {
+    lock_forest(self);
+    PyObject *state = self->forest.snapshot_py();
+    self->mutex.unlock();
+    return state;
+}
+
+static PyObject* Forest_restore(ForestObject *self, PyObject* args) {
+    Py_buffer state;
+    if (!PyArg_ParseTuple(args, "y*", &state)) return NULL;
+
+    const char *error;
+    lock_forest(self);
+    Py_BEGIN_ALLOW_THREADS
+    error = self->forest.restore((const char*)state.buf, (size_t)state.len);
+    Py_END_ALLOW_THREADS
+    self->mutex.unlock();
+    PyBuffer_Release(&state);
+
+    if (error) {
+        PyErr_SetString(PyExc_ValueError, error);
+        return NULL;
+    }
     Py_RETURN_NONE;
 }
 
-static PyObject* py_clear_map(PyObject*, PyObject*) {
-    g_forest.clear_map();
+static PyObject* Forest_clear_map(ForestObject *self, PyObject*) {
+    lock_forest(self);
+    Py_BEGIN_ALLOW_THREADS
+    self->forest.clear_map();
+    Py_END_ALLOW_THREADS
+    self->mutex.unlock();
     Py_RETURN_NONE;
 }
 
-static PyObject* py_get_trees(PyObject*, PyObject*) {
-    return g_forest.get_trees_py();
+static PyObject* Forest_get_coverage(ForestObject *self, PyObject*) {
+    lock_forest(self);
+    double coverage = self->forest.get_coverage();
+    self->mutex.unlock();
+    return PyFloat_FromDouble(coverage);
+}
+
+static PyObject* Forest_get_trees(ForestObject *self, PyObject*) {
+    lock_forest(self);
+    PyObject *trees = self->forest.get_trees_py();
+    self->mutex.unlock();
+    return trees;
+}
+
+static PyObject* Forest_get_seeds(ForestObject *self, PyObject*) {
+    lock_forest(self);
+    PyObject *seeds = self->forest.get_seeds_py();
+    self->mutex.unlock();
+    return seeds;
+}
+
+static PyObject* Forest_get_map(ForestObject *self, PyObject*) {
+    lock_forest(self);
+    PyObject *map = new_map_buffer(self->forest);
+    self->mutex.unlock();
+    return map;
+}
+
+static PyObject* Forest_get_map_compact(ForestObject *self, PyObject*) {
+    lock_forest(self);
+    PyObject *map = self->forest.get_map_compact_py();
+    self->mutex.unlock();
+    return map;
+}
+
+static PyObject* Forest_get_species_map(ForestObject *self, PyObject*) {
+    lock_forest(self);
+    PyObject *map = self->forest.get_species_map_py();
+    self->mutex.unlock();
+    return map;
 }
 
-static PyObject* py_get_seeds(PyObject*, PyObject*) {
-    return g_forest.get_seeds_py();
+static PyObject* Forest_get_width(ForestObject *self, void*) {
+    return PyLong_FromLong(self->forest.width);
 }
 
-static PyObject* py_get_map(PyObject*, PyObject*) {
-    return g_forest.get_map_py();
+static PyObject* Forest_get_height(ForestObject *self, void*) {
+    return PyLong_FromLong(self->forest.height);
 }
 
-static PyMethodDef ForestMethods[] = {
-    {"init_forest", (PyCFunction)py_init_forest, METH_VARARGS | METH_KEYWORDS, "init_forest(width, height, initial_trees, seed_radius=5, seed_strength=0.05, seed_decay_rate=0.2, space_between_trees=5)"},
-    {"seed_trees",  py_seed_trees, METH_NOARGS, "seed_trees()"},
-    {"grow_trees",  py_grow_trees, METH_NOARGS, "grow_trees()"},
-    {"decay_seeds", py_decay_seeds, METH_NOARGS, "decay_seeds()"},
-    {"clear_map", py_clear_map, METH_NOARGS, "clear_map()"},
-    {"get_trees", py_get_trees, METH_NOARGS, "get_trees() => list[(x,y), ...]"},
-    {"get_seeds", py_get_seeds, METH_NOARGS, "get_seeds() => list[(x,y,strength), ...]"},
-    {"get_map", py_get_map, METH_NOARGS, "get_map() => list[list[int]] rows"},
+static PyObject* Forest_get_iterations(ForestObject *self, void*) {
+    lock_forest(self);
+    long long iterations = self->forest.iterations;
+    self->mutex.unlock();
+    return PyLong_FromLongLong(iterations);
+}
+
+static PyMethodDef Forest_methods[] = {
+    {"seed_trees",  (PyCFunction)Forest_seed_trees, METH_NOARGS, "seed_trees()"},
+    {"grow_trees",  (PyCFunction)Forest_grow_trees, METH_NOARGS, "grow_trees()"},
+    {"decay_seeds", (PyCFunction)Forest_decay_seeds, METH_NOARGS, "decay_seeds()"},
+    {"run", (PyCFunction)Forest_run, METH_VARARGS, "run(n_iterations) => runs n seed-grow-decay cycles with the GIL released"},
+    {"snapshot", (PyCFunction)Forest_snapshot, METH_NOARGS, "snapshot() => bytes holding the map, trees, seeds, generator state and iteration count"},
+    {"restore", (PyCFunction)Forest_restore, METH_VARARGS, "restore(state) => continues from a snapshot of a forest with the same size, species, mask and rules"},
+    {"clear_map", (PyCFunction)Forest_clear_map, METH_NOARGS, "clear_map()"},
+    {"get_coverage", (PyCFunction)Forest_get_coverage, METH_NOARGS, "get_coverage() => fraction of cells holding a tree"},
+    {"get_trees", (PyCFunction)Forest_get_trees, METH_NOARGS, "get_trees() => bytearray of packed (int32 x, int32 y, int32 species) records"},
+    {"get_seeds", (PyCFunction)Forest_get_seeds, METH_NOARGS, "get_seeds() => bytearray of packed (int32 x, int32 y, int32 species, float64 strength) records, 8-byte aligned"},
+    {"get_map", (PyCFunction)Forest_get_map, METH_NOARGS, "get_map() => MapBuffer, a zero-copy, read-only (height, width) int8 buffer view of the map"},
+    {"get_map_compact", (PyCFunction)Forest_get_map_compact, METH_NOARGS, "get_map_compact() => bytearray copy of the height * width int8 cells"},
+    {"get_species_map", (PyCFunction)Forest_get_species_map, METH_NOARGS, "get_species_map() => bytearray of height * width int8 species ids, -1 where there is no tree"},
     {NULL, NULL, 0, NULL}
 };
 
+static PyGetSetDef Forest_getset[] = {
+    {"width", (getter)Forest_get_width, NULL, "Width of the forest grid", NULL},
+    {"height", (getter)Forest_get_height, NULL, "Height of the forest grid", NULL},
+    {"iterations", (getter)Forest_get_iterations, NULL, "Number of seed-grow-decay cycles run so far", NULL},
+    {NULL, NULL, NULL, NULL, NULL}
+};
+
+static PyTypeObject ForestType = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    "pyforest.Forest",
+};
+
 static struct PyModuleDef forestmodule = {
     PyModuleDef_HEAD_INIT,
     "pyforest",
     "Forest simulation module (C++ backend)",
     -1,
-    ForestMethods
+    NULL
 };
 
 PyMODINIT_FUNC PyInit_pyforest(void) {
-    return PyModule_Create(&forestmodule);
-}
\ No newline at end of file
+    MapBufferType.tp_basicsize = sizeof(MapBufferObject);
+    MapBufferType.tp_dealloc = (destructor)MapBuffer_dealloc;
+    MapBufferType.tp_as_buffer = &MapBuffer_as_buffer;
+    MapBufferType.tp_flags = Py_TPFLAGS_DEFAULT;
+    MapBufferType.tp_doc = "Zero-copy buffer view of a forest map";
+    if (PyType_Ready(&MapBufferType) < 0) return NULL;
+
+    ForestType.tp_basicsize = sizeof(ForestObject);
+    ForestType.tp_dealloc = (destructor)Forest_dealloc;
+    ForestType.tp_flags = Py_TPFLAGS_DEFAULT;
+    ForestType.tp_doc = "Forest(width, height, initial_trees=5, seed_radius=15, seed_strength=0.05, seed_decay_rate=0.2, space_between_trees=5, seed=None, mask=None, species=None)";
+    ForestType.tp_methods = Forest_methods;
+    ForestType.tp_getset = Forest_getset;
+    ForestType.tp_init = (initproc)Forest_init;
+    ForestType.tp_new = Forest_new;
+    if (PyType_Ready(&ForestType) < 0) return NULL;
+
+    PyObject *module = PyModule_Create(&forestmodule);
+    if (!module) return NULL;
+
+    Py_INCREF(&ForestType);
+    if (PyModule_AddObject(module, "Forest", (PyObject*)&ForestType) < 0) {
+        Py_DECREF(&ForestType);
+        Py_DECREF(module);
+        return NULL;
+    }
+
+    return module;
+}
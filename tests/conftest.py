@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+# the modules live at the repository root and pyforest is built in place
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT), str(ROOT / "pyforest_src")]
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from noise import pnoise2
+from perlin import fractal_noise2
+
+# maximum difference to noise.pnoise2 documented by fractal_noise2
+TOLERANCE = 1e-6
+
+
+def reference(xs, ys, **kwargs):
+    return np.array([[pnoise2(float(x), float(y), **kwargs) for y in ys] for x in xs], dtype=np.float32)
+
+
+@pytest.mark.parametrize("base", [0, 1])
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {},
+        {"octaves": 4},
+        {"octaves": 4, "lacunarity": 2.3, "repeatx": 64.0, "repeaty": 32.0},
+        {"octaves": 6, "persistence": 0.6, "lacunarity": 1.7, "repeatx": 100.0, "repeaty": 300.0},
+        {"octaves": 3, "lacunarity": 3.0, "repeatx": 17.0, "repeaty": 1024.0},
+    ],
+)
+def test_matches_pnoise2(base, kwargs):
+    # spans more than 256 lattice cells, so the permutation indices wrap around
+    xs = (np.arange(300) / 1.1).astype(np.float32)
+    ys = (np.arange(300) / 1.1 + 0.37).astype(np.float32)
+
+    expected = reference(xs, ys, base=base, **kwargs)
+    actual = fractal_noise2(xs, ys, base=base, **kwargs)
+
+    assert actual.dtype == np.float32
+    assert np.abs(actual - expected).max() <= TOLERANCE
+
+
+@pytest.mark.parametrize("base", [2, 5, 50])
+def test_large_base_matches_pnoise2_inside_its_table(base):
+    # pnoise2 only reads past its table for corners with PERM[i] + j > 511; these
+    # coordinates keep j = lattice index + base below 257, where both backends agree
+    xs = (np.arange(60) / 2.1).astype(np.float32)
+    ys = (np.arange(60) / 2.1 + 0.37).astype(np.float32)
+
+    np.testing.assert_allclose(
+        fractal_noise2(xs, ys, base=base), reference(xs, ys, base=base), rtol=0, atol=TOLERANCE
+    )
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from utils import (
+    Mountain,
+    PerlinNoiseConfig,
+    TerrainTransformConfig,
+    dequantize_heights,
+    generate_heightmap,
+    quantize_heights,
+)
+
+# documented bound of the float32 heightmap error against a float64 run
+FLOAT32_TOLERANCE = 1e-6
+
+
+def default_heightmap(dtype, size=250):
+    # the UI defaults
+    config = PerlinNoiseConfig(height=size, width=size)
+    transform = TerrainTransformConfig(
+        max_height=1.0,
+        min_height=0.0,
+        flatness=1.0,
+        slope_x_begin=0.0,
+        slope_x_end=0.0,
+        slope_y_begin=0.0,
+        slope_y_end=0.0,
+    )
+    mountains = [Mountain(x=size // 3, y=size // 2, sigma=size / 8)]
+    return generate_heightmap(config, transform, mountains, terrain_amplifier=0.7, dtype=dtype)
+
+
+@pytest.mark.parametrize("size", [250, 1024])
+def test_float32_heightmap_error(size):
+    single = default_heightmap(np.float32, size)
+    double = default_heightmap(np.float64, size)
+
+    assert single.dtype == np.float32
+    assert double.dtype == np.float64
+    assert np.abs(single.astype(np.float64) - double).max() < FLOAT32_TOLERANCE
+
+
+@pytest.mark.parametrize(
+    "heightmap",
+    [
+        default_heightmap(np.float32),
+        np.random.default_rng(0).uniform(0.2, 0.9, (300, 200)).astype(np.float32),
+        np.random.default_rng(1).uniform(-3.0, 5.0, (64, 64)),
+    ],
+    ids=["default", "uniform", "wide-range"],
+)
+def test_quantized_round_trip(heightmap):
+    levels, (low, high) = quantize_heights(heightmap)
+    restored = dequantize_heights(levels, (low, high), dtype=np.float64)
+
+    assert levels.dtype == np.uint16
+    assert (low, high) == (heightmap.min(), heightmap.max())
+    assert np.abs(restored - heightmap).max() <= (high - low) / 65535
+
+
+def test_quantized_round_trip_of_flat_map():
+    heightmap = np.full((16, 16), 0.25, dtype=np.float32)
+    levels, bounds = quantize_heights(heightmap)
+
+    assert not levels.any()
+    np.testing.assert_array_equal(dequantize_heights(levels, bounds), heightmap)
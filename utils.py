@@ -1,10 +1,18 @@
+import os
 import json
+import uuid
 import numpy as np
 from pathlib import Path
 from noise import pnoise2
-from pyforest import PyForest, VegetationType
-from numpy.typing import NDArray
-from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from perlin import fractal_noise2
+from diagnostics import span, traced
+from attributes import terrain_attributes
+from pyforest import PyForest, Species, VegetationType, snapshot_iterations
+from typing import Callable, Iterator
+from numpy.typing import DTypeLike, NDArray
+from dataclasses import dataclass, asdict, field, fields
 
 
 @dataclass
@@ -29,6 +37,36 @@ class TerrainTransformConfig:
     slope_y_begin: float
     slope_y_end: float
 
+def _json_array(obj: object) -> object:
+    """Serialise NumPy grids as flat row-major lists and NumPy scalars as Python values."""
+
+    if isinstance(obj, np.ndarray):
+        return obj.reshape(-1).tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Storage type of heightmaps and of the noise and mountain mask layers they are built
+# from. Heights live in [0, 1] and the vectorized noise is computed in float32 anyway,
+# so float64 would only double memory and bandwidth.
+HEIGHT_DTYPE = np.float32
+
+
+# Record layout of a tree instance (matches FTreeInstance on the Unreal side): grid
+# position, normalised height, yaw in degrees, uniform scale and species index
+INSTANCE_DTYPE = np.dtype(
+    [
+        ("x", "<f4"),
+        ("y", "<f4"),
+        ("z", "<f4"),
+        ("yaw", "<f4"),
+        ("scale", "<f4"),
+        ("species", "<i4"),
+    ]
+)
+
+
 @dataclass
 class TerrainConfig:
     XSize: int
@@ -36,16 +74,179 @@ class TerrainConfig:
     Scale: float
     ZMultiplier: float
     UVScale: float
-    Heightmap: list[float]
-    VegetationMap: list[int]
+    Heightmap: list[float] | NDArray
+    VegetationMap: list[int] | NDArray
     bWaterOn: bool
     WaterHeight: float
     bFogOn: bool
     FogDensity: int
+    # species index of every tree (-1 elsewhere), for SpawnSpeciesVegetation
+    SpeciesMap: list[int] | NDArray = field(default_factory=list)
+    # sidecar blobs written by export_binary, relative to the config file
+    HeightmapFile: str = ""
+    VegetationMapFile: str = ""
+    SpeciesMapFile: str = ""
+    # sparse INSTANCE_DTYPE tree table (see tree_instances), exported by export_binary only
+    Instances: list | NDArray = field(default_factory=list)
+    InstancesFile: str = ""
+    # export_binary writes the heightmap as uint16 levels spanning
+    # [HeightmapMin, HeightmapMax] instead of float32 (see quantize_heights)
+    bQuantizedHeights: bool = False
+    HeightmapMin: float = 0.0
+    HeightmapMax: float = 1.0
 
+    # array fields and the binary layout they are exported with by export_binary
+    BLOBS = (
+        ("Heightmap", "HeightmapFile", "heightmap.f32", "<f4"),
+        ("VegetationMap", "VegetationMapFile", "vegetation.i8", "i1"),
+        ("SpeciesMap", "SpeciesMapFile", "species.i8", "i1"),
+        ("Instances", "InstancesFile", "instances.bin", INSTANCE_DTYPE),
+    )
+    # layout of the heightmap with bQuantizedHeights
+    QUANTIZED_HEIGHTMAP = ("heightmap.u16", "<u2")
+
+    @traced()
     def export_to_json(self, path: str | Path = "config.json") -> None:
+        config = asdict(self)
+        config.pop("Instances")
+        config.pop("InstancesFile")
+
         with open(path, "w") as file:
-            json.dump(asdict(self), file)
+            json.dump(config, file, default=_json_array)
+
+    @traced()
+    def export_binary(
+        self,
+        path: str | Path = "config.json",
+        progress: Callable[[float], None] | None = None,
+    ) -> None:
+        """
+        Exports the config as a small JSON manifest plus raw binary grids.
+
+        The heightmap is written as little-endian float32 and the vegetation and species
+        maps as int8, row-major, straight from the array buffers, next to the manifest
+        (e.g. `config.3f2a9c1e.heightmap.f32`). The tree instance table is written as packed
+        INSTANCE_DTYPE records. The manifest holds the scalar settings, empty grid
+        lists and the blob file names, so loaders read each grid with one bulk read
+        instead of parsing millions of numbers from text. Empty arrays are not written.
+        With `bQuantizedHeights`, the heightmap is written as uint16 levels (half the
+        size) and its range is stored in HeightmapMin / HeightmapMax.
+
+        Every export writes blobs under fresh names and then atomically replaces the
+        manifest, so a reader never sees a half-written file or a manifest pointing at
+        blobs of another export. Blobs of previous exports are removed afterwards.
+
+        Args:
+            path (str | Path, optional): Path of the JSON manifest. Defaults to "config.json".
+            progress (Callable[[float], None], optional): Called with the completed fraction
+                after every written file, including the temporary manifest right before it
+                replaces the previous one. Exceptions raised by these calls abort the
+                export, remove the files written so far and leave the previous export in
+                place. The final call, with 1.0, comes after the manifest was replaced and
+                should not raise. Defaults to None.
+        """
+
+        path = Path(path)
+        manifest = {f.name: getattr(self, f.name) for f in fields(self)}
+        token = uuid.uuid4().hex[:8]
+
+        blobs = []
+        for grid_field, file_field, suffix, dtype in self.BLOBS:
+            grid = np.asarray(manifest[grid_field])
+            manifest[grid_field] = []
+            manifest[file_field] = ""
+            if grid.size == 0:
+                continue
+
+            if grid_field == "Heightmap" and self.bQuantizedHeights:
+                grid, (manifest["HeightmapMin"], manifest["HeightmapMax"]) = quantize_heights(grid)
+                suffix, dtype = self.QUANTIZED_HEIGHTMAP
+            blobs.append((file_field, suffix, grid, dtype))
+
+        total = sum(grid.size * np.dtype(dtype).itemsize for _, _, grid, dtype in blobs) + 1
+        done = 0
+        written: list[Path] = []
+        tmp_path = path.with_name(f"{path.name}.{token}.tmp")
+
+        try:
+            for file_field, suffix, grid, dtype in blobs:
+                file_name = f"{path.stem}.{token}.{suffix}"
+                written.append(path.with_name(file_name))
+                np.ascontiguousarray(grid, dtype=dtype).tofile(written[-1])
+                manifest[file_field] = file_name
+
+                done += grid.size * np.dtype(dtype).itemsize
+                if progress is not None:
+                    progress(done / total)
+
+            written.append(tmp_path)
+            with open(tmp_path, "w") as file:
+                json.dump(manifest, file, default=_json_array)
+            # last chance to abort: once replaced, the new export is live
+            if progress is not None:
+                progress(done / total)
+            os.replace(tmp_path, path)
+        except BaseException:
+            for file_path in written:
+                file_path.unlink(missing_ok=True)
+            raise
+
+        current = {manifest[file_field] for _, file_field, _, _ in self.BLOBS}
+        suffixes = [suffix for _, _, suffix, _ in self.BLOBS] + [self.QUANTIZED_HEIGHTMAP[0]]
+        for suffix in suffixes:
+            for stale in path.parent.glob(f"{path.stem}.*.{suffix}"):
+                if stale.name not in current:
+                    try:
+                        stale.unlink()
+                    except OSError:
+                        # still open by a reader (e.g. on Windows), removed by a later export
+                        pass
+
+        if progress is not None:
+            progress(1.0)
+
+
+def quantize_heights(heightmap: NDArray) -> tuple[NDArray, tuple[float, float]]:
+    """
+    Quantises a heightmap to uint16 levels spanning its own value range.
+
+    The rounding error is about half a level, (max - min) / 131070, i.e. below 1e-5
+    for heights in [0, 1].
+
+    Args:
+        heightmap (NDArray): 2D array of heights.
+
+    Returns:
+        tuple[NDArray, tuple[float, float]]: uint16 levels and the (min, max) range they span.
+    """
+
+    low, high = float(heightmap.min()), float(heightmap.max())
+    levels = np.subtract(heightmap, low, dtype=np.float32)
+    levels *= np.float32(65535 / (high - low)) if high > low else np.float32(0)
+    np.rint(levels, out=levels)
+    return levels.astype(np.uint16), (low, high)
+
+
+def dequantize_heights(
+    levels: NDArray, bounds: tuple[float, float], dtype: DTypeLike = HEIGHT_DTYPE
+) -> NDArray:
+    """
+    Inverse of `quantize_heights`.
+
+    Args:
+        levels (NDArray): uint16 levels.
+        bounds (tuple[float, float]): The (min, max) range the levels span.
+        dtype (DTypeLike, optional): dtype of the heights. Defaults to HEIGHT_DTYPE.
+
+    Returns:
+        NDArray: The heights.
+    """
+
+    low, high = bounds
+    heights = levels.astype(dtype)
+    heights *= (high - low) / 65535
+    heights += low
+    return heights
 
 
 @dataclass
@@ -58,9 +259,34 @@ class PyForestConfig:
     seed_decay_rate: float = 0.2
     n_iterations: int = 3
     space_between_trees: int = 5
-    min_height: float = 0.35,
-    max_height: float = 0.6,
-    max_slope: float = 0.7,
+    min_height: float = 0.35
+    max_height: float = 0.6
+    max_slope: float = 0.7
+    seed: int | None = None
+    species: list["SpeciesConfig"] | None = None
+
+
+@dataclass
+class SpeciesConfig:
+    """
+    A vegetation species with its simulation rules and terrain preferences.
+
+    The height and slope preference curves are 1 within [min_height, max_height] and
+    below max_slope, and fall off linearly to 0 over `falloff` outside of them.
+    """
+
+    name: str
+    initial_trees: int = 3
+    seed_radius: int = 15
+    seed_strength: float = 0.05
+    seed_decay_rate: float = 0.2
+    space_between_trees: int = 5
+    min_height: float = 0.35
+    max_height: float = 0.6
+    max_slope: float = 0.7
+    falloff: float = 0.05
+    min_scale: float = 0.25
+    max_scale: float = 0.4
 
 
 @dataclass
@@ -97,11 +323,430 @@ def gaussian_2d(
     return g
 
 
+# Gaussians whose window has at most this many cells are accumulated together with
+# a single scatter-add; larger ones are added through per-Gaussian slices.
+_SCATTER_MAX_WINDOW = 65 * 65
+
+
+def _gaussian_weights(
+    centers: NDArray, sigmas: NDArray, radii: NDArray, offsets: NDArray, size: int
+) -> tuple[NDArray, NDArray]:
+    """
+    1D Gaussian weights of several Gaussians along one axis, sampled at the integer
+    positions floor(center) + offsets. Positions outside [0, size) or beyond a
+    Gaussian's own radius get zero weight and a clipped (valid) index.
+    """
+
+    anchors = np.floor(centers).astype(np.int64)[:, None]
+    positions = anchors + offsets[None, :]
+    weights = np.exp(-((positions - centers[:, None]) ** 2) / (2 * sigmas[:, None] ** 2))
+    weights[(np.abs(offsets)[None, :] > radii[:, None]) | (positions < 0) | (positions >= size)] = 0.0
+    return np.clip(positions, 0, size - 1), weights
+
+
+def gaussian_mask(
+    shape: tuple[int, int],
+    centers: NDArray,
+    sigmas: NDArray,
+    amplitudes: NDArray,
+    truncate: float = 4.0,
+    out: NDArray | None = None,
+    dtype: DTypeLike = HEIGHT_DTYPE,
+) -> NDArray:
+    """
+    Accumulates many 2D Gaussians into one array, evaluating each only within a
+    window of truncate * sigma around its center.
+
+    Each Gaussian is separable, so a window costs two 1D `exp` evaluations and one
+    outer product instead of a full-grid `exp` as in `gaussian_2d`. Small windows are
+    grouped by size and added in one vectorized scatter per group, so hundreds of
+    features cost roughly their total window area. Values beyond the window are
+    dropped; with the default truncate of 4 they are below 3.4e-4 of the amplitude.
+
+    Args:
+        shape (tuple[int, int]): Output array shape (height, width).
+        centers (NDArray): Gaussian center coordinates, shape (n, 2) as (y, x).
+        sigmas (NDArray): Standard deviations, shape (n,).
+        amplitudes (NDArray): Signed peak amplitudes, shape (n,).
+        truncate (float, optional): Window half-size in units of sigma. Defaults to 4.0.
+        out (NDArray, optional): C-contiguous float array to accumulate into in place.
+            Defaults to None, allocating a zeroed array.
+        dtype (DTypeLike, optional): dtype of the allocated array. Defaults to HEIGHT_DTYPE.
+
+    Returns:
+        NDArray: 2D array containing the sum of the Gaussians.
+    """
+
+    height, width = shape
+    if out is None:
+        out = np.zeros(shape, dtype=dtype)
+
+    centers = np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+    sigmas = np.asarray(sigmas, dtype=np.float64).reshape(-1)
+    amplitudes = np.asarray(amplitudes, dtype=np.float64).reshape(-1)
+    radii = np.ceil(truncate * sigmas).astype(np.int64)
+
+    # skip Gaussians whose window lies entirely outside the array
+    anchors = np.floor(centers).astype(np.int64)
+    visible = (
+        (anchors[:, 0] + radii >= 0)
+        & (anchors[:, 0] - radii < height)
+        & (anchors[:, 1] + radii >= 0)
+        & (anchors[:, 1] - radii < width)
+    )
+    small = visible & ((2 * radii + 1) ** 2 <= _SCATTER_MAX_WINDOW)
+
+    for k in np.flatnonzero(visible & ~small):
+        (cy, cx), sigma, radius = centers[k], sigmas[k], radii[k]
+        (ay, ax) = anchors[k]
+        r0, r1 = max(ay - radius, 0), min(ay + radius + 1, height)
+        c0, c1 = max(ax - radius, 0), min(ax + radius + 1, width)
+
+        gy = np.exp(-((np.arange(r0, r1) - cy) ** 2) / (2 * sigma**2)).astype(out.dtype)
+        gx = np.exp(-((np.arange(c0, c1) - cx) ** 2) / (2 * sigma**2)).astype(out.dtype)
+        gy *= amplitudes[k]
+        out[r0:r1, c0:c1] += gy[:, None] * gx[None, :]
+
+    # group small windows by power-of-two radius to bound padding
+    small = np.flatnonzero(small)
+    buckets = np.ceil(np.log2(radii[small] + 1)).astype(np.int64)
+    flat = out.reshape(-1)
+
+    for bucket in np.unique(buckets):
+        ks = small[buckets == bucket]
+        offsets = np.arange(-radii[ks].max(), radii[ks].max() + 1)
+
+        rows, gy = _gaussian_weights(centers[ks, 0], sigmas[ks], radii[ks], offsets, height)
+        cols, gx = _gaussian_weights(centers[ks, 1], sigmas[ks], radii[ks], offsets, width)
+        gy *= amplitudes[ks, None]
+        gy, gx = gy.astype(out.dtype), gx.astype(out.dtype)
+
+        indices = rows[:, :, None] * width + cols[:, None, :]
+        np.add.at(flat, indices.reshape(-1), (gy[:, :, None] * gx[:, None, :]).reshape(-1))
+
+    return out
+
+
+def _window(config: PerlinNoiseConfig, rows: range | None, cols: range | None) -> tuple[range, range]:
+    """Resolve an optional (rows, cols) window to concrete ranges over the full map."""
+
+    return (
+        range(config.height) if rows is None else rows,
+        range(config.width) if cols is None else cols,
+    )
+
+
+def pnoise2_noise(
+    config: PerlinNoiseConfig,
+    rows: range | None = None,
+    cols: range | None = None,
+    dtype: DTypeLike = HEIGHT_DTYPE,
+) -> NDArray:
+    """
+    Reference noise backend calling `noise.pnoise2` once per cell.
+
+    Args:
+        config (PerlinNoiseConfig): Configuration object containing Perlin noise parameters.
+        rows (range, optional): Rows of the map to evaluate. Defaults to all rows.
+        cols (range, optional): Columns of the map to evaluate. Defaults to all columns.
+        dtype (DTypeLike, optional): dtype of the result. Defaults to HEIGHT_DTYPE.
+
+    Returns:
+        NDArray: A 2D array of raw Perlin noise values for the window.
+    """
+
+    rows, cols = _window(config, rows, cols)
+
+    terrain = np.zeros((len(rows), len(cols)), dtype=dtype)
+    for r, i in enumerate(rows):
+        for c, j in enumerate(cols):
+            terrain[r, c] = pnoise2(
+                i / config.scale,
+                j / config.scale,
+                octaves=config.octaves,
+                persistence=config.persistence,
+                lacunarity=config.lacunarity,
+                repeatx=config.repeatx,
+                repeaty=config.repeaty,
+                base=config.base,
+            )
+
+    return terrain
+
+
+def numpy_noise(
+    config: PerlinNoiseConfig,
+    rows: range | None = None,
+    cols: range | None = None,
+    dtype: DTypeLike = HEIGHT_DTYPE,
+) -> NDArray:
+    """
+    Vectorized noise backend evaluating whole coordinate grids per octave.
+
+    Matches `pnoise2_noise` within 1e-6 (see `perlin.fractal_noise2`).
+
+    Args:
+        config (PerlinNoiseConfig): Configuration object containing Perlin noise parameters.
+        rows (range, optional): Rows of the map to evaluate. Defaults to all rows.
+        cols (range, optional): Columns of the map to evaluate. Defaults to all columns.
+        dtype (DTypeLike, optional): dtype of the result. The noise is computed in
+            float32, which is returned without a copy. Defaults to HEIGHT_DTYPE.
+
+    Returns:
+        NDArray: A 2D array of raw Perlin noise values for the window.
+    """
+
+    rows, cols = _window(config, rows, cols)
+
+    terrain = fractal_noise2(
+        np.asarray(rows) / config.scale,
+        np.asarray(cols) / config.scale,
+        octaves=config.octaves,
+        persistence=config.persistence,
+        lacunarity=config.lacunarity,
+        repeatx=config.repeatx,
+        repeaty=config.repeaty,
+        base=config.base,
+    )
+
+    return terrain.astype(dtype, copy=False)
+
+
+NOISE_BACKENDS: dict[str, Callable[[PerlinNoiseConfig, range | None, range | None, DTypeLike], NDArray]] = {
+    "pnoise2": pnoise2_noise,
+    "numpy": numpy_noise,
+}
+
+
+@traced()
+def generate_noise(
+    config: PerlinNoiseConfig,
+    backend: str = "numpy",
+    rows: range | None = None,
+    cols: range | None = None,
+    dtype: DTypeLike = HEIGHT_DTYPE,
+) -> NDArray:
+    """
+    Generates raw Perlin noise with the selected backend.
+
+    Args:
+        config (PerlinNoiseConfig): Configuration object containing Perlin noise parameters.
+        backend (str, optional): Name of a backend registered in NOISE_BACKENDS. Default is "numpy".
+        rows (range, optional): Rows of the map to evaluate. Defaults to all rows.
+        cols (range, optional): Columns of the map to evaluate. Defaults to all columns.
+        dtype (DTypeLike, optional): dtype of the result. Defaults to HEIGHT_DTYPE.
+
+    Returns:
+        NDArray: A 2D array of raw Perlin noise values for the window.
+    """
+
+    if backend not in NOISE_BACKENDS:
+        raise ValueError(f"Unknown noise backend {backend!r}, expected one of {list(NOISE_BACKENDS)}")
+
+    return NOISE_BACKENDS[backend](config, rows, cols, dtype)
+
+
+@traced()
+def mountain_mask(
+    config: PerlinNoiseConfig,
+    mountains: list[Mountain],
+    rows: range | None = None,
+    cols: range | None = None,
+    dtype: DTypeLike = HEIGHT_DTYPE,
+) -> NDArray:
+    """
+    Sums the Gaussian masks of all mountains (holes are subtracted), before normalisation.
+
+    Each Gaussian is evaluated within a 4 sigma window only (see `gaussian_mask`).
+    Strided windows are supported: a Gaussian sampled every `step` cells is itself a
+    Gaussian with its center and sigma divided by the step, so the samples are exact.
+
+    Args:
+        config (PerlinNoiseConfig): Configuration object containing Perlin noise parameters.
+        mountains (list[Mountain]): List of Mountain objects.
+        rows (range, optional): Rows of the map to evaluate. Defaults to all rows.
+        cols (range, optional): Columns of the map to evaluate. Defaults to all columns.
+        dtype (DTypeLike, optional): dtype of the mask. Defaults to HEIGHT_DTYPE.
+
+    Returns:
+        NDArray: A 2D array with the raw mountain mask for the window.
+    """
+
+    rows, cols = _window(config, rows, cols)
+
+    if rows.step != cols.step:
+        raise ValueError(f"rows and cols must share one step, got {rows.step} and {cols.step}")
+
+    step = rows.step
+    return gaussian_mask(
+        (len(rows), len(cols)),
+        [
+            ((mountain.y - rows.start) / step, (mountain.x - cols.start) / step)
+            for mountain in mountains
+        ],
+        [mountain.sigma / step for mountain in mountains],
+        [mountain.amplitude * (1 + mountain.hole * -2) for mountain in mountains],
+        dtype=dtype,
+    )
+
+
+@traced()
+def apply_directional_slope(
+    terrain: NDArray,
+    config: PerlinNoiseConfig,
+    transform: TerrainTransformConfig,
+    rows: range | None = None,
+    cols: range | None = None,
+) -> NDArray:
+    """
+    Adds the directional slope ramp to the raw noise, in place.
+
+    The "x" ramp runs along rows (north to south in the preview) and the "y" ramp along
+    columns (west to east), for any aspect ratio. Both are broadcast 1D ramps, so no
+    full-size temporary is allocated.
+
+    Args:
+        terrain (NDArray): Raw noise for the window, modified in place.
+        config (PerlinNoiseConfig): Configuration object containing Perlin noise parameters.
+        transform (TerrainTransformConfig): Terrain transformation parameters.
+        rows (range, optional): Rows of the map covered by terrain. Defaults to all rows.
+        cols (range, optional): Columns of the map covered by terrain. Defaults to all columns.
+
+    Returns:
+        NDArray: terrain, with the slope ramp added.
+    """
+
+    rows, cols = _window(config, rows, cols)
+
+    slope_x = np.linspace(transform.slope_x_begin, transform.slope_x_end, config.height, dtype=terrain.dtype)
+    slope_y = np.linspace(transform.slope_y_begin, transform.slope_y_end, config.width, dtype=terrain.dtype)
+    terrain += slope_x[rows.start:rows.stop:rows.step, None]
+    terrain += slope_y[None, cols.start:cols.stop:cols.step]
+    return terrain
+
+
+def normalize_terrain(
+    terrain: NDArray,
+    bounds: tuple[float, float],
+    transform: TerrainTransformConfig,
+) -> NDArray:
+    """
+    Normalises the raw terrain (noise + slope) to [0, 1], flattens and clamps it, in place.
+
+    Args:
+        terrain (NDArray): Raw terrain values, modified in place.
+        bounds (tuple[float, float]): Global (min, max) of the raw terrain, passed
+            explicitly so that a window is normalised exactly like the full map.
+        transform (TerrainTransformConfig): Terrain transformation parameters.
+
+    Returns:
+        NDArray: terrain, normalised.
+    """
+
+    terrain_min, terrain_max = bounds
+    terrain -= terrain_min
+    terrain /= terrain_max - terrain_min
+    terrain /= transform.flatness
+    np.clip(terrain, transform.min_height, transform.max_height, out=terrain)
+    return terrain
+
+
+def normalize_mask(mask: NDArray, bounds: tuple[float, float]) -> NDArray:
+    """
+    Normalises a raw mountain mask to [0, 1], in place.
+
+    Args:
+        mask (NDArray): Raw mountain mask values, modified in place.
+        bounds (tuple[float, float]): Global (min, max) of the raw mask.
+
+    Returns:
+        NDArray: mask, normalised.
+    """
+
+    mask_min, mask_max = bounds
+    mask -= mask_min
+    mask /= mask_max - mask_min
+    return mask
+
+
+def composite_heightmap(
+    terrain: NDArray,
+    mask: NDArray | None,
+    transform: TerrainTransformConfig,
+    terrain_amplifier: float,
+    out: NDArray | None = None,
+) -> NDArray:
+    """
+    Applies the normalised mountain mask to the normalised terrain.
+
+    Args:
+        terrain (NDArray): Normalised terrain.
+        mask (NDArray | None): Normalised mountain mask, or None without mountains.
+        transform (TerrainTransformConfig): Terrain transformation parameters.
+        terrain_amplifier (float): Amplification factor for the terrain.
+        out (NDArray, optional): Output array. If it is terrain itself, the result is
+            written in place and mask is used as scratch space. Defaults to None,
+            allocating a new array (without mountains, terrain is returned as is).
+
+    Returns:
+        NDArray: The final heightmap.
+    """
+
+    if mask is None:
+        if out is None or out is terrain:
+            return terrain
+        np.copyto(out, terrain)
+        return out
+
+    if out is terrain:
+        mask *= transform.flatness
+        mask += terrain_amplifier
+        terrain *= mask
+        return terrain
+
+    out = np.multiply(mask, transform.flatness, out=out)
+    out += terrain_amplifier
+    out *= terrain
+    return out
+
+
+@traced()
+def _finalize_terrain(
+    terrain: NDArray,
+    terrain_bounds: tuple[float, float],
+    mask: NDArray | None,
+    mask_bounds: tuple[float, float] | None,
+    transform: TerrainTransformConfig,
+    terrain_amplifier: float,
+    out: NDArray | None = None,
+) -> NDArray:
+    """
+    Normalises, flattens and clamps the terrain, then composites the mountain mask.
+
+    Fused, in-place stage: terrain and mask are overwritten and the result lands in
+    out (terrain itself when None), so no full-size temporaries are allocated. The
+    min/max bounds are passed explicitly so that a tile of the map is finalised
+    exactly like the same cells of the full map.
+    """
+
+    if mask is not None:
+        normalize_mask(mask, mask_bounds)
+
+    normalize_terrain(terrain, terrain_bounds, transform)
+    return composite_heightmap(
+        terrain, mask, transform, terrain_amplifier, out=terrain if out is None else out
+    )
+
+
+@traced()
 def generate_heightmap(
     config: PerlinNoiseConfig,
     transform: TerrainTransformConfig,
     mountains: list[Mountain] | None = None,
     terrain_amplifier: float = 0.5,
+    backend: str = "numpy",
+    workers: int = 1,
+    dtype: DTypeLike = HEIGHT_DTYPE,
 ) -> NDArray:
     """
     Generates a heightmap using Perlin noise, optionally modified by mountain masks.
@@ -110,57 +755,456 @@ def generate_heightmap(
         config (PerlinNoiseConfig): Configuration object containing Perlin noise parameters.
         mountains (list[Mountain], optional): List of Mountain objects used to modify the terrain.
         terrain_amplifier (float, optional): Amplification factor for the terrain. Default is 0.5.
+        backend (str, optional): Noise backend, one of NOISE_BACKENDS. Default is "numpy".
+        workers (int, optional): Number of worker processes generating row bands of the
+            noise and mountain mask in parallel. The output is bit-identical to the
+            single-process result. Default is 1.
+        dtype (DTypeLike, optional): dtype of the heightmap and of its intermediate
+            layers. Defaults to HEIGHT_DTYPE.
 
     Returns:
         NDArray: A 2D array representing the generated heightmap.
     """
 
+    if workers > 1:
+        return _generate_heightmap_parallel(
+            config, transform, mountains, terrain_amplifier, backend, workers, dtype
+        )
+
     mask = None
+    mask_bounds = None
 
     if mountains:
-        mask = np.zeros((config.height, config.width))
-        for mountain in mountains:
-            mask += gaussian_2d(
-                (config.height, config.width),
-                (mountain.y, mountain.x),
-                mountain.sigma,
-                amplitude=mountain.amplitude,
-            ) * (1 + mountain.hole * -2)
-
-        mask = (mask - mask.min()) / (mask.max() - mask.min())
-
-    terrain = np.zeros((config.height, config.width))
-    for i in range(config.height):
-        for j in range(config.width):
-            terrain[i, j] =pnoise2(
-                i / config.scale,
-                j / config.scale,
-                octaves=config.octaves,
-                persistence=config.persistence,
-                lacunarity=config.lacunarity,
-                repeatx=config.repeatx,
-                repeaty=config.repeaty,
-                base=config.base,
+        mask = mountain_mask(config, mountains, dtype=dtype)
+        mask_bounds = (mask.min(), mask.max())
+
+    terrain = generate_noise(config, backend=backend, dtype=dtype)
+    apply_directional_slope(terrain, config, transform)
+
+    return _finalize_terrain(
+        terrain,
+        (terrain.min(), terrain.max()),
+        mask,
+        mask_bounds,
+        transform,
+        terrain_amplifier,
+    )
+
+
+@traced()
+def generate_heightmap_level(
+    config: PerlinNoiseConfig,
+    transform: TerrainTransformConfig,
+    mountains: list[Mountain] | None = None,
+    terrain_amplifier: float = 0.5,
+    step: int = 1,
+    backend: str = "numpy",
+    dtype: DTypeLike = HEIGHT_DTYPE,
+) -> NDArray:
+    """
+    Generates a coarse version of the heightmap, sampling every `step`-th row and column.
+
+    Noise and mountain masks are evaluated on the strided grid only, so a level costs
+    about 1 / step**2 of the full map. Cells are exact samples of the raw noise and
+    mask, but normalisation uses the level's own min/max, which can differ slightly
+    from the full map's; with step 1 the result equals `generate_heightmap`.
+
+    Args:
+        config (PerlinNoiseConfig): Configuration object containing Perlin noise parameters.
+        transform (TerrainTransformConfig): Terrain transformation parameters.
+        mountains (list[Mountain], optional): List of Mountain objects used to modify the terrain.
+        terrain_amplifier (float, optional): Amplification factor for the terrain. Default is 0.5.
+        step (int, optional): Distance between sampled cells. Default is 1.
+        backend (str, optional): Noise backend, one of NOISE_BACKENDS. Default is "numpy".
+        dtype (DTypeLike, optional): dtype of the level. Defaults to HEIGHT_DTYPE.
+
+    Returns:
+        NDArray: A 2D array of shape (ceil(height / step), ceil(width / step)).
+    """
+
+    if step < 1:
+        raise ValueError(f"step must be at least 1, got {step}")
+
+    rows = range(0, config.height, step)
+    cols = range(0, config.width, step)
+
+    mask = None
+    mask_bounds = None
+
+    if mountains:
+        mask = mountain_mask(config, mountains, rows, cols, dtype)
+        mask_bounds = (mask.min(), mask.max())
+
+    terrain = generate_noise(config, backend=backend, rows=rows, cols=cols, dtype=dtype)
+    apply_directional_slope(terrain, config, transform, rows, cols)
+
+    return _finalize_terrain(
+        terrain,
+        (terrain.min(), terrain.max()),
+        mask,
+        mask_bounds,
+        transform,
+        terrain_amplifier,
+    )
+
+
+def level_steps(shape: tuple[int, int], sizes: tuple[int, ...] = (256, 1024)) -> list[int]:
+    """
+    Returns the sampling steps of a progressive refinement, coarsest first.
+
+    Every size gives the step that fits the map into at most that many cells per side;
+    duplicate steps are dropped and the list always ends with the full resolution (1).
+
+    Args:
+        shape (tuple[int, int]): Map shape (height, width).
+        sizes (tuple[int, ...], optional): Maximum level sizes along either axis.
+            Defaults to (256, 1024).
+
+    Returns:
+        list[int]: Strictly decreasing steps, ending with 1.
+    """
+
+    steps = {max(1, -(-max(shape) // size)) for size in sizes}
+    return sorted(steps | {1}, reverse=True)
+
+
+def _row_bands(height: int, n_bands: int) -> list[range]:
+    """Splits rows [0, height) into at most n_bands contiguous, non-empty bands."""
+
+    n_bands = max(1, min(n_bands, height))
+    bounds = np.linspace(0, height, n_bands + 1).astype(int)
+    return [range(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def _fill_band(
+    shm_name: str,
+    shape: tuple[int, int, int],
+    config: PerlinNoiseConfig,
+    transform: TerrainTransformConfig,
+    mountains: list[Mountain] | None,
+    backend: str,
+    rows: range,
+    dtype: DTypeLike,
+) -> None:
+    """
+    Worker task writing one row band of the raw terrain (and mountain mask) layers
+    straight into the shared memory block allocated by the parent process.
+    """
+
+    shm = SharedMemory(name=shm_name)
+    try:
+        layers = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        band = slice(rows.start, rows.stop)
+
+        layers[0, band] = generate_noise(config, backend, rows, dtype=dtype)
+        apply_directional_slope(layers[0, band], config, transform, rows)
+        if mountains:
+            layers[1, band] = mountain_mask(config, mountains, rows, dtype=dtype)
+
+        del layers
+    finally:
+        shm.close()
+
+
+def _generate_heightmap_parallel(
+    config: PerlinNoiseConfig,
+    transform: TerrainTransformConfig,
+    mountains: list[Mountain] | None,
+    terrain_amplifier: float,
+    backend: str,
+    workers: int,
+    dtype: DTypeLike,
+) -> NDArray:
+    """
+    Multi-process variant of `generate_heightmap`.
+
+    Rows are split into bands (a few per worker for load balancing) that are evaluated
+    in a process pool. Workers write into a shared memory block holding the raw terrain
+    and mountain mask layers, so no band is copied back through the pool. The global
+    normalisation then runs once in the parent process.
+    """
+
+    shape = (2 if mountains else 1, config.height, config.width)
+    shm = SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(dtype).itemsize)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_fill_band, shm.name, shape, config, transform, mountains, backend, rows, dtype)
+                for rows in _row_bands(config.height, workers * 4)
+            ]
+            for future in futures:
+                future.result()
+
+        layers = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        terrain = layers[0]
+        mask = layers[1] if mountains else None
+
+        heightmap = _finalize_terrain(
+            terrain,
+            (terrain.min(), terrain.max()),
+            mask,
+            (mask.min(), mask.max()) if mask is not None else None,
+            transform,
+            terrain_amplifier,
+            out=np.empty((config.height, config.width), dtype=dtype),
+        )
+
+        # views must be released before the shared memory block can be closed
+        del layers, terrain, mask
+        return heightmap
+    finally:
+        shm.unlink()
+        shm.close()
+
+
+def iter_tiles(height: int, width: int, tile_size: int) -> Iterator[tuple[range, range]]:
+    """
+    Splits a (height, width) map into row-major tiles of at most tile_size x tile_size cells.
+
+    Args:
+        height (int): Map height.
+        width (int): Map width.
+        tile_size (int): Tile edge length.
+
+    Yields:
+        tuple[range, range]: Rows and columns covered by each tile.
+    """
+
+    for row in range(0, height, tile_size):
+        for col in range(0, width, tile_size):
+            yield range(row, min(row + tile_size, height)), range(col, min(col + tile_size, width))
+
+
+@traced()
+def generate_heightmap_tiled(
+    config: PerlinNoiseConfig,
+    transform: TerrainTransformConfig,
+    path: str | Path,
+    mountains: list[Mountain] | None = None,
+    terrain_amplifier: float = 0.5,
+    backend: str = "numpy",
+    tile_size: int = 1024,
+    dtype: DTypeLike = HEIGHT_DTYPE,
+) -> np.memmap:
+    """
+    Generates a heightmap tile by tile into a memory-mapped `.npy` file.
+
+    Produces the same values as `generate_heightmap`, but peak memory depends on
+    tile_size rather than on the map size. Generation runs in two passes: the first
+    writes the raw noise + slope of every tile to the output file while tracking the
+    global terrain and mountain mask bounds, the second reads each tile back,
+    normalises it with those global bounds and composites the mountain mask
+    (recomputed per tile), so tiles stitch together seamlessly.
+
+    Args:
+        config (PerlinNoiseConfig): Configuration object containing Perlin noise parameters.
+        transform (TerrainTransformConfig): Terrain transformation parameters.
+        path (str | Path): Output `.npy` file, created or overwritten.
+        mountains (list[Mountain], optional): List of Mountain objects used to modify the terrain.
+        terrain_amplifier (float, optional): Amplification factor for the terrain. Default is 0.5.
+        backend (str, optional): Noise backend, one of NOISE_BACKENDS. Default is "numpy".
+        tile_size (int, optional): Tile edge length in cells. Default is 1024.
+        dtype (DTypeLike, optional): dtype of the heightmap file. Defaults to HEIGHT_DTYPE.
+
+    Returns:
+        np.memmap: The heightmap, memory-mapped from path.
+    """
+
+    heightmap = np.lib.format.open_memmap(
+        path, mode="w+", dtype=dtype, shape=(config.height, config.width)
+    )
+
+    terrain_min, terrain_max = np.inf, -np.inf
+    mask_min, mask_max = np.inf, -np.inf
+
+    for rows, cols in iter_tiles(config.height, config.width, tile_size):
+        tile = generate_noise(config, backend, rows, cols, dtype)
+        apply_directional_slope(tile, config, transform, rows, cols)
+        heightmap[rows.start:rows.stop, cols.start:cols.stop] = tile
+        terrain_min, terrain_max = min(terrain_min, tile.min()), max(terrain_max, tile.max())
+
+        if mountains:
+            mask = mountain_mask(config, mountains, rows, cols, dtype)
+            mask_min, mask_max = min(mask_min, mask.min()), max(mask_max, mask.max())
+
+    for rows, cols in iter_tiles(config.height, config.width, tile_size):
+        window = (slice(rows.start, rows.stop), slice(cols.start, cols.stop))
+        mask = mountain_mask(config, mountains, rows, cols, dtype) if mountains else None
+
+        # finalised in place, straight in the memory-mapped output
+        _finalize_terrain(
+            heightmap[window],
+            (terrain_min, terrain_max),
+            mask,
+            (mask_min, mask_max),
+            transform,
+            terrain_amplifier,
+        )
+
+    heightmap.flush()
+    return heightmap
+
+
+@traced()
+def normalized_slope(heightmap: NDArray) -> NDArray:
+    """
+    Computes the gradient magnitude of a heightmap, normalised to [0, 1] over the map.
+
+    The slope is memoised in the heightmap's TerrainAttributes (see
+    `attributes.terrain_attributes`), so it is computed once per read-only heightmap.
+
+    Args:
+        heightmap (NDArray): 2D array representing the terrain height values.
+
+    Returns:
+        NDArray: Read-only float32 2D array of normalised slope values.
+    """
+
+    return terrain_attributes(heightmap).slope
+
+
+def _preference_ramp(inside: NDArray, falloff: float) -> NDArray:
+    """1 where `inside` >= 0, falling linearly to 0 at `inside` == -falloff."""
+
+    if falloff <= 0:
+        return (inside >= 0).astype(np.float32)
+    return np.clip(1.0 + inside / falloff, 0.0, 1.0).astype(np.float32)
+
+
+@traced()
+def species_preference(species: SpeciesConfig, heightmap: NDArray, slope: NDArray) -> NDArray:
+    """
+    Evaluates the height and slope preference curves of a species.
+
+    Args:
+        species (SpeciesConfig): The species.
+        heightmap (NDArray): 2D array representing the terrain height values.
+        slope (NDArray): Normalised slope of the heightmap (see `normalized_slope`).
+
+    Returns:
+        NDArray: float32 array of weights in [0, 1] of the heightmap's shape.
+    """
+
+    height_inside = np.minimum(heightmap - species.min_height, species.max_height - heightmap)
+    preference = _preference_ramp(height_inside, species.falloff)
+    preference *= _preference_ramp(species.max_slope - slope, species.falloff)
+    return preference
+
+
+@traced()
+def plantable_mask(config: PyForestConfig, heightmap: NDArray) -> NDArray:
+    """
+    Computes where trees may grow on the given terrain.
+
+    A cell is plantable when its height lies within [min_height, max_height] and its
+    slope, normalised to [0, 1] over the map, does not exceed max_slope.
+
+    Args:
+        config (PyForestConfig): Configuration object holding the height and slope limits.
+        heightmap (NDArray): 2D array representing the terrain height values.
+
+    Returns:
+        NDArray: Boolean array of the heightmap's shape, True where trees may grow.
+    """
+
+    attrs = terrain_attributes(heightmap)
+
+    plantable = ~(attrs.slope > config.max_slope)
+    plantable &= attrs.height_band(config.min_height, config.max_height)
+    return plantable
+
+
+def _simulate_forest(
+    config: PyForestConfig,
+    heightmap: NDArray,
+    state: NDArray | None = None,
+) -> PyForest:
+    """
+    Runs the PyForest simulation restricted to the terrain the species accept,
+    continuing from the snapshot `state` when it can.
+    """
+
+    if config.species:
+        # every species brings its own height and slope limits as preference weights
+        slope = terrain_attributes(heightmap).slope
+        species = [
+            Species(
+                initial_trees=sp.initial_trees,
+                seed_radius=sp.seed_radius,
+                seed_strength=sp.seed_strength,
+                seed_decay_rate=sp.seed_decay_rate,
+                space_between_trees=sp.space_between_trees,
+                preference=species_preference(sp, heightmap, slope),
             )
+            for sp in config.species
+        ]
+        mask = None
+    else:
+        species = None
+        mask = plantable_mask(config, heightmap)
 
-    tranformation_mask = np.zeros((config.height, config.width))
-    slope_x = np.linspace(transform.slope_x_begin, transform.slope_x_end, config.width)
-    slope_y = np.linspace(transform.slope_y_begin, transform.slope_y_end, config.height)
-    for i in range(config.height):
-        for j in range(config.width):
-            tranformation_mask[i, j] = slope_x[i] + slope_y[j]
-    terrain = terrain + tranformation_mask
-    terrain = (terrain - terrain.min()) / (terrain.max() - terrain.min())
-    terrain = terrain/transform.flatness
-    terrain[terrain < transform.min_height] = transform.min_height
-    terrain[terrain > transform.max_height] = transform.max_height
+    # pyforest is a standalone package, so its simulation is timed from here
+    resumed_from = snapshot_iterations(state) if state is not None else 0
+    with span("PyForest._generate", n_iterations=config.n_iterations, resumed_from=resumed_from):
+        return PyForest(
+            width=config.width,
+            height=config.height,
+            initial_trees=config.initial_trees,
+            seed_radius=config.seed_radius,
+            seed_strength=config.seed_strength,
+            seed_decay_rate=config.seed_decay_rate,
+            n_iterations=config.n_iterations,
+            space_between_trees=config.space_between_trees,
+            seed=config.seed,
+            mask=mask,
+            species=species,
+            state=state,
+        )
 
-    if mask is not None:
-        return terrain * (terrain_amplifier + mask * transform.flatness)
 
-    return terrain
+@traced()
+def generate_vegetation(
+    config: PyForestConfig,
+    heightmap: NDArray,
+) -> tuple[NDArray, NDArray]:
+    """
+    Generates a (possibly multi-species) forest adapted to the given terrain.
+
+    With `config.species` set, all species are simulated in one pass over a shared map,
+    each with its own seeding rules and with its height and slope preference curves
+    (see `species_preference`) scaling its seed strength. Tree spacing applies across
+    species. Otherwise a single species is simulated with the limits of `config`.
+
+    Args:
+        config (PyForestConfig): Configuration object for the PyForest generator.
+        heightmap (NDArray): 2D array representing the terrain height values.
+
+    Returns:
+        tuple[NDArray, NDArray]:
+            - NDArray: The forest map with VegetationType values.
+            - NDArray: int8 species map, the index of the species of every tree and -1 elsewhere.
+    """
+
+    forest = _simulate_forest(config, heightmap)
+    return forest.get_map(), forest.get_species_map()
 
 
+def single_species_map(forest_map: NDArray) -> NDArray:
+    """
+    Builds the species map of a single-species forest, as `generate_vegetation` does.
+
+    Args:
+        forest_map (NDArray): Forest map with VegetationType values.
+
+    Returns:
+        NDArray: int8 species map, 0 on every tree and -1 elsewhere.
+    """
+
+    return np.where(forest_map == VegetationType.TREE, 0, -1).astype(np.int8)
+
+
+@traced()
 def generate_forest_adapted_to_terrain(
     config: PyForestConfig,
     heightmap: NDArray,
@@ -168,18 +1212,20 @@ def generate_forest_adapted_to_terrain(
     """
     Generates a forest distribution using the PyForest module and adapts it to the given terrain.
 
-    The function initializes a PyForest simulation using the provided configuration,
-    generates a forest map, and filters vegetation based on the heightmap data.
-    Trees are removed from regions that exceed the allowed slope or fall outside
-    the specified height range. This results in a more natural forest layout that
-    matches the underlying terrain shape.
+    The function computes the plantable cells of the heightmap (see `plantable_mask`)
+    and passes them to the PyForest simulation, so initial trees and seeds are only
+    placed in regions within the allowed slope and height range, set by the
+    `min_height`, `max_height` and `max_slope` fields of the configuration. No
+    simulation work is spent on (and no density lost to) cells that would be filtered
+    out afterwards. This results in a more natural forest layout that matches the
+    underlying terrain shape.
+
+    With `config.seed` set, the result is fully determined by the configuration and
+    the heightmap, so it can be cached (see `cache.cached_generate_forest`).
 
     Args:
         config (PyForestConfig): Configuration object for the PyForest generator.
         heightmap (NDArray): 2D array representing the terrain height values.
-        min_height (float, optional): Minimum normalized height threshold below which trees are removed. Defaults to 0.35.
-        max_height (float, optional): Maximum normalized height threshold above which trees are removed. Defaults to 0.6.
-        max_slope (float, optional): Maximum normalized slope value allowed for tree placement. Defaults to 0.7.
 
     Returns:
         NDArray: A 2D array representing the filtered forest map, where cell values correspond to vegetation types:
@@ -189,26 +1235,92 @@ def generate_forest_adapted_to_terrain(
             - 2: TREE
     """
 
-    forest = PyForest(
-        width=config.width,
-        height=config.height,
-        initial_trees=config.initial_trees,
-        seed_radius=config.seed_radius,
-        seed_strength=config.seed_strength,
-        n_iterations=config.n_iterations,
-        space_between_trees=config.space_between_trees,
-    )
+    return _simulate_forest(config, heightmap).get_map()
+
+
+@traced()
+def generate_forest_resumable(
+    config: PyForestConfig,
+    heightmap: NDArray,
+    state: NDArray | None = None,
+) -> tuple[NDArray, NDArray]:
+    """
+    `generate_forest_adapted_to_terrain` that can continue an earlier simulation.
+
+    `state` is the snapshot returned by a previous call with the same configuration
+    (apart from `n_iterations`), seed and heightmap. When it holds at most
+    `config.n_iterations` iterations, the simulation continues from it and only runs
+    the missing ones; otherwise it starts from scratch. With `config.seed` set, either
+    way the forest is the same as a full run.
+
+    Args:
+        config (PyForestConfig): Configuration object for the PyForest generator.
+        heightmap (NDArray): 2D array representing the terrain height values.
+        state (NDArray, optional): uint8 snapshot of an earlier run. Defaults to None.
+
+    Returns:
+        tuple[NDArray, NDArray]:
+            - NDArray: The forest map with VegetationType values.
+            - NDArray: uint8 snapshot of the simulation after `config.n_iterations` iterations.
+    """
+
+    if state is not None and snapshot_iterations(state) > config.n_iterations:
+        # a snapshot cannot be rewound
+        state = None
+
+    forest = _simulate_forest(config, heightmap, state)
+    # taken before get_map, which removes the seeds
+    snapshot = np.frombuffer(forest.snapshot(), dtype=np.uint8)
+    return forest.get_map(), snapshot
+
+
+@traced()
+def tree_instances(
+    forest_map: NDArray,
+    heightmap: NDArray,
+    species_map: NDArray | None = None,
+    species: list[SpeciesConfig] | None = None,
+    scale_range: tuple[float, float] = (0.25, 0.4),
+    seed: int | None = None,
+) -> NDArray:
+    """
+    Builds the sparse instance table of all trees of a forest map.
+
+    Every tree gets its grid position, the terrain height under it, a random yaw and
+    a random uniform scale, drawn per species from its [min_scale, max_scale] range
+    (or from `scale_range` for single-species forests).
+
+    Args:
+        forest_map (NDArray): Forest map with VegetationType values.
+        heightmap (NDArray): 2D array representing the terrain height values.
+        species_map (NDArray, optional): int8 species map from `generate_vegetation`. Defaults to None (species 0).
+        species (list[SpeciesConfig], optional): Species providing the scale ranges. Defaults to None.
+        scale_range (tuple[float, float], optional): Scale range without species. Defaults to (0.25, 0.4).
+        seed (int, optional): Seed for the random yaw and scale. Defaults to None.
+
+    Returns:
+        NDArray: Structured INSTANCE_DTYPE array with one record per tree, in row-major order.
+    """
+
+    ys, xs = np.nonzero(forest_map == VegetationType.TREE)
+    rng = np.random.default_rng(seed)
 
-    forest_map = forest.get_map()
+    instances = np.empty(len(xs), dtype=INSTANCE_DTYPE)
+    instances["x"] = xs
+    instances["y"] = ys
+    instances["z"] = heightmap[ys, xs]
+    instances["yaw"] = rng.uniform(0.0, 360.0, len(xs))
+    instances["species"] = species_map[ys, xs] if species_map is not None else 0
 
-    dx, dy = np.gradient(heightmap)
-    slope = np.sqrt(dx**2 + dy**2)
-    slope = (slope - slope.min()) / (slope.max() - slope.min())
+    if species:
+        min_scale = np.array([sp.min_scale for sp in species], dtype=np.float32)
+        max_scale = np.array([sp.max_scale for sp in species], dtype=np.float32)
+        ids = instances["species"]
+        instances["scale"] = min_scale[ids] + rng.random(len(xs)) * (max_scale[ids] - min_scale[ids])
+    else:
+        instances["scale"] = rng.uniform(scale_range[0], scale_range[1], len(xs))
 
-    forest_map[
-        (slope > config.max_slope) | (heightmap > config.max_height) | (heightmap < config.min_height)
-    ] = VegetationType.EMPTY
-    return forest_map
+    return instances
 
 
 def resolve_paths() -> tuple[Path, Path | None]: